@@ -1,16 +1,34 @@
-
 import asyncio
-from server.database import get_pool, cleanup_pool
+import os
+import httpx
+
+# Telemetry lives in the API process, so read it from there
+API_URL = os.environ.get("API_URL", f"http://localhost:{os.environ.get('PORT', 5000)}")
 
 async def manage_pool():
-    pool = await get_pool()
-    print('Connection pool manager initialized')
-    try:
+    print(f'Connection pool manager watching {API_URL}')
+    async with httpx.AsyncClient(base_url=API_URL) as client:
         while True:
             await asyncio.sleep(5)
-            print(f'Active connections: {len(pool._holders)}')
-    finally:
-        await cleanup_pool()
+            try:
+                response = await client.get("/api/db/pool")
+            except httpx.HTTPError as e:
+                print(f'Pool telemetry unavailable: {str(e)}')
+                continue
+            if response.status_code == 404:
+                print(response.json()["detail"])
+                return
+            response.raise_for_status()
+            stats = response.json()["pool"]
+            wait = stats["acquireWait"]
+            print(
+                f'Pool size: {stats["size"]} (in use {stats["inUse"]}, idle {stats["idle"]}, '
+                f'limit {stats["limit"]}) | waiting: {stats["waiting"]} | '
+                f'acquire wait p50/p95/max: {wait["p50Ms"]:.1f}/{wait["p95Ms"]:.1f}/{wait["maxMs"]:.1f}ms | '
+                f'timeouts: {stats["acquireTimeouts"]} acquire, {stats["queryTimeouts"]} query'
+            )
+            for statement, latency in stats["queryLatency"].items():
+                print(f'  {statement}: {latency["count"]} queries, p95 {latency["p95Ms"]:.1f}ms')
 
 if __name__ == "__main__":
     asyncio.run(manage_pool())
@@ -1,16 +1,6 @@
 import asyncio
-from server.database import get_pool, cleanup_pool
-
-async def manage_pool():
-    print("Starting Pool Manager service...")
-    pool = await get_pool()
-    print("Connection pool manager initialized")
-    try:
-        while True:
-            await asyncio.sleep(5)
-            print(f"Active connections: {len(pool._holders)}")
-    finally:
-        await cleanup_pool()
+from scripts.connection_pool_manager import manage_pool
 
 if __name__ == "__main__":
+    print("Starting Pool Manager service...")
     asyncio.run(manage_pool())
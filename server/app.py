@@ -37,8 +37,7 @@ else:
     logger.warning("OPENAI_API_KEY is not set - some features may not work")
 
 # Import routes and dependencies
-from server.routes import graph, suggestions, websocket
-from server.database import init_db, cleanup_pool
+from server.routes import graph, suggestions, websocket, db
 from server.graph_manager import graph_manager
 from server.debug_routes import router as debug_router
 
@@ -1147,12 +1146,14 @@ async def lifespan(app: FastAPI):
     """Handle startup and shutdown events"""
     try:
         logger.info("Starting FastAPI application...")
-        logger.info("Initializing database...")
-        await init_db()
+        logger.info(f"Initializing {graph_manager.storage.name} storage...")
+        await graph_manager.storage.init()
         logger.info("Database initialization complete")
 
         logger.info("Initializing graph manager...")
         await graph_manager.initialize()
+        graph_manager.evolution_tracker.start_compaction()
+        graph_manager.start_metrics_sampler()
         logger.info("Graph manager initialization complete")
 
         yield
@@ -1161,7 +1162,8 @@ async def lifespan(app: FastAPI):
         raise
     finally:
         logger.info("Cleaning up resources...")
-        await cleanup_pool()
+        await graph_manager.shutdown()
+        await graph_manager.storage.close()
         logger.info("Cleanup complete")
 
 app = FastAPI(
@@ -1235,6 +1237,7 @@ app.include_router(suggestions.router, prefix="/api")
 app.include_router(websocket.router, prefix="/api")
 logger.info(f"WebSocket router included with prefix: /api (full path: /api/ws)")
 app.include_router(debug_router)
+app.include_router(db.router)
 
 # Add root redirect to explorer
 @app.get("/", include_in_schema=False)
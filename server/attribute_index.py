@@ -0,0 +1,115 @@
+"""In-memory inverted index over node and edge attributes.
+
+Maps (field, value) and (metadata key, value) pairs to element ids so metadata
+filters on the loaded graph are answered from posting sets instead of a scan
+over every node or edge. Only scalar metadata values are indexed; nested lists
+and objects are left to the database.
+"""
+import json
+import heapq
+from collections import defaultdict
+from typing import Any, Dict, Hashable, List, Optional, Set, Tuple
+
+FIELD = "field"
+META = "meta"
+
+
+def _term(namespace: str, key: str, value: Any) -> Optional[Tuple]:
+    """Index term for a scalar value, typed so that 1, 1.0, True and "1" stay distinct"""
+    if isinstance(value, bool):
+        return (namespace, key, "bool", value)
+    if isinstance(value, (int, float)):
+        return (namespace, key, "num", float(value))
+    if isinstance(value, str):
+        return (namespace, key, "str", value)
+    if value is None:
+        return (namespace, key, "null", None)
+    return None
+
+
+def metadata_filter_values(raw: str) -> List[Any]:
+    """
+    Candidate JSON values for a metadata filter given as a query string.
+
+    "automated_expansion" only matches the string; "5", "true" and "null" also
+    match the number, boolean or null they spell.
+    """
+    try:
+        parsed = json.loads(raw)
+    except ValueError:
+        return [raw]
+    if isinstance(parsed, (bool, int, float)) or parsed is None:
+        return [parsed, raw]
+    return [raw]
+
+
+class AttributeIndex:
+    """Posting sets from attribute terms to integer element ids"""
+
+    def __init__(self):
+        self._postings: Dict[Tuple, Set[int]] = defaultdict(set)
+        self._terms: Dict[int, List[Tuple]] = {}
+        self.refs: Dict[int, Hashable] = {}
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    def add(self, item_id: int, fields: Dict[str, Any], metadata: Dict[str, Any],
+            ref: Optional[Hashable] = None) -> None:
+        """Index an element, replacing whatever was indexed for it before"""
+        self.remove(item_id)
+        terms = [_term(FIELD, key, value) for key, value in fields.items()]
+        terms.extend(_term(META, key, value) for key, value in (metadata or {}).items())
+        terms = [term for term in terms if term is not None]
+        for term in terms:
+            self._postings[term].add(item_id)
+        self._terms[item_id] = terms
+        if ref is not None:
+            self.refs[item_id] = ref
+
+    def remove(self, item_id: int) -> None:
+        for term in self._terms.pop(item_id, ()):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.discard(item_id)
+                if not postings:
+                    del self._postings[term]
+        self.refs.pop(item_id, None)
+
+    def clear(self) -> None:
+        self._postings.clear()
+        self._terms.clear()
+        self.refs.clear()
+
+    def find(self, fields: Optional[Dict[str, Any]] = None,
+             metadata: Optional[Dict[str, List[Any]]] = None,
+             after: int = 0, limit: int = 100) -> List[int]:
+        """
+        Ids matching every field and metadata filter, in id order.
+
+        Each metadata key maps to a list of accepted values (any may match).
+        Returns at most limit ids greater than after, for keyset pagination.
+        """
+        clauses: List[Set[int]] = []
+        for key, value in (fields or {}).items():
+            if value is not None:
+                clauses.append(self._postings.get(_term(FIELD, key, value), set()))
+        for key, values in (metadata or {}).items():
+            matches: Set[int] = set()
+            for value in values:
+                term = _term(META, key, value)
+                if term is not None:
+                    matches |= self._postings.get(term, set())
+            clauses.append(matches)
+
+        if not clauses:
+            candidates = self._terms.keys()
+        else:
+            # Intersect starting from the most selective clause
+            clauses.sort(key=len)
+            candidates = clauses[0]
+            for clause in clauses[1:]:
+                candidates = candidates & clause
+                if not candidates:
+                    break
+        return heapq.nsmallest(limit, (item_id for item_id in candidates if item_id > after))
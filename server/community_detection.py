@@ -0,0 +1,190 @@
+"""Community detection on a sparse adjacency matrix.
+
+Engines take a symmetric scipy CSR adjacency (edge weights, both directions)
+and return one community label per row:
+
+    louvain            modularity optimization: nodes move to the neighboring
+                       community with the best modularity gain, then
+                       communities are merged into nodes and the process
+                       repeats on the smaller graph
+    label_propagation  each node adopts the label with the most edge weight
+                       among its neighbors until labels settle
+    components         connected components
+
+Moves are evaluated for all nodes at once with array operations. A random
+half of the improving nodes moves in each sweep, which keeps synchronous
+updates from oscillating. Runs are seeded, so results are reproducible.
+"""
+import os
+from typing import Callable, Dict, List, Tuple
+
+import networkx as nx
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.csgraph import connected_components
+
+CLUSTERING_METHOD = os.environ.get("CLUSTERING_METHOD", "louvain").lower()
+CLUSTERING_RESOLUTION = float(os.environ.get("CLUSTERING_RESOLUTION", "1.0"))
+MAX_SWEEPS = 32
+MAX_LEVELS = 16
+# A level stops once fewer than this fraction of its nodes would still move
+MIN_MOVES = 0.001
+
+
+def adjacency(graph: nx.Graph) -> Tuple[List[str], sp.csr_array]:
+    """Node order and symmetric weighted adjacency of a graph"""
+    nodes = list(graph.nodes())
+    matrix = nx.to_scipy_sparse_array(graph, nodelist=nodes, weight="weight", format="csr", dtype=np.float64)
+    return nodes, matrix
+
+
+def _relabel(labels: np.ndarray) -> np.ndarray:
+    return np.unique(labels, return_inverse=True)[1].astype(np.int64)
+
+
+def _neighbor_weights(rows: np.ndarray, cols: np.ndarray, weights: np.ndarray,
+                      labels: np.ndarray, size: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Total edge weight from each node to each neighboring label, as (node, label, weight)"""
+    keys = rows * size + labels[cols]
+    unique, inverse = np.unique(keys, return_inverse=True)
+    totals = np.bincount(inverse, weights=weights)
+    return unique // size, unique % size, totals
+
+
+def _best_per_node(nodes: np.ndarray, candidates: np.ndarray,
+                   scores: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Highest scoring candidate of each node; nodes must be sorted"""
+    if not len(nodes):
+        return nodes, candidates, scores
+    starts = np.flatnonzero(np.r_[True, nodes[1:] != nodes[:-1]])
+    counts = np.diff(np.r_[starts, len(nodes)])
+    best = np.maximum.reduceat(scores, starts)
+    # First candidate reaching its node's maximum
+    hits = np.flatnonzero(scores == np.repeat(best, counts))
+    first = hits[np.r_[True, nodes[hits[1:]] != nodes[hits[:-1]]]]
+    return nodes[first], candidates[first], scores[first]
+
+
+def _off_diagonal(matrix: sp.csr_array) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    coo = matrix.tocoo()
+    keep = coo.row != coo.col
+    return coo.row[keep].astype(np.int64), coo.col[keep].astype(np.int64), coo.data[keep]
+
+
+def _local_moving(matrix: sp.csr_array, resolution: float, total_weight: float,
+                  rng: np.random.Generator) -> np.ndarray:
+    size = matrix.shape[0]
+    degree = np.asarray(matrix.sum(axis=1)).ravel()
+    rows, cols, weights = _off_diagonal(matrix)
+    labels = np.arange(size, dtype=np.int64)
+    for _ in range(MAX_SWEEPS):
+        community_degree = np.bincount(labels, weights=degree, minlength=size)
+        nodes, candidates, link = _neighbor_weights(rows, cols, weights, labels, size)
+        # Weight to the node's own community, without the node itself
+        own = np.zeros(size)
+        mine = candidates == labels[nodes]
+        own[nodes[mine]] = link[mine]
+        gain = (link - own[nodes]) - resolution * degree[nodes] * (
+            community_degree[candidates] - community_degree[labels[nodes]] + degree[nodes]
+        ) / total_weight
+        gain[mine] = 0.0
+        nodes, candidates, gain = _best_per_node(nodes, candidates, gain)
+        improving = gain > 1e-12
+        if improving.sum() <= MIN_MOVES * size:
+            break
+        moving = improving & (rng.random(len(nodes)) < 0.5)
+        labels[nodes[moving]] = candidates[moving]
+    return _relabel(labels)
+
+
+def louvain(matrix: sp.csr_array, resolution: float = 1.0, seed: int = 0) -> np.ndarray:
+    """Multi-level modularity optimization; returns a community per node"""
+    rng = np.random.default_rng(seed)
+    total_weight = float(matrix.sum())
+    membership = np.arange(matrix.shape[0], dtype=np.int64)
+    if total_weight == 0:
+        return membership
+    level = matrix
+    for _ in range(MAX_LEVELS):
+        labels = _local_moving(level, resolution, total_weight, rng)
+        communities = int(labels.max()) + 1 if len(labels) else 0
+        if communities == level.shape[0]:
+            break
+        membership = labels[membership]
+        # Merge each community into one node; internal edges become self-loops
+        projection = sp.csr_array(
+            (np.ones(level.shape[0]), (np.arange(level.shape[0]), labels)),
+            shape=(level.shape[0], communities)
+        )
+        level = (projection.T @ level @ projection).tocsr()
+    return membership
+
+
+def label_propagation(matrix: sp.csr_array, resolution: float = 1.0, seed: int = 0) -> np.ndarray:
+    """Labels settle on the heaviest neighboring label; resolution is unused"""
+    rng = np.random.default_rng(seed)
+    size = matrix.shape[0]
+    rows, cols, weights = _off_diagonal(matrix)
+    labels = np.arange(size, dtype=np.int64)
+    for _ in range(MAX_SWEEPS):
+        nodes, candidates, link = _neighbor_weights(rows, cols, weights, labels, size)
+        own = np.zeros(size)
+        mine = candidates == labels[nodes]
+        own[nodes[mine]] = link[mine]
+        # Ties between equally heavy labels are broken at random
+        jitter = link * (1.0 + 1e-9 * rng.random(len(link)))
+        nodes, best, heaviest = _best_per_node(nodes, candidates, jitter)
+        # A node keeps its label while that label is among the heaviest
+        changed = heaviest > own[nodes] * (1.0 + 1e-9)
+        if changed.sum() <= MIN_MOVES * size:
+            break
+        moving = changed & (rng.random(len(nodes)) < 0.5)
+        labels[nodes[moving]] = best[moving]
+    return _relabel(labels)
+
+
+def components(matrix: sp.csr_array, resolution: float = 1.0, seed: int = 0) -> np.ndarray:
+    """Connected components; resolution is unused"""
+    return connected_components(matrix, directed=False)[1].astype(np.int64)
+
+
+ENGINES: Dict[str, Callable[..., np.ndarray]] = {
+    "louvain": louvain,
+    "label_propagation": label_propagation,
+    "components": components,
+}
+
+
+def modularity(matrix: sp.csr_array, labels: np.ndarray, resolution: float = 1.0) -> float:
+    """Newman modularity of a partition"""
+    total_weight = float(matrix.sum())
+    if total_weight == 0:
+        return 0.0
+    coo = matrix.tocoo()
+    same = labels[coo.row] == labels[coo.col]
+    internal = float(coo.data[same].sum())
+    community_degree = np.bincount(labels, weights=np.asarray(matrix.sum(axis=1)).ravel())
+    return internal / total_weight - resolution * float(np.square(community_degree / total_weight).sum())
+
+
+def detect_communities(graph: nx.Graph, method: str = CLUSTERING_METHOD,
+                       resolution: float = CLUSTERING_RESOLUTION,
+                       seed: int = 0) -> Tuple[List[List[str]], float]:
+    """
+    Partition a graph into communities.
+
+    Returns:
+        (communities, largest first, as lists of node ids; modularity)
+    """
+    engine = ENGINES.get(method)
+    if engine is None:
+        raise ValueError(f"Unknown clustering method: {method}")
+    if graph.number_of_nodes() == 0:
+        return [], 0.0
+    nodes, matrix = adjacency(graph)
+    labels = engine(matrix, resolution=resolution, seed=seed)
+    order = np.argsort(labels, kind="stable")
+    bounds = np.flatnonzero(np.r_[True, labels[order][1:] != labels[order][:-1], True])
+    communities = [[nodes[i] for i in order[start:end].tolist()] for start, end in zip(bounds[:-1], bounds[1:])]
+    communities.sort(key=len, reverse=True)
+    return communities, modularity(matrix, labels, resolution)
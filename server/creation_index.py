@@ -0,0 +1,235 @@
+"""Compact store of node and edge creation times.
+
+Nodes and edges get a position in the order they are first recorded.
+Creation times are int64 epoch microseconds in typed arrays indexed by that
+position. Metadata dicts are interned, so the many edges that share a label
+and weight share one entry. Metadata should only hold such shared values
+(type, source, edge label); per-node values like labels would add an entry
+per node and belong in the graph and its label index. An edge is stored as the positions of its two
+endpoints, so all edges of a set of nodes can be selected with one
+vectorized pass instead of a string key lookup per neighbor.
+
+With a path, new records are appended to a JSONL file of compact rows
+(["m", code, metadata], ["n", node, micros, code], ["e", source, target,
+micros, code]) so creation times survive restarts. The file is read on first
+use; later rows for the same node or edge win.
+"""
+import os
+import json
+import logging
+from array import array
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .history_writer import HistoryWriter
+
+logger = logging.getLogger(__name__)
+
+MISSING = -1
+
+
+def to_micros(timestamp: float) -> int:
+    return int(round(timestamp * 1_000_000))
+
+
+def from_micros(micros: int) -> str:
+    return datetime.fromtimestamp(micros / 1_000_000).isoformat()
+
+
+class CreationTimestamps:
+    """Creation time and metadata of every recorded node and edge"""
+
+    def __init__(self, path: Optional[str] = None, writer: Optional[HistoryWriter] = None):
+        self.path = path
+        self.writer = writer
+        self._loaded = path is None
+        self._pending: List[str] = []
+        self._node_positions: Dict[str, int] = {}
+        self.node_ids: List[str] = []
+        self.node_times = array("q")
+        self.node_metadata = array("i")
+        self.edge_source = array("q")
+        self.edge_target = array("q")
+        self.edge_times = array("q")
+        self.edge_metadata = array("i")
+        self._edge_positions: Dict[int, int] = {}
+        # Bumped on every record, so derived indexes know when to rebuild
+        self.node_version = 0
+        self.edge_version = 0
+        self.metadata: List[Dict[str, Any]] = []
+        self._metadata_lookup: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        self._ensure_loaded()
+        return len(self.node_times) + len(self.edge_times)
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        # Records are only queued once loaded, so nothing is waiting to be written
+        if not os.path.exists(self.path):
+            return
+        rows = 0
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError:
+                    # A write cut short by a crash
+                    continue
+                if row[0] == "m":
+                    key = json.dumps(row[2], sort_keys=True, default=str)
+                    self._metadata_lookup[key] = row[1]
+                    self.metadata.append(row[2])
+                elif row[0] == "n":
+                    self._set_node(row[1], row[2], row[3])
+                elif row[0] == "e":
+                    self._set_edge(row[1], row[2], row[3], row[4])
+                rows += 1
+        logger.info(f"Loaded {rows} creation time records")
+
+    def _write(self, row: List[Any]) -> None:
+        if self.path is not None:
+            self._pending.append(json.dumps(row, separators=(",", ":"), default=str) + "\n")
+
+    def persist(self) -> None:
+        """Queue the records added since the last call for appending to the file"""
+        if self._pending and self.writer is not None:
+            data = "".join(self._pending).encode("utf-8")
+            self._pending = []
+            self.writer.append(self.path, data)
+
+    def _intern(self, metadata: Optional[Dict[str, Any]]) -> int:
+        if not metadata:
+            return MISSING
+        key = json.dumps(metadata, sort_keys=True, default=str)
+        code = self._metadata_lookup.get(key)
+        if code is None:
+            code = self._metadata_lookup[key] = len(self.metadata)
+            self.metadata.append(metadata)
+            self._write(["m", code, metadata])
+        return code
+
+    def _node_position(self, node_id: str) -> int:
+        """Position of a node, registering it without a creation time if unknown"""
+        position = self._node_positions.get(node_id)
+        if position is None:
+            position = self._node_positions[node_id] = len(self.node_ids)
+            self.node_ids.append(node_id)
+            self.node_times.append(MISSING)
+            self.node_metadata.append(MISSING)
+        return position
+
+    @staticmethod
+    def _edge_key(u: int, v: int) -> int:
+        return (min(u, v) << 32) | max(u, v)
+
+    def _set_node(self, node_id: str, micros: int, code: int) -> None:
+        self.node_version += 1
+        position = self._node_position(node_id)
+        self.node_times[position] = micros
+        self.node_metadata[position] = code
+
+    def _set_edge(self, source: str, target: str, micros: int, code: int) -> None:
+        self.edge_version += 1
+        u, v = self._node_position(source), self._node_position(target)
+        key = self._edge_key(u, v)
+        position = self._edge_positions.get(key)
+        if position is None:
+            self._edge_positions[key] = len(self.edge_times)
+            self.edge_source.append(u)
+            self.edge_target.append(v)
+            self.edge_times.append(micros)
+            self.edge_metadata.append(code)
+        else:
+            self.edge_times[position] = micros
+            self.edge_metadata[position] = code
+
+    def add_node(self, node_id: str, timestamp: float, metadata: Optional[Dict[str, Any]] = None) -> None:
+        self._ensure_loaded()
+        micros, code = to_micros(timestamp), self._intern(metadata)
+        self._set_node(node_id, micros, code)
+        self._write(["n", node_id, micros, code])
+
+    def add_edge(self, source: str, target: str, timestamp: float,
+                 metadata: Optional[Dict[str, Any]] = None) -> None:
+        self._ensure_loaded()
+        micros, code = to_micros(timestamp), self._intern(metadata)
+        self._set_edge(source, target, micros, code)
+        self._write(["e", source, target, micros, code])
+
+    def has_node(self, node_id: str) -> bool:
+        self._ensure_loaded()
+        position = self._node_positions.get(node_id)
+        return position is not None and self.node_times[position] != MISSING
+
+    def has_edge(self, source: str, target: str) -> bool:
+        self._ensure_loaded()
+        u, v = self._node_positions.get(source), self._node_positions.get(target)
+        return u is not None and v is not None and self._edge_key(u, v) in self._edge_positions
+
+    def node_position(self, node_id: str) -> Optional[int]:
+        self._ensure_loaded()
+        return self._node_positions.get(node_id)
+
+    def node_columns(self) -> Tuple[int, np.ndarray]:
+        """Copy of the node time column with its version, see edge_columns"""
+        self._ensure_loaded()
+        version = self.node_version
+        return version, np.frombuffer(self.node_times.tobytes(), dtype=np.int64)
+
+    def edge_columns(self) -> Tuple[int, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Copies of the edge source, target and time columns, with their version.
+
+        Copied through bytes, which is atomic under the GIL, so the columns can
+        be read from a worker thread while edges are still being recorded.
+        """
+        self._ensure_loaded()
+        version = self.edge_version
+        source, target, times = self.edge_source.tobytes(), self.edge_target.tobytes(), self.edge_times.tobytes()
+        count = min(len(source), len(target), len(times)) // 8
+        return (version,
+                np.frombuffer(source, dtype=np.int64, count=count),
+                np.frombuffer(target, dtype=np.int64, count=count),
+                np.frombuffer(times, dtype=np.int64, count=count))
+
+    def node_created(self, node_id: str) -> Optional[str]:
+        """ISO creation time of a node, or None if it was never recorded"""
+        self._ensure_loaded()
+        position = self._node_positions.get(node_id)
+        if position is None or self.node_times[position] == MISSING:
+            return None
+        return from_micros(self.node_times[position])
+
+    def edges_of(self, node_ids: Iterable[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Recorded edges of each node, in creation order.
+
+        Returns:
+            Node id -> [{"neighbor", "created_at"}] for every node with edges
+        """
+        self._ensure_loaded()
+        positions = {self._node_positions[n]: n for n in node_ids if n in self._node_positions}
+        if not positions or not self.edge_times:
+            return {}
+        source = np.frombuffer(self.edge_source, dtype=np.int64)
+        target = np.frombuffer(self.edge_target, dtype=np.int64)
+        times = np.frombuffer(self.edge_times, dtype=np.int64)
+        wanted = np.fromiter(positions, dtype=np.int64, count=len(positions))
+
+        result: Dict[str, List[Tuple[int, str, int]]] = {}
+        # Self-loops are only listed from their source end
+        for ends, others, mask in ((source, target, True), (target, source, source != target)):
+            for edge in np.flatnonzero(np.isin(ends, wanted) & mask):
+                result.setdefault(positions[int(ends[edge])], []).append(
+                    (int(edge), self.node_ids[int(others[edge])], int(times[edge]))
+                )
+        return {
+            node_id: [{"neighbor": neighbor, "created_at": from_micros(micros)}
+                      for _, neighbor, micros in sorted(edges)]
+            for node_id, edges in result.items()
+        }
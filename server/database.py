@@ -2,11 +2,18 @@ import os
 import json
 import asyncpg
 import logging
+import time
 import asyncio
+import contextvars
+from bisect import bisect_left
+from collections import deque
+from datetime import datetime
 from typing import List, Dict, Any, Optional
 from asyncpg.pool import Pool
 from contextlib import asynccontextmanager
 
+from .utils.rows import coalesce_rows
+
 logger = logging.getLogger(__name__)
 
 # Database connection
@@ -31,9 +38,230 @@ MIN_POOL_SIZE = int(os.environ.get("MIN_DB_POOL_SIZE", "2"))
 MAX_POOL_SIZE = int(os.environ.get("MAX_DB_POOL_SIZE", "10"))
 COMMAND_TIMEOUT = int(os.environ.get("DB_COMMAND_TIMEOUT", "60"))
 
+# Rows per batched UPDATE ... FROM (VALUES ...) statement (4 parameters per row)
+UPDATE_BATCH_SIZE = int(os.environ.get("DB_UPDATE_BATCH_SIZE", "1000"))
+
+# Pool health settings - liveness is checked periodically at the pool level
+# instead of probing every connection on acquire
+HEALTH_CHECK_INTERVAL = float(os.environ.get("DB_HEALTH_CHECK_INTERVAL", "30"))
+MAX_INACTIVE_CONNECTION_LIFETIME = float(os.environ.get("DB_MAX_INACTIVE_CONNECTION_LIFETIME", "300"))
+
+# Pool telemetry settings
+ACQUIRE_TIMEOUT = float(os.environ.get("DB_ACQUIRE_TIMEOUT", "30"))
+QUERY_TELEMETRY_ENABLED = os.environ.get("DB_QUERY_TELEMETRY", "true").lower() in ("1", "true", "yes")
+
+# Adaptive pool sizing - the number of concurrently checked-out connections is
+# moved between MIN_POOL_SIZE and MAX_POOL_SIZE based on measured acquire waits
+ADAPTIVE_POOL_ENABLED = os.environ.get("DB_ADAPTIVE_POOL", "false").lower() in ("1", "true", "yes")
+ADAPTIVE_POOL_INTERVAL = float(os.environ.get("DB_ADAPTIVE_POOL_INTERVAL", "10"))
+ADAPTIVE_POOL_TARGET_WAIT_MS = float(os.environ.get("DB_ADAPTIVE_POOL_TARGET_WAIT_MS", "20"))
+
+# Acquire wait / query latency histogram bucket upper bounds, in milliseconds
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
 # Global connection pool
 pool: Optional[Pool] = None
 
+# Background pool health check
+_health_check_task: Optional[asyncio.Task] = None
+pool_health: Dict[str, Any] = {"healthy": None, "last_check": None, "last_error": None}
+
+# Unit of work bound to the current task (and the tasks it spawns)
+_current_unit_of_work: contextvars.ContextVar[Optional["UnitOfWork"]] = contextvars.ContextVar(
+    "unit_of_work", default=None
+)
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram in milliseconds"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last bucket is overflow
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value_ms: float) -> None:
+        self.counts[bisect_left(self.buckets, value_ms)] += 1
+        self.count += 1
+        self.total += value_ms
+        self.max = max(self.max, value_ms)
+
+    def percentile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th quantile (0 when empty)"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return float(min(bound, self.max))
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "meanMs": self.total / self.count if self.count else 0.0,
+            "p50Ms": self.percentile(0.5),
+            "p95Ms": self.percentile(0.95),
+            "p99Ms": self.percentile(0.99),
+            "maxMs": self.max,
+            "buckets": {
+                **{f"le_{bound}": count for bound, count in zip(self.buckets, self.counts)},
+                "overflow": self.counts[-1]
+            }
+        }
+
+
+class PoolTelemetry:
+    """Acquire waits, checkouts, per-statement query latency and timeouts for the pool"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.acquire_wait = LatencyHistogram()
+        self.acquire_timeouts = 0
+        self.acquire_errors = 0
+        self.query_latency: Dict[str, LatencyHistogram] = {}
+        self.query_timeouts = 0
+        self.query_errors = 0
+        self.checked_out = 0
+        self.waiting = 0
+        self.recent_timeouts: deque = deque(maxlen=50)
+        self._window = LatencyHistogram()
+        self._window_peak = 0
+
+    def record_acquire(self, wait_ms: float) -> None:
+        self.acquire_wait.observe(wait_ms)
+        self._window.observe(wait_ms)
+        self.checked_out += 1
+        self._window_peak = max(self._window_peak, self.checked_out)
+
+    def record_release(self) -> None:
+        self.checked_out = max(0, self.checked_out - 1)
+
+    def record_acquire_failure(self, timed_out: bool) -> None:
+        if timed_out:
+            self.acquire_timeouts += 1
+            self.recent_timeouts.append({"kind": "acquire", "at": datetime.now().isoformat()})
+        else:
+            self.acquire_errors += 1
+
+    def record_query(self, record) -> None:
+        """Query logger callback; record is an asyncpg LoggedQuery"""
+        statement = _statement_type(record.query)
+        histogram = self.query_latency.get(statement)
+        if histogram is None:
+            histogram = self.query_latency[statement] = LatencyHistogram()
+        histogram.observe(record.elapsed * 1000)
+        if record.exception is not None:
+            if isinstance(record.exception, (asyncio.TimeoutError, asyncpg.QueryCanceledError)):
+                self.query_timeouts += 1
+                self.recent_timeouts.append({
+                    "kind": "query",
+                    "statement": statement,
+                    "at": datetime.now().isoformat()
+                })
+            else:
+                self.query_errors += 1
+
+    def take_window(self) -> Dict[str, float]:
+        """Acquire wait p95 and peak checkouts since the previous call"""
+        window, peak = self._window, self._window_peak
+        self._window, self._window_peak = LatencyHistogram(), self.checked_out
+        return {"p95WaitMs": window.percentile(0.95), "acquires": window.count, "peakInUse": peak}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "acquireWait": self.acquire_wait.to_dict(),
+            "acquireTimeouts": self.acquire_timeouts,
+            "acquireErrors": self.acquire_errors,
+            "queryLatency": {name: h.to_dict() for name, h in sorted(self.query_latency.items())},
+            "queryTimeouts": self.query_timeouts,
+            "queryErrors": self.query_errors,
+            "recentTimeouts": list(self.recent_timeouts)
+        }
+
+
+def _statement_type(query: str) -> str:
+    """Leading SQL keyword of a statement, e.g. SELECT or UPDATE"""
+    words = query.lstrip().split(None, 1)
+    return words[0].upper() if words else "OTHER"
+
+
+class ConnectionLimiter:
+    """Caps concurrent connection checkouts; the cap can be changed at runtime"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.active = 0
+        self._waiters: deque = deque()
+
+    async def acquire(self) -> None:
+        while self.active >= self.limit:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    # Woken but cancelled before taking the slot: pass it on
+                    self._wake()
+                raise
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+        self.active += 1
+
+    def release(self) -> None:
+        self.active = max(0, self.active - 1)
+        self._wake()
+
+    def set_limit(self, limit: int) -> None:
+        self.limit = limit
+        self._wake()
+
+    def _wake(self) -> None:
+        free = self.limit - self.active
+        while free > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+
+class PoolSizeController:
+    """
+    Chooses the checkout limit from the acquire waits measured over an interval.
+
+    Grows quickly while the p95 wait is above target and shrinks one
+    connection at a time once waits are well below target and the peak number
+    of checked-out connections leaves headroom under the current limit.
+    """
+
+    def __init__(self, min_size: int = MIN_POOL_SIZE, max_size: int = MAX_POOL_SIZE,
+                 target_wait_ms: float = ADAPTIVE_POOL_TARGET_WAIT_MS, grow_step: int = 2):
+        self.min_size = min_size
+        self.max_size = max_size
+        self.target_wait_ms = target_wait_ms
+        self.grow_step = grow_step
+
+    def adjust(self, limit: int, p95_wait_ms: float, peak_in_use: int) -> int:
+        if p95_wait_ms > self.target_wait_ms:
+            return min(self.max_size, limit + self.grow_step)
+        if p95_wait_ms < self.target_wait_ms / 4 and peak_in_use < limit - 1:
+            return max(self.min_size, limit - 1)
+        return limit
+
+
+pool_telemetry = PoolTelemetry()
+
+# Set while the adaptive pool controller is running
+_connection_limiter: Optional[ConnectionLimiter] = None
+_pool_controller_task: Optional[asyncio.Task] = None
+
 async def test_db_connection():
     """Test database connection"""
     try:
@@ -75,6 +303,32 @@ async def init_db():
                     metadata JSONB DEFAULT '{}'::jsonb
                 )
             """)
+            # jsonb_path_ops GIN indexes serve metadata containment (@>) filters
+            await conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_nodes_metadata ON nodes USING GIN (metadata jsonb_path_ops)
+            """)
+            await conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_edges_metadata ON edges USING GIN (metadata jsonb_path_ops)
+            """)
+            await conn.execute("CREATE INDEX IF NOT EXISTS idx_nodes_type ON nodes (type)")
+            await conn.execute("CREATE INDEX IF NOT EXISTS idx_edges_label ON edges (label)")
+            # Adjacency lookups in both directions for recursive traversals
+            await conn.execute("CREATE INDEX IF NOT EXISTS idx_edges_source ON edges (source_id, target_id)")
+            await conn.execute("CREATE INDEX IF NOT EXISTS idx_edges_target ON edges (target_id, source_id)")
+            await conn.execute("""
+                CREATE OR REPLACE FUNCTION kg_reserve_ids(table_name TEXT, block_size INTEGER)
+                RETURNS BIGINT AS $$
+                DECLARE
+                    seq TEXT := pg_get_serial_sequence(table_name, 'id');
+                    last_id BIGINT;
+                BEGIN
+                    -- Inserts draw from the same sequence; hold them off until the block is claimed
+                    EXECUTE format('LOCK TABLE %I IN SHARE ROW EXCLUSIVE MODE', table_name);
+                    last_id := setval(seq, nextval(seq) + block_size - 1);
+                    RETURN last_id - block_size + 1;
+                END;
+                $$ LANGUAGE plpgsql
+            """)
             logger.info("Database schema initialized")
         return True
     except Exception as e:
@@ -99,6 +353,7 @@ async def get_pool() -> Pool:
                 min_size=MIN_POOL_SIZE,
                 max_size=MAX_POOL_SIZE,
                 command_timeout=COMMAND_TIMEOUT,
+                max_inactive_connection_lifetime=MAX_INACTIVE_CONNECTION_LIFETIME,
                 init=init_connection,
                 server_settings={
                     'application_name': 'knowledge_graph',
@@ -122,18 +377,38 @@ async def init_connection(conn: asyncpg.Connection):
         decoder=json.loads,
         schema='pg_catalog'
     )
+    if QUERY_TELEMETRY_ENABLED:
+        conn.add_query_logger(pool_telemetry.record_query)
 
 async def get_connection():
     """Get a database connection from the pool with error handling"""
     if pool is None:
         await get_pool()
+    limiter = _connection_limiter
+    started = time.perf_counter()
+    pool_telemetry.waiting += 1
+    admitted = False
     try:
-        connection = await pool.acquire()
-        await connection.execute('SELECT 1')  # Verify connection is active
-        return connection
+        if limiter is not None:
+            await asyncio.wait_for(limiter.acquire(), ACQUIRE_TIMEOUT or None)
+            admitted = True
+        # No per-acquire liveness probe: stale connections are recycled by the
+        # pool (max_inactive_connection_lifetime) and by the health check task
+        connection = await pool.acquire(timeout=ACQUIRE_TIMEOUT or None)
     except Exception as e:
-        logger.error(f"Database connection error: {str(e)}", exc_info=True)
+        if admitted:
+            limiter.release()
+        timed_out = isinstance(e, asyncio.TimeoutError)
+        pool_telemetry.record_acquire_failure(timed_out)
+        if timed_out:
+            logger.error(f"Timed out after {ACQUIRE_TIMEOUT}s waiting for a database connection")
+        else:
+            logger.error(f"Database connection error: {str(e)}", exc_info=True)
         raise
+    finally:
+        pool_telemetry.waiting -= 1
+    pool_telemetry.record_acquire((time.perf_counter() - started) * 1000)
+    return connection
 
 async def return_connection(connection):
     """Return a connection to the pool"""
@@ -142,10 +417,108 @@ async def return_connection(connection):
     except Exception as e:
         logger.error(f"Error returning connection to pool: {str(e)}", exc_info=True)
         raise
+    finally:
+        pool_telemetry.record_release()
+        if _connection_limiter is not None:
+            _connection_limiter.release()
+
+class UnitOfWork:
+    """
+    Holds a single pooled connection for the duration of a multi-step operation.
+
+    The connection is acquired lazily on first use, so work done before the
+    first query (such as waiting on an LLM) does not pin a pool slot. Tasks
+    spawned inside the unit share the connection one statement block at a time.
+    """
+
+    def __init__(self, transaction: bool = False):
+        self.transaction = transaction
+        self.connection = None
+        self._transaction = None
+        self._lock = asyncio.Lock()
+        self._owner = None
+
+    async def _ensure_connection(self):
+        if self.connection is None:
+            self.connection = await get_connection()
+            if self.transaction:
+                self._transaction = self.connection.transaction()
+                await self._transaction.start()
+        return self.connection
+
+    @asynccontextmanager
+    async def borrow(self):
+        """Borrow the shared connection, serializing access between tasks"""
+        task = asyncio.current_task()
+        if self._owner is task:
+            # Re-entrant use from the task already holding the connection
+            yield await self._ensure_connection()
+            return
+        async with self._lock:
+            self._owner = task
+            try:
+                yield await self._ensure_connection()
+            finally:
+                self._owner = None
+
+    async def close(self, commit: bool = True):
+        """Finish the transaction (if any) and release the connection"""
+        if self.connection is None:
+            return
+        try:
+            if self._transaction is not None:
+                if commit:
+                    await self._transaction.commit()
+                else:
+                    await self._transaction.rollback()
+        finally:
+            self._transaction = None
+            connection, self.connection = self.connection, None
+            await return_connection(connection)
+
+@asynccontextmanager
+async def unit_of_work(transaction: bool = False):
+    """
+    Run a block of database work on one connection.
+
+    Every get_db() call made inside the block (including from the helpers in
+    this module) reuses the same connection. Nested units join the outermost
+    one. With transaction=True all statements run in a single transaction that
+    is committed on success and rolled back on error; nested inside another
+    unit, that transaction (a savepoint if the outer unit has one) runs on the
+    shared connection, which the block keeps to itself until it ends.
+    """
+    current = _current_unit_of_work.get()
+    if current is not None:
+        if not transaction:
+            yield current
+            return
+        async with current.borrow() as connection:
+            async with connection.transaction():
+                yield current
+        return
+
+    uow = UnitOfWork(transaction=transaction)
+    token = _current_unit_of_work.set(uow)
+    try:
+        yield uow
+    except BaseException:
+        await uow.close(commit=False)
+        raise
+    else:
+        await uow.close(commit=True)
+    finally:
+        _current_unit_of_work.reset(token)
 
 @asynccontextmanager
 async def get_db():
     """Context manager for database connections"""
+    uow = _current_unit_of_work.get()
+    if uow is not None:
+        async with uow.borrow() as connection:
+            yield connection
+        return
+
     connection = None
     try:
         connection = await get_connection()
@@ -154,10 +527,124 @@ async def get_db():
         if connection:
             await return_connection(connection)
 
+async def check_pool_health() -> bool:
+    """Probe one pooled connection and expire the pool's connections on failure"""
+    pool_health["last_check"] = datetime.now().isoformat()
+    try:
+        current_pool = await get_pool()
+        async with current_pool.acquire() as conn:
+            await conn.fetchval("SELECT 1")
+        pool_health["healthy"] = True
+        pool_health["last_error"] = None
+        return True
+    except Exception as e:
+        logger.warning(f"Database pool health check failed: {str(e)}")
+        pool_health["healthy"] = False
+        pool_health["last_error"] = str(e)
+        if pool is not None:
+            # Force every connection to be re-established on its next acquire
+            await pool.expire_connections()
+        return False
+
+async def _health_check_loop(interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        await check_pool_health()
+
+def start_health_check(interval: float = HEALTH_CHECK_INTERVAL):
+    """Start the periodic pool health check on the running event loop"""
+    global _health_check_task
+    if _health_check_task is None or _health_check_task.done():
+        _health_check_task = asyncio.create_task(_health_check_loop(interval))
+        logger.info(f"Started database pool health check every {interval}s")
+
+async def stop_health_check():
+    """Stop the periodic pool health check"""
+    global _health_check_task
+    task, _health_check_task = _health_check_task, None
+    if task is not None and not task.done():
+        task.cancel()
+        if task.get_loop() is not asyncio.get_running_loop():
+            return
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+def get_pool_stats() -> Dict[str, Any]:
+    """Current pool occupancy plus the collected acquire and query telemetry"""
+    stats: Dict[str, Any] = {
+        "size": 0,
+        "idle": 0,
+        "inUse": 0,
+        "minSize": MIN_POOL_SIZE,
+        "maxSize": MAX_POOL_SIZE,
+        "checkedOut": pool_telemetry.checked_out,
+        "waiting": pool_telemetry.waiting,
+        "adaptive": _connection_limiter is not None,
+        "limit": _connection_limiter.limit if _connection_limiter is not None else MAX_POOL_SIZE,
+        "health": dict(pool_health)
+    }
+    if pool is not None:
+        stats["size"] = pool.get_size()
+        stats["idle"] = pool.get_idle_size()
+        stats["inUse"] = stats["size"] - stats["idle"]
+    stats.update(pool_telemetry.to_dict())
+    return stats
+
+async def _pool_controller_loop(controller: PoolSizeController, interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        limiter = _connection_limiter
+        if limiter is None:
+            return
+        window = pool_telemetry.take_window()
+        limit = controller.adjust(limiter.limit, window["p95WaitMs"], window["peakInUse"])
+        if limit != limiter.limit:
+            logger.info(
+                f"Adjusting database connection limit {limiter.limit} -> {limit} "
+                f"(p95 acquire wait {window['p95WaitMs']:.1f}ms, peak in use {window['peakInUse']})"
+            )
+            # Surplus idle connections are closed by max_inactive_connection_lifetime
+            limiter.set_limit(limit)
+
+def start_pool_controller(interval: float = ADAPTIVE_POOL_INTERVAL,
+                          controller: Optional[PoolSizeController] = None):
+    """Start adapting the connection limit on the running event loop"""
+    global _connection_limiter, _pool_controller_task
+    if _pool_controller_task is not None and not _pool_controller_task.done():
+        return
+    controller = controller or PoolSizeController()
+    _connection_limiter = ConnectionLimiter(controller.min_size)
+    pool_telemetry.take_window()
+    _pool_controller_task = asyncio.create_task(_pool_controller_loop(controller, interval))
+    logger.info(
+        f"Started adaptive pool sizing between {controller.min_size} and {controller.max_size} "
+        f"connections (target p95 wait {controller.target_wait_ms}ms)"
+    )
+
+async def stop_pool_controller():
+    """Stop adapting the connection limit and lift the cap"""
+    global _connection_limiter, _pool_controller_task
+    task, _pool_controller_task = _pool_controller_task, None
+    limiter, _connection_limiter = _connection_limiter, None
+    if limiter is not None:
+        limiter.set_limit(MAX_POOL_SIZE)
+    if task is not None and not task.done():
+        task.cancel()
+        if task.get_loop() is not asyncio.get_running_loop():
+            return
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
 async def cleanup_pool():
     """Cleanup the database connection pool"""
     global pool
     try:
+        await stop_health_check()
+        await stop_pool_controller()
         if pool:
             # Log active connections before cleanup
             if hasattr(pool, '_holders'):
@@ -361,4 +848,479 @@ async def get_all_edges():
             return edges
     except Exception as e:
         logger.error(f"Error retrieving all edges: {str(e)}", exc_info=True)
-        raise
\ No newline at end of file
+        raise
+
+
+async def reserve_ids(table: str, count: int) -> range:
+    """
+    Claim a contiguous block of ids from a table's SERIAL sequence.
+
+    Runs kg_reserve_ids() in one round trip; it locks the table against
+    concurrent inserts while advancing the sequence, so no other row can be
+    assigned an id inside the returned range.
+    """
+    if count <= 0:
+        return range(0)
+    try:
+        async with get_db() as conn:
+            start = await conn.fetchval("SELECT kg_reserve_ids($1, $2)", table, count)
+            logger.debug(f"Reserved {table} ids {start}..{start + count - 1}")
+            return range(start, start + count)
+    except Exception as e:
+        logger.error(f"Error reserving {count} ids for {table}: {str(e)}", exc_info=True)
+        raise
+
+async def reserve_node_ids(count: int) -> range:
+    """Claim a contiguous block of node ids"""
+    return await reserve_ids("nodes", count)
+
+async def reserve_edge_ids(count: int) -> range:
+    """Claim a contiguous block of edge ids"""
+    return await reserve_ids("edges", count)
+
+async def insert_nodes(nodes: List[Dict[str, Any]]) -> None:
+    """Insert nodes with pre-allocated ids"""
+    if not nodes:
+        return
+    try:
+        async with get_db() as conn:
+            await conn.executemany(
+                """
+                INSERT INTO nodes (id, label, type, metadata)
+                VALUES ($1, $2, $3, $4)
+                """,
+                [
+                    (node["id"], node.get("label"), node.get("type", "concept"), node.get("metadata", {}))
+                    for node in nodes
+                ]
+            )
+            logger.debug(f"Inserted {len(nodes)} nodes")
+    except Exception as e:
+        logger.error(f"Error inserting {len(nodes)} nodes: {str(e)}", exc_info=True)
+        raise
+
+async def insert_edges(edges: List[Dict[str, Any]]) -> None:
+    """Insert edges with pre-allocated ids"""
+    if not edges:
+        return
+    try:
+        async with get_db() as conn:
+            await conn.executemany(
+                """
+                INSERT INTO edges (id, source_id, target_id, label, weight, metadata)
+                VALUES ($1, $2, $3, $4, $5, $6)
+                """,
+                [
+                    (
+                        edge["id"],
+                        edge["sourceId"],
+                        edge["targetId"],
+                        edge.get("label", "related_to"),
+                        edge.get("weight", 1.0),
+                        edge.get("metadata", {})
+                    )
+                    for edge in edges
+                ]
+            )
+            logger.debug(f"Inserted {len(edges)} edges")
+    except Exception as e:
+        logger.error(f"Error inserting {len(edges)} edges: {str(e)}", exc_info=True)
+        raise
+
+def _values_placeholders(row_count: int, casts: List[str]) -> str:
+    """Build a "($1::integer, $2::text), ($3::integer, ...)" VALUES list"""
+    width = len(casts)
+    return ", ".join(
+        "(" + ", ".join(f"${r * width + c + 1}::{cast}" for c, cast in enumerate(casts)) + ")"
+        for r in range(row_count)
+    )
+
+async def update_nodes(nodes: List[Dict[str, Any]]) -> None:
+    """Persist label, type and metadata of existing nodes in batched UPDATEs"""
+    nodes = coalesce_rows(nodes)
+    if not nodes:
+        return
+    try:
+        async with get_db() as conn:
+            for start in range(0, len(nodes), UPDATE_BATCH_SIZE):
+                chunk = nodes[start:start + UPDATE_BATCH_SIZE]
+                args = []
+                for node in chunk:
+                    args.extend((node["id"], node.get("label"), node.get("type", "concept"), node.get("metadata", {})))
+                await conn.execute(
+                    f"""
+                    UPDATE nodes AS n
+                    SET label = v.label, type = v.type, metadata = v.metadata
+                    FROM (VALUES {_values_placeholders(len(chunk), ["integer", "text", "text", "jsonb"])})
+                        AS v(id, label, type, metadata)
+                    WHERE n.id = v.id
+                    """,
+                    *args
+                )
+            logger.debug(f"Updated {len(nodes)} nodes")
+    except Exception as e:
+        logger.error(f"Error updating {len(nodes)} nodes: {str(e)}", exc_info=True)
+        raise
+
+async def update_edges(edges: List[Dict[str, Any]]) -> None:
+    """Persist label, weight and metadata of existing edges in batched UPDATEs"""
+    edges = coalesce_rows(edges)
+    if not edges:
+        return
+    try:
+        async with get_db() as conn:
+            for start in range(0, len(edges), UPDATE_BATCH_SIZE):
+                chunk = edges[start:start + UPDATE_BATCH_SIZE]
+                args = []
+                for edge in chunk:
+                    args.extend((
+                        edge["id"],
+                        edge.get("label", "related_to"),
+                        float(edge.get("weight", 1.0)),
+                        edge.get("metadata", {})
+                    ))
+                await conn.execute(
+                    f"""
+                    UPDATE edges AS e
+                    SET label = v.label, weight = v.weight, metadata = v.metadata
+                    FROM (VALUES {_values_placeholders(len(chunk), ["integer", "text", "float8", "jsonb"])})
+                        AS v(id, label, weight, metadata)
+                    WHERE e.id = v.id
+                    """,
+                    *args
+                )
+            logger.debug(f"Updated {len(edges)} edges")
+    except Exception as e:
+        logger.error(f"Error updating {len(edges)} edges: {str(e)}", exc_info=True)
+        raise
+
+async def delete_node(node_id: int) -> bool:
+    """Delete a node and the edges attached to it"""
+    try:
+        async with get_db() as conn:
+            async with conn.transaction():
+                await conn.execute(
+                    "DELETE FROM edges WHERE source_id = $1 OR target_id = $1", node_id
+                )
+                status = await conn.execute("DELETE FROM nodes WHERE id = $1", node_id)
+            deleted = status.endswith(" 1")
+            logger.debug(f"Deleted node {node_id}" if deleted else f"Node {node_id} not found")
+            return deleted
+    except Exception as e:
+        logger.error(f"Error deleting node {node_id}: {str(e)}", exc_info=True)
+        raise
+
+async def delete_edge(edge_id: int) -> bool:
+    """Delete an edge"""
+    try:
+        async with get_db() as conn:
+            status = await conn.execute("DELETE FROM edges WHERE id = $1", edge_id)
+            deleted = status.endswith(" 1")
+            logger.debug(f"Deleted edge {edge_id}" if deleted else f"Edge {edge_id} not found")
+            return deleted
+    except Exception as e:
+        logger.error(f"Error deleting edge {edge_id}: {str(e)}", exc_info=True)
+        raise
+
+async def iter_nodes(batch_size: int = 1000):
+    """
+    Stream all nodes in id order, one batch at a time.
+
+    Uses keyset pagination, so no transaction or cursor is held open between
+    batches and memory stays bounded by batch_size.
+    """
+    last_id = 0
+    while True:
+        try:
+            async with get_db() as conn:
+                rows = await conn.fetch(
+                    "SELECT * FROM nodes WHERE id > $1 ORDER BY id LIMIT $2", last_id, batch_size
+                )
+        except Exception as e:
+            logger.error(f"Error streaming nodes after id {last_id}: {str(e)}", exc_info=True)
+            raise
+        if not rows:
+            return
+        yield [
+            {
+                "id": row["id"],
+                "label": row["label"],
+                "type": row["type"],
+                "metadata": row["metadata"] or {}
+            }
+            for row in rows
+        ]
+        last_id = rows[-1]["id"]
+
+async def iter_edges(batch_size: int = 1000):
+    """Stream all edges in id order, one batch at a time"""
+    last_id = 0
+    while True:
+        try:
+            async with get_db() as conn:
+                rows = await conn.fetch(
+                    "SELECT * FROM edges WHERE id > $1 ORDER BY id LIMIT $2", last_id, batch_size
+                )
+        except Exception as e:
+            logger.error(f"Error streaming edges after id {last_id}: {str(e)}", exc_info=True)
+            raise
+        if not rows:
+            return
+        yield [
+            {
+                "id": row["id"],
+                "sourceId": row["source_id"],
+                "targetId": row["target_id"],
+                "label": row["label"],
+                "weight": row["weight"],
+                "metadata": row["metadata"] or {}
+            }
+            for row in rows
+        ]
+        last_id = rows[-1]["id"]
+
+def _filter_conditions(metadata: Dict[str, List[Any]], columns: Dict[str, Any], args: List[Any]) -> List[str]:
+    """WHERE conditions for column equality and metadata containment filters"""
+    conditions = []
+    for column, value in columns.items():
+        if value is not None:
+            args.append(value)
+            conditions.append(f"{column} = ${len(args)}")
+    for key, values in metadata.items():
+        alternatives = []
+        for value in values:
+            args.append({key: value})
+            alternatives.append(f"metadata @> ${len(args)}::jsonb")
+        conditions.append("(" + " OR ".join(alternatives) + ")")
+    return conditions
+
+async def find_nodes(metadata: Optional[Dict[str, List[Any]]] = None, node_type: Optional[str] = None,
+                     after: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
+    """
+    Nodes matching type and metadata filters, in id order after the given id.
+
+    Each metadata key maps to a list of accepted values; the containment
+    predicates are answered by the GIN index on nodes.metadata.
+    """
+    args: List[Any] = [after]
+    conditions = ["id > $1"] + _filter_conditions(metadata or {}, {"type": node_type}, args)
+    args.append(limit)
+    try:
+        async with get_db() as conn:
+            rows = await conn.fetch(
+                f"SELECT * FROM nodes WHERE {' AND '.join(conditions)} ORDER BY id LIMIT ${len(args)}",
+                *args
+            )
+            return [
+                {
+                    "id": row["id"],
+                    "label": row["label"],
+                    "type": row["type"],
+                    "metadata": row["metadata"] or {}
+                }
+                for row in rows
+            ]
+    except Exception as e:
+        logger.error(f"Error filtering nodes: {str(e)}", exc_info=True)
+        raise
+
+async def find_edges(metadata: Optional[Dict[str, List[Any]]] = None, label: Optional[str] = None,
+                     after: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
+    """Edges matching label and metadata filters, in id order after the given id"""
+    args: List[Any] = [after]
+    conditions = ["id > $1"] + _filter_conditions(metadata or {}, {"label": label}, args)
+    args.append(limit)
+    try:
+        async with get_db() as conn:
+            rows = await conn.fetch(
+                f"SELECT * FROM edges WHERE {' AND '.join(conditions)} ORDER BY id LIMIT ${len(args)}",
+                *args
+            )
+            return [
+                {
+                    "id": row["id"],
+                    "sourceId": row["source_id"],
+                    "targetId": row["target_id"],
+                    "label": row["label"],
+                    "weight": row["weight"],
+                    "metadata": row["metadata"] or {}
+                }
+                for row in rows
+            ]
+    except Exception as e:
+        logger.error(f"Error filtering edges: {str(e)}", exc_info=True)
+        raise
+
+# Neighbors of h.node_id over edges in either direction, lowest ids first,
+# limited to the fan-out ($3; NULL means no limit)
+_FANOUT_LATERAL = """
+    CROSS JOIN LATERAL (
+        SELECT neighbor_id FROM (
+            SELECT target_id AS neighbor_id FROM edges WHERE source_id = h.node_id
+            UNION
+            SELECT source_id FROM edges WHERE target_id = h.node_id
+        ) adjacent
+        ORDER BY neighbor_id
+        LIMIT $3
+    ) n
+"""
+
+async def neighborhood(node_id: int, depth: int, fanout: Optional[int] = None,
+                       max_nodes: int = 1000) -> Dict[int, int]:
+    """
+    Nodes within depth hops of node_id, mapped to their hop distance.
+
+    Runs as one recursive CTE. UNION discards repeated (node, depth) rows, so
+    each node is expanded at most once per depth. Rows also carry their
+    node's rank within its level and a running lower bound on the nodes
+    reached so far, so expansion stops once max_nodes are found: a level
+    with max_nodes nodes already fills the result, and nodes ranked past
+    max_nodes in a level can't reach it.
+    """
+    try:
+        async with get_db() as conn:
+            rows = await conn.fetch(
+                f"""
+                WITH RECURSIVE hood(node_id, depth, level_rank, reached) AS (
+                    SELECT $1::integer, 0, 1::bigint, 0::bigint
+                    UNION
+                    SELECT n.neighbor_id, h.depth + 1,
+                           dense_rank() OVER (ORDER BY n.neighbor_id),
+                           max(GREATEST(h.reached, h.level_rank)) OVER ()
+                    FROM hood h
+                    {_FANOUT_LATERAL}
+                    WHERE h.depth < $2 AND h.level_rank <= $4 AND h.reached < $4
+                )
+                SELECT node_id, MIN(depth) AS depth
+                FROM hood
+                GROUP BY node_id
+                ORDER BY depth, node_id
+                LIMIT $4
+                """,
+                node_id, depth, fanout, max_nodes
+            )
+            return {row["node_id"]: row["depth"] for row in rows}
+    except Exception as e:
+        logger.error(f"Error querying neighborhood of node {node_id}: {str(e)}", exc_info=True)
+        raise
+
+async def shortest_path(source_id: int, target_id: int, max_depth: int,
+                        fanout: Optional[int] = None) -> Optional[List[int]]:
+    """
+    Shortest path between two nodes of at most max_depth hops.
+
+    The first recursive CTE records (node, depth, parent) for every walk from
+    the source; the second walks back from the target through the lowest
+    parent id at each depth.
+    """
+    try:
+        async with get_db() as conn:
+            rows = await conn.fetch(
+                f"""
+                WITH RECURSIVE walk(node_id, depth, parent_id) AS (
+                    SELECT $1::integer, 0, NULL::integer
+                    UNION
+                    SELECT n.neighbor_id, h.depth + 1, h.node_id
+                    FROM walk h
+                    {_FANOUT_LATERAL}
+                    WHERE h.depth < $4 AND h.node_id <> $2
+                ), back(node_id, depth) AS (
+                    SELECT $2::integer, (SELECT MIN(depth) FROM walk WHERE node_id = $2)
+                    UNION ALL
+                    SELECT (
+                        SELECT MIN(w.parent_id) FROM walk w
+                        WHERE w.node_id = b.node_id AND w.depth = b.depth
+                    ), b.depth - 1
+                    FROM back b
+                    WHERE b.depth > 0
+                )
+                SELECT node_id, depth FROM back ORDER BY depth
+                """,
+                source_id, target_id, fanout, max_depth
+            )
+            if not rows or rows[0]["depth"] is None:
+                return None
+            return [row["node_id"] for row in rows]
+    except Exception as e:
+        logger.error(f"Error querying path {source_id} -> {target_id}: {str(e)}", exc_info=True)
+        raise
+
+async def get_subgraph(node_ids: List[int]) -> Dict[str, List[Dict[str, Any]]]:
+    """Nodes with the given ids and the edges between them (lowest id per node pair)"""
+    try:
+        async with get_db() as conn:
+            node_rows = await conn.fetch("SELECT * FROM nodes WHERE id = ANY($1::integer[])", node_ids)
+            edge_rows = await conn.fetch(
+                """
+                SELECT DISTINCT ON (LEAST(source_id, target_id), GREATEST(source_id, target_id)) *
+                FROM edges
+                WHERE source_id = ANY($1::integer[]) AND target_id = ANY($1::integer[])
+                ORDER BY LEAST(source_id, target_id), GREATEST(source_id, target_id), id
+                """,
+                node_ids
+            )
+            nodes = [
+                {
+                    "id": row["id"],
+                    "label": row["label"],
+                    "type": row["type"],
+                    "metadata": row["metadata"] or {}
+                }
+                for row in node_rows
+            ]
+            edges = [
+                {
+                    "id": row["id"],
+                    "sourceId": row["source_id"],
+                    "targetId": row["target_id"],
+                    "label": row["label"],
+                    "weight": row["weight"],
+                    "metadata": row["metadata"] or {}
+                }
+                for row in edge_rows
+            ]
+            return {"nodes": nodes, "edges": edges}
+    except Exception as e:
+        logger.error(f"Error retrieving subgraph of {len(node_ids)} nodes: {str(e)}", exc_info=True)
+        raise
+
+async def get_adjacency(node_ids: List[int]) -> Dict[str, List[Dict[str, Any]]]:
+    """Nodes with the given ids and every edge incident to them, in id order"""
+    try:
+        async with get_db() as conn:
+            node_rows = await conn.fetch(
+                "SELECT * FROM nodes WHERE id = ANY($1::integer[]) ORDER BY id", node_ids
+            )
+            edge_rows = await conn.fetch(
+                """
+                SELECT * FROM edges WHERE source_id = ANY($1::integer[])
+                UNION
+                SELECT * FROM edges WHERE target_id = ANY($1::integer[])
+                ORDER BY id
+                """,
+                node_ids
+            )
+            nodes = [
+                {
+                    "id": row["id"],
+                    "label": row["label"],
+                    "type": row["type"],
+                    "metadata": row["metadata"] or {}
+                }
+                for row in node_rows
+            ]
+            edges = [
+                {
+                    "id": row["id"],
+                    "sourceId": row["source_id"],
+                    "targetId": row["target_id"],
+                    "label": row["label"],
+                    "weight": row["weight"],
+                    "metadata": row["metadata"] or {}
+                }
+                for row in edge_rows
+            ]
+            return {"nodes": nodes, "edges": edges}
+    except Exception as e:
+        logger.error(f"Error retrieving adjacency of {len(node_ids)} nodes: {str(e)}", exc_info=True)
+        raise
@@ -0,0 +1,96 @@
+"""Per-node degree trajectories from the edge creation log.
+
+Every edge creation is a +1 degree event for both endpoints. The events are
+sorted by (node, time) once, so one node's events form a contiguous run.
+Its degree over time is the cumulative sum of that run's deltas. Degree
+gained in a time window is a bincount over the events inside it. The index
+is rebuilt only after new edges have been recorded.
+"""
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .creation_index import CreationTimestamps, from_micros, to_micros
+
+
+class DegreeTrajectoryIndex:
+    """Degree events of every node, sorted by node then time"""
+
+    def __init__(self, creations: CreationTimestamps):
+        self.creations = creations
+        self._version: Optional[int] = None
+        self._lock = threading.Lock()
+        self.nodes = np.empty(0, dtype=np.int64)
+        self.times = np.empty(0, dtype=np.int64)
+        self.deltas = np.empty(0, dtype=np.int64)
+
+    def _refresh(self) -> None:
+        if self._version == self.creations.edge_version:
+            return
+        version, source, target, times = self.creations.edge_columns()
+        nodes = np.concatenate([source, target])
+        event_times = np.concatenate([times, times])
+        order = np.lexsort((event_times, nodes))
+        self.nodes = nodes[order]
+        self.times = event_times[order]
+        # Edge creations only add degree; removals would be -1 events
+        self.deltas = np.ones(len(order), dtype=np.int64)
+        self._version = version
+
+    def trajectory(self, node_id: str, start: Optional[float] = None,
+                   end: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Degree of a node after each of its edge events between start and end.
+
+        Returns:
+            Dictionary with the degree before start and parallel timestamp and
+            degree lists, or None if the node has no recorded creation
+        """
+        position = self.creations.node_position(node_id)
+        if position is None:
+            return None
+        with self._lock:
+            self._refresh()
+            low = int(np.searchsorted(self.nodes, position, side="left"))
+            high = int(np.searchsorted(self.nodes, position, side="right"))
+            times, deltas = self.times[low:high], self.deltas[low:high]
+
+        degree = np.cumsum(deltas)
+        first = 0 if start is None else int(np.searchsorted(times, to_micros(start), side="left"))
+        last = len(times) if end is None else int(np.searchsorted(times, to_micros(end), side="right"))
+        return {
+            "nodeId": node_id,
+            "initialDegree": int(degree[first - 1]) if first > 0 else 0,
+            "timestamps": [from_micros(micros) for micros in times[first:last].tolist()],
+            "degree": degree[first:last].tolist()
+        }
+
+    def fastest_growing(self, start: float, end: float, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Nodes that gained the most degree between start and end, largest gain first.
+
+        Returns:
+            [{"nodeId", "gained", "degree"}], degree being the degree at end
+        """
+        if limit <= 0:
+            return []
+        with self._lock:
+            self._refresh()
+            nodes, times, deltas = self.nodes, self.times, self.deltas
+        size = int(nodes.max()) + 1 if len(nodes) else 0
+        until_end = times <= to_micros(end)
+        in_window = until_end & (times >= to_micros(start))
+        gained = np.bincount(nodes[in_window], weights=deltas[in_window], minlength=size)
+        degree = np.bincount(nodes[until_end], weights=deltas[until_end], minlength=size)
+
+        candidates = np.flatnonzero(gained > 0)
+        if len(candidates) > limit:
+            candidates = candidates[np.argpartition(-gained[candidates], limit - 1)[:limit]]
+        # Largest gain first; ties by higher final degree, then node order
+        candidates = candidates[np.lexsort((candidates, -degree[candidates], -gained[candidates]))]
+        return [{
+            "nodeId": self.creations.node_ids[position],
+            "gained": int(gained[position]),
+            "degree": int(degree[position])
+        } for position in candidates.tolist()]
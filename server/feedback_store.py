@@ -0,0 +1,226 @@
+"""Feedback log with bounded memory and an offset index.
+
+Feedback entries are appended to feedback_history.jsonl in batches. For every
+entry, feedback.idx gets a fixed-width record (timestamp, byte offset, byte
+length, type code). Older feedback is paged by type and time range by
+filtering the index and seeking to the matching lines, without parsing the
+log. Type names are kept in feedback_types.json.
+
+Memory holds only the most recent entries, in a ring buffer per type and one
+across all types.
+"""
+import os
+import json
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
+
+import numpy as np
+
+from .history_writer import HistoryWriter
+
+logger = logging.getLogger(__name__)
+
+# Recent feedback entries kept in memory per type, and across all types
+FEEDBACK_BUFFER_SIZE = int(os.environ.get("FEEDBACK_BUFFER_SIZE", "100"))
+# Entries collected before they are handed to the writer as one append
+FEEDBACK_BATCH_SIZE = int(os.environ.get("FEEDBACK_BATCH_SIZE", "64"))
+
+INDEX_DTYPE = np.dtype([("timestamp", "<f8"), ("offset", "<i8"), ("length", "<u4"), ("type", "<i4")])
+
+
+class FeedbackStore:
+    """Feedback log, its offset index and per-type ring buffers in a directory"""
+
+    def __init__(self, path: str, writer: HistoryWriter,
+                 buffer_size: int = FEEDBACK_BUFFER_SIZE,
+                 batch_size: int = FEEDBACK_BATCH_SIZE):
+        self.path = path
+        self.writer = writer
+        self.buffer_size = buffer_size
+        self.batch_size = batch_size
+        self.types: List[str] = []
+        self._type_codes: Dict[str, int] = {}
+        self.recent: Deque[Dict[str, Any]] = deque(maxlen=buffer_size)
+        self.by_type: Dict[str, Deque[Dict[str, Any]]] = {}
+        self._lines: List[bytes] = []
+        self._records: List[tuple] = []
+        self._last_timestamp = 0.0
+        self._loaded = False
+        self._size = 0
+        # Guards the pending batch and log size: query() persists from a worker thread
+        self._lock = threading.Lock()
+
+    @property
+    def log_path(self) -> str:
+        return os.path.join(self.path, "feedback_history.jsonl")
+
+    @property
+    def index_path(self) -> str:
+        return os.path.join(self.path, "feedback.idx")
+
+    @property
+    def types_path(self) -> str:
+        return os.path.join(self.path, "feedback_types.json")
+
+    def _ensure_loaded(self) -> None:
+        """Refill the ring buffers from the end of the index on first use"""
+        if self._loaded:
+            return
+        with self._lock:
+            if not self._loaded:
+                self._load()
+                self._loaded = True
+
+    def _load(self) -> None:
+        # Nothing is queued before the first load, so the files are complete
+        self._size = os.path.getsize(self.log_path) if os.path.exists(self.log_path) else 0
+        if os.path.exists(self.types_path):
+            with open(self.types_path) as f:
+                self.types = json.load(f)
+            self._type_codes = {name: code for code, name in enumerate(self.types)}
+        self._index_unindexed()
+        if not os.path.exists(self.index_path):
+            return
+
+        tail = self.buffer_size * max(1, len(self.types))
+        count = os.path.getsize(self.index_path) // INDEX_DTYPE.itemsize
+        start = max(0, count - tail)
+        index = np.fromfile(self.index_path, dtype=INDEX_DTYPE, count=count - start,
+                            offset=start * INDEX_DTYPE.itemsize)
+        if len(index):
+            self._last_timestamp = float(index["timestamp"][-1])
+        for entry in self._read_entries(index):
+            self._remember(entry)
+        logger.info(f"Recovered {len(index)} recent feedback entries")
+
+    def _index_unindexed(self) -> None:
+        """
+        Index log lines past the last index record.
+
+        Covers logs written before the index existed and a log append whose
+        index append was lost in a crash.
+        """
+        indexed_end = 0
+        if os.path.exists(self.index_path):
+            count = os.path.getsize(self.index_path) // INDEX_DTYPE.itemsize
+            if count:
+                last = np.fromfile(self.index_path, dtype=INDEX_DTYPE, count=1,
+                                   offset=(count - 1) * INDEX_DTYPE.itemsize)[0]
+                indexed_end = int(last["offset"]) + int(last["length"])
+                self._last_timestamp = float(last["timestamp"])
+        if self._size <= indexed_end:
+            return
+
+        records = []
+        with open(self.log_path, "rb") as f:
+            f.seek(indexed_end)
+            offset = indexed_end
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # A partial last line; later appends start after it
+                    break
+                try:
+                    entry = json.loads(line)
+                    timestamp = datetime.fromisoformat(entry["timestamp"]).timestamp()
+                    code = self._type_code(entry["type"])
+                except (ValueError, KeyError):
+                    offset += len(line)
+                    continue
+                self._last_timestamp = max(timestamp, self._last_timestamp)
+                records.append((self._last_timestamp, offset, len(line), code))
+                offset += len(line)
+        with open(self.index_path, "ab") as f:
+            f.write(np.array(records, dtype=INDEX_DTYPE).tobytes())
+        logger.info(f"Indexed {len(records)} feedback entries")
+
+    def _type_code(self, feedback_type: str) -> int:
+        code = self._type_codes.get(feedback_type)
+        if code is None:
+            code = self._type_codes[feedback_type] = len(self.types)
+            self.types.append(feedback_type)
+            types = list(self.types)
+
+            def write_types():
+                tmp_path = f"{self.types_path}.tmp"
+                with open(tmp_path, "w") as f:
+                    json.dump(types, f)
+                os.replace(tmp_path, self.types_path)
+            self.writer.submit(write_types)
+        return code
+
+    def _remember(self, entry: Dict[str, Any]) -> None:
+        self.recent.append(entry)
+        buffer = self.by_type.get(entry["type"])
+        if buffer is None:
+            buffer = self.by_type[entry["type"]] = deque(maxlen=self.buffer_size)
+        buffer.append(entry)
+
+    def append(self, timestamp: float, entry: Dict[str, Any]) -> None:
+        """Keep an entry in memory and queue it for the log once the batch is full"""
+        self._ensure_loaded()
+        line = (json.dumps(entry) + "\n").encode("utf-8")
+        with self._lock:
+            # Index timestamps never go backwards, so time ranges can be binary searched
+            timestamp = max(timestamp, self._last_timestamp)
+            self._last_timestamp = timestamp
+            self._records.append((timestamp, self._size, len(line), self._type_code(entry["type"])))
+            self._lines.append(line)
+            self._size += len(line)
+            self._remember(entry)
+            full = len(self._lines) >= self.batch_size
+        if full:
+            self.persist()
+
+    def persist(self) -> None:
+        """Queue the pending batch as one log append and one index append"""
+        with self._lock:
+            if not self._lines:
+                return
+            lines, records = self._lines, self._records
+            self._lines, self._records = [], []
+            # Queued while locked, so batches reach the writer in offset order
+            self.writer.append(self.log_path, b"".join(lines))
+            self.writer.append(self.index_path, np.array(records, dtype=INDEX_DTYPE).tobytes())
+
+    def get_recent(self, limit: int = 10, feedback_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Most recent entries, oldest first, optionally of one type"""
+        self._ensure_loaded()
+        buffer = self.recent if feedback_type is None else self.by_type.get(feedback_type, ())
+        entries = list(buffer)
+        return entries[-limit:] if limit > 0 else []
+
+    def _read_entries(self, index: np.ndarray) -> List[Dict[str, Any]]:
+        entries = []
+        if not len(index):
+            return entries
+        with open(self.log_path, "rb") as f:
+            for offset, length in zip(index["offset"].tolist(), index["length"].tolist()):
+                f.seek(offset)
+                entries.append(json.loads(f.read(length)))
+        return entries
+
+    def query(self, feedback_type: Optional[str] = None, start: Optional[float] = None,
+              end: Optional[float] = None, limit: int = 50, offset: int = 0) -> Dict[str, Any]:
+        """
+        Page through feedback with start <= timestamp <= end, newest first.
+
+        Returns:
+            Dictionary with the number of matching entries and one page of them
+        """
+        self._ensure_loaded()
+        self.persist()
+        self.writer.flush()
+        if feedback_type is not None and feedback_type not in self._type_codes:
+            return {"total": 0, "entries": []}
+        index = np.fromfile(self.index_path, dtype=INDEX_DTYPE) if os.path.exists(self.index_path) \
+            else np.empty(0, dtype=INDEX_DTYPE)
+        low = 0 if start is None else int(np.searchsorted(index["timestamp"], start, side="left"))
+        high = len(index) if end is None else int(np.searchsorted(index["timestamp"], end, side="right"))
+        index = index[low:high]
+        if feedback_type is not None:
+            index = index[index["type"] == self._type_codes[feedback_type]]
+        page = index[::-1][offset:offset + limit]
+        return {"total": len(index), "entries": self._read_entries(page)}
@@ -0,0 +1,68 @@
+"""Snapshot diffs computed with set operations over sorted key arrays.
+
+Each graph is reduced to a sorted array of node ids and a sorted array of
+edge keys (the endpoint ids, smaller first), each with a parallel array of
+attribute digests. Added and removed elements come from np.setdiff1d. Changed
+elements are the common keys found by np.intersect1d whose digests differ.
+"""
+import json
+import hashlib
+from typing import Any, Dict, Tuple
+
+import networkx as nx
+import numpy as np
+
+EDGE_KEY = np.dtype([("source", "<i8"), ("target", "<i8")])
+
+
+def digest(attributes: Dict[str, Any]) -> int:
+    """64-bit digest of an attribute dict"""
+    encoded = json.dumps(attributes, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")
+    return int.from_bytes(hashlib.blake2b(encoded, digest_size=8).digest(), "little", signed=True)
+
+
+def graph_arrays(graph: nx.Graph) -> Dict[str, np.ndarray]:
+    """Sorted node ids and edge keys of a graph, with their attribute digests"""
+    node_ids = np.fromiter((int(node) for node in graph.nodes()), dtype=np.int64, count=graph.number_of_nodes())
+    node_digests = np.fromiter((digest(data) for _, data in graph.nodes(data=True)),
+                               dtype=np.int64, count=graph.number_of_nodes())
+    edge_keys = np.empty(graph.number_of_edges(), dtype=EDGE_KEY)
+    edge_digests = np.empty(graph.number_of_edges(), dtype=np.int64)
+    for position, (u, v, data) in enumerate(graph.edges(data=True)):
+        u, v = int(u), int(v)
+        edge_keys[position] = (u, v) if u <= v else (v, u)
+        edge_digests[position] = digest(data)
+
+    node_order = np.argsort(node_ids, kind="stable")
+    edge_order = np.argsort(edge_keys, kind="stable", order=("source", "target"))
+    return {
+        "node_ids": node_ids[node_order],
+        "node_digests": node_digests[node_order],
+        "edge_keys": edge_keys[edge_order],
+        "edge_digests": edge_digests[edge_order]
+    }
+
+
+def _diff_keys(old_keys: np.ndarray, old_digests: np.ndarray,
+               new_keys: np.ndarray, new_digests: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    added = np.setdiff1d(new_keys, old_keys, assume_unique=True)
+    removed = np.setdiff1d(old_keys, new_keys, assume_unique=True)
+    common, old_at, new_at = np.intersect1d(old_keys, new_keys, assume_unique=True, return_indices=True)
+    changed = common[old_digests[old_at] != new_digests[new_at]]
+    return added, removed, changed
+
+
+def diff_arrays(old: Dict[str, np.ndarray], new: Dict[str, np.ndarray]) -> Dict[str, Dict[str, np.ndarray]]:
+    """
+    Added, removed and changed node ids and edge keys between two graphs.
+
+    Returns:
+        {"nodes": {"added", "removed", "changed"}, "edges": {...}}, each a
+        sorted array of node ids or edge keys
+    """
+    nodes = _diff_keys(old["node_ids"], old["node_digests"], new["node_ids"], new["node_digests"])
+    edges = _diff_keys(old["edge_keys"], old["edge_digests"], new["edge_keys"], new["edge_digests"])
+    return {
+        "nodes": dict(zip(("added", "removed", "changed"), nodes)),
+        "edges": dict(zip(("added", "removed", "changed"), edges))
+    }
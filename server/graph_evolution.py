@@ -1,12 +1,45 @@
 import os
 import json
+import time
+import asyncio
 import logging
+import threading
 import networkx as nx
 import pandas as pd
 import numpy as np
 from datetime import datetime
 from typing import Dict, List, Any, Tuple, Optional
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
+from .history_writer import HistoryWriter
+from .snapshot_log import SnapshotLog, NODE, EDGE, SNAPSHOT
+from .snapshot_index import SnapshotIndex, IndexRecord, retained
+from .metrics_store import MetricsStore
+from .growth_estimator import GrowthEstimator
+from .creation_index import CreationTimestamps
+from .feedback_store import FeedbackStore
+from .degree_index import DegreeTrajectoryIndex
+from .window_index import CreationWindowIndex
+
+# Seconds between runs of the background history compaction
+COMPACTION_INTERVAL = float(os.environ.get("EVOLUTION_COMPACTION_INTERVAL", "3600"))
+
+# Reconstructed historical graphs kept for repeated time-travel queries
+RECONSTRUCTION_CACHE_SIZE = int(os.environ.get("EVOLUTION_RECONSTRUCTION_CACHE_SIZE", "8"))
+
+SNAPSHOT_ID_PREFIX = "snapshot_"
+
+
+def format_snapshot_id(number: int) -> str:
+    return f"{SNAPSHOT_ID_PREFIX}{number:08d}"
+
+
+def snapshot_number(snapshot_id: str) -> Optional[int]:
+    """Sequence number encoded in a snapshot id, or None if it is not one"""
+    if not snapshot_id.startswith(SNAPSHOT_ID_PREFIX):
+        return None
+    digits = snapshot_id[len(SNAPSHOT_ID_PREFIX):]
+    return int(digits) if digits.isdigit() else None
+
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -25,17 +58,72 @@ class GraphEvolutionTracker:
             history_path: Directory to store evolution history snapshots
         """
         self.history_path = history_path
-        self.snapshots = []
-        self.metrics_history = defaultdict(list)
-        self.creation_timestamps = {}  # Tracks when nodes and edges were created
-        self.feedback_history = []
+        self._snapshots: List[Dict[str, Any]] = []
+        # Snapshots are recovered from the index on first use
+        self._recovered = False
+        self._recovery_lock = threading.Lock()
+        # Nodes and edges changed since the last snapshot, in change order
+        self._dirty_nodes: Dict[str, None] = {}
+        self._dirty_edges: Dict[Tuple[str, str], None] = {}
         
         # Create history directory if it doesn't exist
         os.makedirs(history_path, exist_ok=True)
-        
+        # History files are written off the event loop by a single writer thread
+        self.writer = HistoryWriter()
+        # Tracks when nodes and edges were created
+        self.creation_timestamps = CreationTimestamps(os.path.join(history_path, "creations.jsonl"), self.writer)
+        self.degree_index = DegreeTrajectoryIndex(self.creation_timestamps)
+        self.window_index = CreationWindowIndex(self.creation_timestamps)
+        self.log = SnapshotLog(history_path, writer=self.writer)
+        self.index = SnapshotIndex(os.path.join(history_path, "snapshots.idx"), self.writer)
+        self.metrics = MetricsStore(os.path.join(history_path, "metrics"), self.writer)
+        self.feedback = FeedbackStore(history_path, self.writer)
+        # Growth statistics, updated as snapshots are taken
+        self.growth = GrowthEstimator()
+        self._compaction_task: Optional[asyncio.Task] = None
+        # Snapshot number -> reconstructed graph, least recently used first
+        self._reconstructed: "OrderedDict[int, nx.Graph]" = OrderedDict()
+        self._reconstructed_lock = threading.Lock()
+
+    @property
+    def snapshots(self) -> List[Dict[str, Any]]:
+        self._ensure_recovered()
+        return self._snapshots
+
+    def _ensure_recovered(self) -> None:
+        if self._recovered:
+            return
+        with self._recovery_lock:
+            if not self._recovered:
+                self._recover_snapshots()
+                self._recovered = True
+
+    def _recover_snapshots(self) -> None:
+        """Rebuild the snapshot list and growth statistics from the snapshot index"""
+        # Nothing is queued for the index before recovery, so the file is complete
+        records = self.index.records(flush=False)
+        # Snapshot metadata lives in the event log and is not recovered
+        self._snapshots = [{
+            "id": format_snapshot_id(record.number),
+            "timestamp": datetime.fromtimestamp(record.timestamp).isoformat(),
+            "nodes": record.nodes,
+            "edges": record.edges,
+            "metadata": {},
+            "checkpoint": record.checkpoint,
+            "offset": record.offset
+        } for record in records]
+        self.growth.rebuild((record.timestamp, record.nodes, record.edges) for record in records)
+        if records:
+            logger.info(f"Recovered {len(records)} graph snapshots from the index")
+
     def create_snapshot(self, graph: nx.Graph, metadata: Dict = None) -> str:
         """
         Create a snapshot of the current graph state.
+
+        Appends the nodes and edges changed since the previous snapshot to the
+        event log, so the cost follows the size of the change. A full
+        checkpoint is written first for a new log and whenever the current
+        segment has grown past the checkpoint interval.
         
         Args:
             graph: The current graph
@@ -44,181 +132,259 @@ class GraphEvolutionTracker:
         Returns:
             Snapshot ID
         """
-        timestamp = datetime.now().isoformat()
-        snapshot_id = f"snapshot_{datetime.now().strftime('%Y%m%d%H%M%S')}"
+        self._ensure_recovered()
+        # Snapshot numbers and times never go backwards, even across restarts
+        last = self.index.last()
+        number = last.number + 1 if last else 1
+        epoch = max(time.time(), last.timestamp if last else 0.0)
+        timestamp = datetime.fromtimestamp(epoch).isoformat()
+        snapshot_id = format_snapshot_id(number)
         
-        # Create the snapshot data
         snapshot = {
             "id": snapshot_id,
             "timestamp": timestamp,
-            "metadata": metadata or {},
-            "nodes": len(graph.nodes()),
-            "edges": len(graph.edges()),
-            "graph_data": self._serialize_graph(graph)
+            "nodes": graph.number_of_nodes(),
+            "edges": graph.number_of_edges(),
+            "metadata": metadata or {}
         }
-        
-        # Save the snapshot
-        snapshot_path = os.path.join(self.history_path, f"{snapshot_id}.json")
-        with open(snapshot_path, "w") as f:
-            json.dump(snapshot, f, indent=2)
-            
+
+        if self.log.needs_checkpoint(len(self._dirty_nodes) + len(self._dirty_edges)):
+            self.log.write_checkpoint(graph)
+            events = []
+        else:
+            events = self._collect_deltas(graph)
+        self._dirty_nodes.clear()
+        self._dirty_edges.clear()
+        offset = self.log.append(events + [dict(snapshot, op=SNAPSHOT)])
+
         # Update the in-memory snapshot reference
-        self.snapshots.append({
-            "id": snapshot_id,
-            "timestamp": timestamp,
-            "nodes": len(graph.nodes()),
-            "edges": len(graph.edges()),
-            "metadata": metadata or {}
-        })
-        
-        logger.info(f"Created graph snapshot: {snapshot_id}")
+        snapshot["checkpoint"] = self.log.seq
+        snapshot["offset"] = offset
+        self._snapshots.append(snapshot)
+        self.creation_timestamps.persist()
+        self.feedback.persist()
+        self.index.append(IndexRecord(
+            number, epoch, self.log.seq, offset, snapshot["nodes"], snapshot["edges"]
+        ))
+        self.growth.add(epoch, snapshot["nodes"], snapshot["edges"])
+        
+        logger.info(f"Created graph snapshot: {snapshot_id} ({len(events)} changes)")
         return snapshot_id
-    
-    def _serialize_graph(self, graph: nx.Graph) -> Dict:
-        """Serialize a NetworkX graph to a JSON-compatible dict"""
+
+    def _collect_deltas(self, graph: nx.Graph) -> List[Dict[str, Any]]:
+        """Current state of every node and edge changed since the last snapshot"""
+        events = []
+        for node_id in self._dirty_nodes:
+            if graph.has_node(node_id):
+                events.append({"op": NODE, "id": node_id, "attributes": dict(graph.nodes[node_id])})
+        for source, target in self._dirty_edges:
+            if graph.has_edge(source, target):
+                events.append({
+                    "op": EDGE,
+                    "source": source,
+                    "target": target,
+                    "attributes": dict(graph[source][target])
+                })
+        return events
+
+    def load_snapshot(self, snapshot_id: str) -> Optional[nx.Graph]:
+        """Rebuild the graph as it was at a snapshot, or None if it is unknown"""
+        number = snapshot_number(snapshot_id)
+        record = self.index.get(number) if number is not None else None
+        if record is None:
+            return None
+        return self.log.reconstruct(record.checkpoint, record.offset)
+
+    def graph_at(self, timestamp: Optional[float] = None,
+                 snapshot_id: Optional[str] = None) -> Optional[Tuple[IndexRecord, nx.Graph]]:
+        """
+        The graph at a snapshot, or at the latest snapshot taken by timestamp.
+
+        Rebuilt from the snapshot's checkpoint plus its replayed deltas, and
+        kept in a small LRU so repeated queries skip the rebuild. The returned
+        graph is shared and must not be modified.
+
+        Returns:
+            (index record, graph), or None if there is no such snapshot
+        """
+        if snapshot_id is not None:
+            number = snapshot_number(snapshot_id)
+            record = self.index.get(number) if number is not None else None
+        else:
+            record = self.index.find_at(timestamp)
+        if record is None:
+            return None
+
+        with self._reconstructed_lock:
+            graph = self._reconstructed.get(record.number)
+            if graph is not None:
+                self._reconstructed.move_to_end(record.number)
+                return record, graph
+        graph = self.log.reconstruct(record.checkpoint, record.offset)
+        with self._reconstructed_lock:
+            self._reconstructed[record.number] = graph
+            while len(self._reconstructed) > RECONSTRUCTION_CACHE_SIZE:
+                self._reconstructed.popitem(last=False)
+        return record, graph
+
+    def plan_compaction(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Decide which snapshots and history files the retention policy drops.
+
+        Closed segments with no retained snapshot are dropped with their
+        checkpoint; the others are cut after their last retained snapshot.
+        The open segment is never touched. Only reads files, so it can run in
+        a worker thread.
+        """
+        records = self.index.records()
+        keep = retained(records, now if now is not None else time.time())
+        current = self.log.seq
+        kept_offsets: Dict[int, int] = {}
+        for record in records:
+            if record.number in keep:
+                kept_offsets[record.checkpoint] = max(kept_offsets.get(record.checkpoint, 0), record.offset)
+        closed = [seq for seq in self.log.checkpoints() if current is None or seq < current]
         return {
-            "nodes": [
-                {
-                    "id": node_id,
-                    "attributes": dict(graph.nodes[node_id])
-                } for node_id in graph.nodes()
-            ],
-            "edges": [
-                {
-                    "source": u,
-                    "target": v,
-                    "attributes": dict(data)
-                } for u, v, data in graph.edges(data=True)
-            ]
+            "dropped": {record.number for record in records if record.number not in keep},
+            "deleteSegments": [seq for seq in closed if seq not in kept_offsets],
+            "truncateSegments": {seq: kept_offsets[seq] for seq in closed if seq in kept_offsets}
         }
+
+    def apply_compaction(self, plan: Dict[str, Any]) -> Dict[str, int]:
+        """Apply a compaction plan: prune in-memory state now, queue the file changes"""
+        dropped = plan["dropped"]
+        if dropped:
+            self.snapshots[:] = [s for s in self.snapshots if snapshot_number(s["id"]) not in dropped]
+            self.index.remove(dropped)
+            self.growth.rebuild(
+                (datetime.fromisoformat(s["timestamp"]).timestamp(), s["nodes"], s["edges"])
+                for s in self.snapshots
+            )
+        for seq in plan["deleteSegments"]:
+            self.log.drop(seq)
+        for seq, offset in plan["truncateSegments"].items():
+            self.log.truncate(seq, offset)
+        stats = {
+            "droppedSnapshots": len(dropped),
+            "deletedCheckpoints": len(plan["deleteSegments"]),
+            "truncatedSegments": len(plan["truncateSegments"])
+        }
+        logger.info(f"Compacted graph history: {stats}")
+        return stats
+
+    def compact(self, now: Optional[float] = None) -> Dict[str, int]:
+        """Apply the retention policy to the snapshot and metrics history"""
+        now = now if now is not None else time.time()
+        stats = self.apply_compaction(self.plan_compaction(now))
+        self.metrics.downsample(now)
+        return stats
+
+    async def _compaction_loop(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                plan = await asyncio.to_thread(self.plan_compaction)
+                self.apply_compaction(plan)
+                self.metrics.downsample(time.time())
+            except Exception as e:
+                logger.error(f"Error compacting graph history: {str(e)}", exc_info=True)
+
+    def start_compaction(self, interval: float = COMPACTION_INTERVAL) -> None:
+        """Start periodic history compaction on the running event loop"""
+        if self._compaction_task is None or self._compaction_task.done():
+            self._compaction_task = asyncio.create_task(self._compaction_loop(interval))
+            logger.info(f"Started graph history compaction every {interval}s")
+
+    async def stop_compaction(self) -> None:
+        """Stop periodic history compaction"""
+        task, self._compaction_task = self._compaction_task, None
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    def record_node_update(self, node_id: str) -> None:
+        """Record that a node's attributes changed"""
+        self._dirty_nodes[node_id] = None
+
+    def record_edge_update(self, source: str, target: str) -> None:
+        """Record that an edge's attributes changed"""
+        self._dirty_edges[(source, target)] = None
     
+    def record_node_loaded(self, node_id: str, metadata: Dict = None) -> None:
+        """Record a node loaded from storage, keeping its persisted creation time"""
+        self._dirty_nodes[node_id] = None
+        if not self.creation_timestamps.has_node(node_id):
+            self.creation_timestamps.add_node(node_id, time.time(), metadata)
+
+    def record_edge_loaded(self, source: str, target: str, metadata: Dict = None) -> None:
+        """Record an edge loaded from storage, keeping its persisted creation time"""
+        self._dirty_edges[(source, target)] = None
+        if not self.creation_timestamps.has_edge(source, target):
+            self.creation_timestamps.add_edge(source, target, time.time(), metadata)
+
     def record_node_creation(self, node_id: str, metadata: Dict = None) -> None:
         """Record when a node was created"""
-        timestamp = datetime.now().isoformat()
-        self.creation_timestamps[f"node_{node_id}"] = {
-            "timestamp": timestamp,
-            "type": "node",
-            "metadata": metadata or {}
-        }
+        self._dirty_nodes[node_id] = None
+        self.creation_timestamps.add_node(node_id, time.time(), metadata)
     
     def record_edge_creation(self, source: str, target: str, metadata: Dict = None) -> None:
         """Record when an edge was created"""
-        timestamp = datetime.now().isoformat()
-        edge_id = f"{source}_{target}"
-        self.creation_timestamps[f"edge_{edge_id}"] = {
-            "timestamp": timestamp,
-            "type": "edge",
-            "source": source,
-            "target": target,
-            "metadata": metadata or {}
-        }
+        self._dirty_edges[(source, target)] = None
+        self.creation_timestamps.add_edge(source, target, time.time(), metadata)
     
     def save_metrics(self, metrics: Dict[str, Any]) -> None:
         """
         Save current graph metrics.
+
+        Stores the scalar summary of the metrics in the columnar metrics
+        history, and top-k node summaries at reduced resolution.
         
         Args:
             metrics: Dictionary of metrics to save
         """
-        timestamp = datetime.now().isoformat()
-        
-        # Add timestamp to metrics
-        metrics_with_time = metrics.copy()
-        metrics_with_time["timestamp"] = timestamp
-        
-        # Update history
-        for key, value in metrics.items():
-            if isinstance(value, (int, float)):
-                self.metrics_history[key].append((timestamp, value))
-        
-        # Save to disk
-        metrics_path = os.path.join(self.history_path, "metrics_history.jsonl")
-        with open(metrics_path, "a") as f:
-            f.write(json.dumps(metrics_with_time) + "\n")
-            
+        self.metrics.append(time.time(), metrics)
         logger.info(f"Saved metrics snapshot with {len(metrics)} values")
     
     def get_metric_trends(self, metric_name: str, last_n: int = None) -> List[Tuple[str, float]]:
         """Get the historical values of a specific metric"""
-        values = self.metrics_history.get(metric_name, [])
+        try:
+            history = self.metrics.query([metric_name])
+        except KeyError:
+            return []
+        values = [
+            (datetime.fromtimestamp(ts).isoformat(), value)
+            for ts, value in zip(history["timestamps"], history["series"][metric_name])
+        ]
         if last_n is not None:
             values = values[-last_n:]
         return values
+
+    def get_metrics_history(self, names: Optional[List[str]] = None, start: Optional[float] = None,
+                            end: Optional[float] = None) -> Dict[str, Any]:
+        """Metrics samples and top-k summaries between start and end (epoch seconds)"""
+        history = self.metrics.query(names, start, end)
+        return {
+            "timestamps": [datetime.fromtimestamp(ts).isoformat() for ts in history["timestamps"]],
+            "series": history["series"],
+            "summaries": self.metrics.summaries(start, end)
+        }
     
     def analyze_growth_rate(self) -> Dict[str, Any]:
         """
         Analyze the growth rate of the graph over time.
+
+        Read from running statistics kept up to date by create_snapshot, so
+        the cost does not depend on the number of snapshots.
         
         Returns:
-            Dict with growth metrics
+            Dict with growth metrics, and the same metrics over the recent
+            window under "recent"
         """
-        # Extract node and edge counts from snapshots
-        timestamps = []
-        node_counts = []
-        edge_counts = []
-        
-        for snapshot in self.snapshots:
-            timestamps.append(datetime.fromisoformat(snapshot["timestamp"]))
-            node_counts.append(snapshot["nodes"])
-            edge_counts.append(snapshot["edges"])
-            
-        if len(timestamps) < 2:
-            return {
-                "node_growth_rate": None,
-                "edge_growth_rate": None,
-                "enough_data": False
-            }
-            
-        # Convert to numpy arrays for analysis
-        timestamps_seconds = np.array([(ts - timestamps[0]).total_seconds() for ts in timestamps])
-        nodes = np.array(node_counts)
-        edges = np.array(edge_counts)
-        
-        # Calculate growth rates (nodes and edges per hour)
-        if len(timestamps) >= 2:
-            hours_elapsed = (timestamps[-1] - timestamps[0]).total_seconds() / 3600
-            if hours_elapsed > 0:
-                node_growth_rate = (nodes[-1] - nodes[0]) / hours_elapsed
-                edge_growth_rate = (edges[-1] - edges[0]) / hours_elapsed
-                
-                # Power law fit for scale-free analysis
-                if len(timestamps) >= 3 and timestamps_seconds[-1] > 0:
-                    # Normalize time for better fit
-                    norm_time = timestamps_seconds / timestamps_seconds[-1]
-                    # Avoid log(0)
-                    norm_time = np.maximum(norm_time, 1e-10)
-                    
-                    try:
-                        # For node growth: N(t) ∝ t^α
-                        node_coef = np.polyfit(np.log(norm_time), np.log(nodes), 1)
-                        node_power_law_exponent = node_coef[0]
-                        
-                        # For edge growth: E(t) ∝ t^β
-                        edge_coef = np.polyfit(np.log(norm_time), np.log(edges), 1)
-                        edge_power_law_exponent = edge_coef[0]
-                    except:
-                        # Fallback if fit fails
-                        node_power_law_exponent = None
-                        edge_power_law_exponent = None
-                else:
-                    node_power_law_exponent = None
-                    edge_power_law_exponent = None
-                    
-                return {
-                    "node_growth_rate": node_growth_rate,
-                    "edge_growth_rate": edge_growth_rate,
-                    "node_power_law_exponent": node_power_law_exponent,
-                    "edge_power_law_exponent": edge_power_law_exponent,
-                    "enough_data": True,
-                    "hours_tracked": hours_elapsed,
-                    "snapshots_count": len(timestamps)
-                }
-        
-        return {
-            "node_growth_rate": None,
-            "edge_growth_rate": None,
-            "enough_data": False
-        }
+        self._ensure_recovered()
+        return self.growth.estimate()
         
     def analyze_hub_formation(self, graph: nx.Graph, top_n: int = 5) -> Dict[str, Any]:
         """
@@ -235,28 +401,20 @@ class GraphEvolutionTracker:
         degrees = dict(graph.degree())
         # Sort nodes by degree (highest first)
         hub_nodes = sorted(degrees.items(), key=lambda x: x[1], reverse=True)[:top_n]
+
+        # Creation times of every hub's edges, oldest first, in one pass
+        hub_edges = self.creation_timestamps.edges_of(node_id for node_id, _ in hub_nodes)
         
         hub_analysis = []
         for node_id, degree in hub_nodes:
             # Get node creation timestamp
-            node_created = self.creation_timestamps.get(f"node_{node_id}", {}).get("timestamp")
+            node_created = self.creation_timestamps.node_created(node_id)
             
-            # Get connected edges and their creation times
-            edge_formation = []
-            for neighbor in graph.neighbors(node_id):
-                edge_id = f"{node_id}_{neighbor}"
-                alt_edge_id = f"{neighbor}_{node_id}"
-                
-                # Check both possible edge directions
-                edge_data = self.creation_timestamps.get(f"edge_{edge_id}")
-                if not edge_data:
-                    edge_data = self.creation_timestamps.get(f"edge_{alt_edge_id}")
-                    
-                if edge_data:
-                    edge_formation.append({
-                        "neighbor": neighbor,
-                        "created_at": edge_data.get("timestamp")
-                    })
+            # Connected edges still in the graph and their creation times
+            edge_formation = [
+                edge for edge in hub_edges.get(node_id, [])
+                if graph.has_edge(node_id, edge["neighbor"])
+            ]
             
             # Get node attributes
             node_attrs = graph.nodes[node_id]
@@ -276,6 +434,22 @@ class GraphEvolutionTracker:
             "analysis_time": datetime.now().isoformat()
         }
 
+    def created_between(self, start: Optional[float] = None,
+                        end: Optional[float] = None) -> Tuple[List[str], List[Tuple[str, str]]]:
+        """Node ids and edge pairs created between start and end (epoch seconds)"""
+        return self.window_index.created_between(start, end)
+
+    def degree_trajectory(self, node_id: str, start: Optional[float] = None,
+                          end: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Degree of a node over time (epoch seconds), from the edge creation log"""
+        return self.degree_index.trajectory(node_id, start, end)
+
+    def fastest_growing_nodes(self, window_hours: float, now: Optional[float] = None,
+                              limit: int = 10) -> List[Dict[str, Any]]:
+        """Nodes whose degree grew most in the last window_hours"""
+        end = now if now is not None else time.time()
+        return self.degree_index.fastest_growing(end - window_hours * 3600, end, limit)
+
     def record_feedback(self, source: str, feedback_type: str, data: Dict) -> None:
         """
         Record feedback about the graph evolution.
@@ -293,20 +467,32 @@ class GraphEvolutionTracker:
             "type": feedback_type,
             "data": data
         }
-        
-        # Save to memory
-        self.feedback_history.append(feedback)
-        
-        # Save to disk
-        feedback_path = os.path.join(self.history_path, "feedback_history.jsonl")
-        with open(feedback_path, "a") as f:
-            f.write(json.dumps(feedback) + "\n")
+
+        # Kept in memory per type and appended to disk in batches
+        self.feedback.append(time.time(), feedback)
             
         logger.info(f"Recorded {feedback_type} feedback from {source}")
         
-    def get_recent_feedback(self, limit: int = 10) -> List[Dict]:
-        """Get the most recent feedback entries"""
-        return self.feedback_history[-limit:] if self.feedback_history else []
+    def get_recent_feedback(self, limit: int = 10, feedback_type: Optional[str] = None) -> List[Dict]:
+        """Get the most recent feedback entries, optionally of one type"""
+        return self.feedback.get_recent(limit, feedback_type)
+
+    def get_feedback(self, feedback_type: Optional[str] = None, start: Optional[float] = None,
+                     end: Optional[float] = None, limit: int = 50, offset: int = 0) -> Dict[str, Any]:
+        """Page through stored feedback between start and end (epoch seconds), newest first"""
+        return self.feedback.query(feedback_type, start, end, limit, offset)
+
+    def flush(self) -> None:
+        """Block until all queued history writes are on disk"""
+        self.creation_timestamps.persist()
+        self.feedback.persist()
+        self.writer.flush()
+
+    def close(self) -> None:
+        """Write everything still queued and stop the writer thread"""
+        self.creation_timestamps.persist()
+        self.feedback.persist()
+        self.writer.close()
 
 class FeedbackLoopManager:
     """
@@ -465,15 +651,14 @@ class FeedbackLoopManager:
             Refined prompt for the next expansion iteration
         """
         # Get recent feedback
-        recent_feedback = self.evolution_tracker.get_recent_feedback(5)
+        recent_feedback = self.evolution_tracker.get_recent_feedback(5, "expansion_evaluation")
         
         # Generate improvement prompts
         improvement_prompts = []
         
         for feedback in recent_feedback:
-            if feedback["type"] == "expansion_evaluation":
-                eval_data = feedback["data"]
-                improvement_prompts.extend(self.generate_improvement_prompts(eval_data))
+            eval_data = feedback["data"]
+            improvement_prompts.extend(self.generate_improvement_prompts(eval_data))
                 
         # Get up to 2 most recent improvement suggestions
         improvement_suggestions = improvement_prompts[-2:] if improvement_prompts else []
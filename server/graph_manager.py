@@ -1,4 +1,5 @@
 from typing import Dict, List, Optional, Any, Set, Tuple
+import os
 import networkx as nx
 import logging
 import json
@@ -9,15 +10,60 @@ from collections import defaultdict
 from .models.schemas import (
     Node, Edge, GraphData, ClusterResult
 )
-from .database import get_full_graph, create_node, create_edge
+from .storage import StorageBackend, get_storage
+from .attribute_index import AttributeIndex
+from .resident_cache import (
+    LabelIndex, ResidentGraphCache, GRAPH_RESIDENCY, GRAPH_CACHE_SIZE, GRAPH_METRICS_SAMPLE_SIZE,
+    RESIDENCY_MODES
+)
+from .traversal import (
+    bounded_neighborhood, bounded_shortest_path, DEFAULT_MAX_NODES, DEFAULT_MAX_PATH_DEPTH
+)
 from .semantic_clustering import SemanticClusteringService
 from .semantic_analysis import analyze_content
 from dataclasses import dataclass
-from .graph_evolution import GraphEvolutionTracker, FeedbackLoopManager
+from .graph_evolution import GraphEvolutionTracker, FeedbackLoopManager, format_snapshot_id
+from .graph_diff import graph_arrays, diff_arrays
 from .openai_client import expand_graph, suggest_relationships
+from .write_behind import (
+    WriteBehindQueue, WriteBuffer, INSERT_NODE, INSERT_EDGE, UPDATE_NODE, UPDATE_EDGE
+)
 
 logger = logging.getLogger(__name__)
 
+# Apply mutations in memory immediately and persist them from a background writer
+WRITE_BEHIND_ENABLED = os.environ.get("GRAPH_WRITE_BEHIND", "false").lower() in ("1", "true", "yes")
+
+# Metrics history is sampled every interval, or sooner after this many mutations
+METRICS_SAMPLE_INTERVAL = float(os.environ.get("METRICS_SAMPLE_INTERVAL", "60"))
+METRICS_SAMPLE_MUTATIONS = int(os.environ.get("METRICS_SAMPLE_MUTATIONS", "100"))
+
+def graph_payload(graph: nx.Graph) -> Dict[str, List[dict]]:
+    """API representation of the nodes and edges of a graph"""
+    nodes = []
+    for node_id in graph.nodes():
+        node_data = graph.nodes[node_id]
+        node = {
+            "id": int(node_id),
+            "label": node_data.get("label", f"Node {node_id}"),
+            "type": node_data.get("type", "concept"),
+            "metadata": node_data.get("metadata", {})
+        }
+        nodes.append(node)
+
+    edges = []
+    for source, target, data in graph.edges(data=True):
+        edge = {
+            "id": data.get("id", 0),
+            "sourceId": int(source),
+            "targetId": int(target),
+            "label": data.get("label", "related_to"),
+            "weight": data.get("weight", 1),
+            "metadata": data.get("metadata", {})
+        }
+        edges.append(edge)
+    return {"nodes": nodes, "edges": edges}
+
 @dataclass
 class HubNode:
     id: int
@@ -32,7 +78,10 @@ class BridgingNode:
 
 
 class GraphManager:
-    def __init__(self):
+    def __init__(self, write_behind: Optional[bool] = None,
+                 storage: Optional[StorageBackend] = None,
+                 residency: Optional[str] = None,
+                 cache_size: int = GRAPH_CACHE_SIZE):
         self.graph = nx.Graph()
         self.is_expanding = False
         self.semantic_clustering = None
@@ -41,38 +90,66 @@ class GraphManager:
         self.feedback_loop = FeedbackLoopManager(self.evolution_tracker)
         self.expansion_iteration = 0
         self.last_expansion_time = None
+        self.storage = storage or get_storage()
+        if write_behind is None:
+            write_behind = WRITE_BEHIND_ENABLED
+        self.write_behind = WriteBehindQueue(self.storage) if write_behind else None
+        self.pending_writes = WriteBuffer(self.storage)
+        # Attribute indexes over the in-memory graph, valid once it is loaded
+        self.node_index = AttributeIndex()
+        self.edge_index = AttributeIndex()
+        self.is_loaded = False
+        # "full" keeps the whole graph in memory; "lru" keeps only hot nodes
+        self.residency = residency or GRAPH_RESIDENCY
+        if self.residency not in RESIDENCY_MODES:
+            raise ValueError(f"Unknown graph residency mode: {self.residency}")
+        self.labels = LabelIndex()
+        self.cache = None
+        if self.residency == "lru":
+            self.cache = ResidentGraphCache(self.graph, self.storage, cache_size,
+                                            before_fetch=self._flush_graph_writes)
+        # Mutations since the last metrics history sample
+        self.mutations_since_sample = 0
+        self.sample_mutations = METRICS_SAMPLE_MUTATIONS
+        self._sample_requested = asyncio.Event()
+        self._sampler_task = None
 
     async def initialize(self) -> bool:
         """Initialize the graph from the database"""
         try:
             logger.info("Starting graph manager initialization")
-            data = await get_full_graph()
+            if self.cache is not None:
+                return await self._initialize_out_of_core()
 
-            # Add nodes first
-            for node in data.get("nodes", []):
-                node_id = str(node["id"])
-                if not self.graph.has_node(node_id):
-                    self.graph.add_node(node_id, **node)
-                    # Track node creation for evolution tracking
-                    self.evolution_tracker.record_node_creation(node_id, {
-                        "source": "initialization",
-                        "label": node.get("label", f"Node {node_id}")
-                    })
+            # Stream nodes first, in batches, so the full result set is never held at once
+            async for nodes in self.storage.iter_nodes():
+                for node in nodes:
+                    node_id = str(node["id"])
+                    if not self.graph.has_node(node_id):
+                        self.graph.add_node(node_id, **node)
+                        self._index_node(node_id)
+                        # Track node creation for evolution tracking
+                        self.evolution_tracker.record_node_loaded(node_id, {
+                            "source": "initialization",
+                            "type": node.get("type", "concept")
+                        })
 
             # Then add edges
-            for edge in data.get("edges", []):
-                source_id = str(edge["sourceId"])
-                target_id = str(edge["targetId"])
+            async for edges in self.storage.iter_edges():
+                for edge in edges:
+                    source_id = str(edge["sourceId"])
+                    target_id = str(edge["targetId"])
 
-                if (self.graph.has_node(source_id) and 
-                    self.graph.has_node(target_id) and 
-                    not self.graph.has_edge(source_id, target_id)):
-                    self.graph.add_edge(source_id, target_id, **edge)
-                    # Track edge creation for evolution tracking
-                    self.evolution_tracker.record_edge_creation(source_id, target_id, {
-                        "source": "initialization",
-                        "label": edge.get("label", "related_to")
-                    })
+                    if (self.graph.has_node(source_id) and 
+                        self.graph.has_node(target_id) and 
+                        not self.graph.has_edge(source_id, target_id)):
+                        self.graph.add_edge(source_id, target_id, **edge)
+                        self._index_edge(source_id, target_id)
+                        # Track edge creation for evolution tracking
+                        self.evolution_tracker.record_edge_loaded(source_id, target_id, {
+                            "source": "initialization",
+                            "label": edge.get("label", "related_to")
+                        })
 
             # Initialize semantic clustering
             self.semantic_clustering = SemanticClusteringService(self.graph)
@@ -80,63 +157,66 @@ class GraphManager:
             # Create initial snapshot
             self.evolution_tracker.create_snapshot(self.graph, {"event": "initialization"})
 
+            self.is_loaded = True
             logger.info(f'Graph initialized: {self.graph.number_of_nodes()} nodes, {self.graph.number_of_edges()} edges')
             return True
         except Exception as e:
             logger.error(f"Error initializing graph: {str(e)}", exc_info=True)
             self.graph = nx.Graph()
+            self.node_index.clear()
+            self.edge_index.clear()
+            self.labels.clear()
+            if self.cache is not None:
+                self.cache.clear(self.graph)
+            self.is_loaded = False
             self.semantic_clustering = SemanticClusteringService(self.graph)
             return False
 
+    async def _initialize_out_of_core(self) -> bool:
+        """
+        Load only the label index; nodes become resident as they are used.
+
+        The graph is not marked loaded, so filters and traversals are pushed
+        down to the storage backend.
+        """
+        async for nodes in self.storage.iter_nodes():
+            for node in nodes:
+                self.labels.add(node["id"], node.get("label"), node.get("type"))
+        self.semantic_clustering = SemanticClusteringService(self.graph)
+        logger.info(f"Graph initialized out of core: {len(self.labels)} nodes indexed, "
+                    f"cache capacity {self.cache.capacity}")
+        return True
+
     def count_disconnected_nodes(self) -> int:
         """Count nodes with no connections."""
         count = 0
         for node in self.graph.nodes():
-            if self.graph.degree(node) == 0:
+            if self._degree(node) == 0:
                 count += 1
         return count
 
     async def get_graph_data(self) -> dict:
         """Get the complete graph data with metrics and clusters"""
-        if self.graph.number_of_nodes() == 0:
+        if self.graph.number_of_nodes() == 0 and len(self.labels) == 0:
             await self.initialize()
 
         if not self.semantic_clustering:
             self.semantic_clustering = SemanticClusteringService(self.graph)
 
         # Get current nodes and edges
-        nodes = []
-        for node_id in self.graph.nodes():
-            node_data = self.graph.nodes[node_id]
-            node = {
-                "id": int(node_id),
-                "label": node_data.get("label", f"Node {node_id}"),
-                "type": node_data.get("type", "concept"),
-                "metadata": node_data.get("metadata", {})
-            }
-            nodes.append(node)
-
-        edges = []
-        for source, target, data in self.graph.edges(data=True):
-            edge = {
-                "id": data.get("id", 0),
-                "sourceId": int(source),
-                "targetId": int(target),
-                "label": data.get("label", "related_to"),
-                "weight": data.get("weight", 1),
-                "metadata": data.get("metadata", {})
-            }
-            edges.append(edge)
+        payload = graph_payload(self.graph)
 
-        # Get clusters - this is synchronous, no await needed
-        clusters = self.semantic_clustering.cluster_nodes() if self.semantic_clustering else []
+        # Cluster a copy in a thread so mutations can continue meanwhile
+        clustering = SemanticClusteringService(
+            self.graph.copy(), self.semantic_clustering.method, self.semantic_clustering.resolution
+        )
+        clusters = await asyncio.to_thread(clustering.cluster_nodes)
+        self.semantic_clustering.summary = clustering.summary
 
-        # Get metrics - this is synchronous, no await needed
+        # Get metrics - this is synchronous, no await needed. History is
+        # recorded by the metrics sampler, never on reads
         metrics = self.calculate_metrics()
         
-        # Save metrics for evolution tracking
-        self.evolution_tracker.save_metrics(metrics)
-        
         # Add evolution metrics if available
         growth_data = self.evolution_tracker.analyze_growth_rate()
         if growth_data.get("enough_data", False):
@@ -148,15 +228,23 @@ class GraphManager:
             metrics["hubFormation"] = hub_analysis
 
         return {
-            "nodes": nodes,
-            "edges": edges,
+            "nodes": payload["nodes"],
+            "edges": payload["edges"],
             "clusters": clusters,
+            "clustering": clustering.summary,
             "metrics": metrics
         }
 
-    def calculate_metrics(self):
-        """Calculate graph metrics synchronously"""
-        if self.graph.number_of_nodes() == 0:
+    def calculate_metrics(self, graph: Optional[nx.Graph] = None,
+                          degree: Optional[Dict[str, int]] = None):
+        """
+        Calculate graph metrics synchronously.
+
+        Defaults to the live graph; the metrics sampler passes a copy (with
+        the degrees taken alongside it) so the work can run in a thread.
+        """
+        graph = self.graph if graph is None else graph
+        if graph.number_of_nodes() == 0:
             return {
                 "betweenness": {},
                 "eigenvector": {},
@@ -169,22 +257,28 @@ class GraphManager:
                 }
             }
 
-        # Calculate centrality metrics
-        betweenness = nx.betweenness_centrality(self.graph)
-        degree = dict(self.graph.degree())
+        # Calculate centrality metrics; out of core, only the resident nodes are
+        # measured and betweenness is estimated from a sample of pivots
+        approximate = self.cache is not None
+        if approximate and graph.number_of_nodes() > GRAPH_METRICS_SAMPLE_SIZE:
+            betweenness = nx.betweenness_centrality(graph, k=GRAPH_METRICS_SAMPLE_SIZE, seed=0)
+        else:
+            betweenness = nx.betweenness_centrality(graph)
+        if degree is None:
+            degree = {node: self._degree(node) for node in graph.nodes()}
 
         # Handle eigenvector centrality for disconnected graphs
         try:
-            eigenvector = nx.eigenvector_centrality_numpy(self.graph)
+            eigenvector = nx.eigenvector_centrality_numpy(graph)
         except nx.AmbiguousSolution:
             logger.warning("Graph is disconnected, using fallback eigenvector centrality")
-            eigenvector = {node: 0.0 for node in self.graph.nodes()}
+            eigenvector = {node: 0.0 for node in graph.nodes()}
         except Exception as e:
             logger.error(f"Error calculating eigenvector centrality: {str(e)}")
-            eigenvector = {node: 0.0 for node in self.graph.nodes()}
+            eigenvector = {node: 0.0 for node in graph.nodes()}
 
         # Calculate scale-freeness metrics using more sophisticated approach
-        degrees = [d for n, d in self.graph.degree()]
+        degrees = list(degree.values())
         
         # Better power law exponent calculation
         if degrees and max(degrees) > 1:
@@ -239,7 +333,7 @@ class GraphManager:
         for node, bc in betweenness.items():
             if bc > 0:
                 # Count number of different clusters this node connects
-                neighbors = list(self.graph.neighbors(node))
+                neighbors = list(graph.neighbors(node))
                 if neighbors and len(neighbors) > 1:
                     bridge_candidates.append((node, bc, len(neighbors)))
                 
@@ -253,7 +347,7 @@ class GraphManager:
             for node, bc, neighbors in sorted(bridge_candidates, key=lambda x: x[1], reverse=True)[:5]
         ]
 
-        return {
+        metrics = {
             "betweenness": {str(k): float(v) for k, v in betweenness.items()},
             "eigenvector": {str(k): float(v) for k, v in eigenvector.items()},
             "degree": {str(k): int(v) for k, v in degree.items()},
@@ -264,28 +358,50 @@ class GraphManager:
                 "bridgingNodes": bridging_nodes
             }
         }
+        if approximate:
+            metrics["approximate"] = True
+            metrics["residentNodes"] = graph.number_of_nodes()
+            metrics["totalNodes"] = len(self.labels)
+        return metrics
 
     async def analyze_content(self, content: dict) -> dict:
         """Analyze content and extract knowledge graph elements"""
         try:
-            logger.info('Starting content analysis')
-            analysis_result = await analyze_content(content)
-
-            prev_node_count = self.graph.number_of_nodes()
-            
-            # Add new nodes and edges using the advanced merge logic
-            new_nodes = []
-            for node_data in analysis_result["nodes"]:
-                node = await self._merge_node(node_data)
-                if node:
-                    new_nodes.append(node)
-
-            new_edges = []
-            for edge_data in analysis_result["edges"]:
-                edge = await self._merge_edge(edge_data)
-                if edge:
-                    new_edges.append(edge)
-                    
+            async with self.storage.unit_of_work():
+                logger.info('Starting content analysis')
+                # New nodes come back with final ids reserved from the node sequence
+                analysis_result = await analyze_content(content, reserve_ids=self.storage.reserve_node_ids)
+
+                prev_node_count = self.graph.number_of_nodes()
+            
+                # Add new nodes and edges using the advanced merge logic
+                new_nodes = []
+                merged_ids = {}
+                for node_data in analysis_result["nodes"]:
+                    node = await self._merge_node(node_data, reserved_id=node_data.get("id"))
+                    if node:
+                        new_nodes.append(node)
+                        if node.get("id") != node_data.get("id"):
+                            # Merged into an existing node: its reserved id goes unused
+                            merged_ids[node_data.get("id")] = node.get("id")
+
+                new_edges = []
+                edges = analysis_result["edges"]
+                edge_ids = await self.storage.reserve_edge_ids(len(edges))
+                for edge_data, edge_id in zip(edges, edge_ids):
+                    if merged_ids:
+                        edge_data = dict(
+                            edge_data,
+                            sourceId=merged_ids.get(edge_data.get("sourceId"), edge_data.get("sourceId")),
+                            targetId=merged_ids.get(edge_data.get("targetId"), edge_data.get("targetId"))
+                        )
+                    edge = await self._merge_edge(edge_data, reserved_id=edge_id)
+                    if edge:
+                        new_edges.append(edge)
+
+                # Bulk-insert new rows and persist merges into existing ones
+                await self.pending_writes.flush()
+                
             # Create snapshot after content analysis
             self.evolution_tracker.create_snapshot(self.graph, {
                 "event": "content_analysis",
@@ -293,7 +409,7 @@ class GraphManager:
                 "nodes_added": len(new_nodes),
                 "edges_added": len(new_edges)
             })
-            
+
             # Evaluate the expansion for feedback loop
             self.feedback_loop.evaluate_expansion(
                 self.graph,
@@ -330,78 +446,82 @@ class GraphManager:
             return await self.get_graph_data()
             
         try:
-            self.is_expanding = True
-            self.last_expansion_time = datetime.now()
-            logger.info(f"Starting graph expansion with prompt: {prompt}")
-            
-            # Get current state
-            prev_node_count = self.graph.number_of_nodes()
-            
-            # Prepare graph data for expansion
-            nodes = []
-            for node_id in self.graph.nodes():
-                node_data = self.graph.nodes[node_id]
-                nodes.append({
-                    "id": node_id, 
-                    "label": node_data.get("label", f"Node {node_id}"),
-                    "type": node_data.get("type", "concept"),
-                    "metadata": node_data.get("metadata", {})
-                })
+            async with self.storage.unit_of_work():
+                self.is_expanding = True
+                self.last_expansion_time = datetime.now()
+                logger.info(f"Starting graph expansion with prompt: {prompt}")
+            
+                # Get current state
+                prev_node_count = self.graph.number_of_nodes()
+            
+                # Prepare graph data for expansion
+                nodes = []
+                for node_id in self.graph.nodes():
+                    node_data = self.graph.nodes[node_id]
+                    nodes.append({
+                        "id": node_id, 
+                        "label": node_data.get("label", f"Node {node_id}"),
+                        "type": node_data.get("type", "concept"),
+                        "metadata": node_data.get("metadata", {})
+                    })
                 
-            edges = []
-            for source, target, data in self.graph.edges(data=True):
-                edges.append({
-                    "source": source,
-                    "target": target,
-                    "label": data.get("label", "related_to"),
-                    "weight": data.get("weight", 1)
-                })
+                edges = []
+                for source, target, data in self.graph.edges(data=True):
+                    edges.append({
+                        "source": source,
+                        "target": target,
+                        "label": data.get("label", "related_to"),
+                        "weight": data.get("weight", 1)
+                    })
             
-            # Check if we should apply feedback loop refinement
-            if self.expansion_iteration > 0:
-                # Apply the feedback loop to refine the prompt
-                refined_prompt = self.feedback_loop.refine_expansion_strategy(prompt, self.graph)
-                logger.info(f"Refined prompt based on feedback: {refined_prompt}")
-                expansion_prompt = refined_prompt
-            else:
-                expansion_prompt = prompt
+                # Check if we should apply feedback loop refinement
+                if self.expansion_iteration > 0:
+                    # Apply the feedback loop to refine the prompt
+                    refined_prompt = self.feedback_loop.refine_expansion_strategy(prompt, self.graph)
+                    logger.info(f"Refined prompt based on feedback: {refined_prompt}")
+                    expansion_prompt = refined_prompt
+                else:
+                    expansion_prompt = prompt
                 
-            # Execute expansion
-            expansion_result = await expand_graph(self.graph)
-            
-            # Process results - add new nodes and edges
-            new_nodes = []
-            for node_data in expansion_result.get("nodes", []):
-                fixed_node_data = {
-                    "label": node_data.get("label", ""),
-                    "type": node_data.get("type", "concept"),
-                    "metadata": {
-                        "description": node_data.get("metadata", {}).get("description", ""),
-                        "expansion_source": "automated_expansion",
-                        "expansion_prompt": prompt
+                # Execute expansion
+                expansion_result = await expand_graph(self.graph)
+            
+                # Process results - add new nodes and edges
+                new_nodes = []
+                for node_data in expansion_result.get("nodes", []):
+                    fixed_node_data = {
+                        "label": node_data.get("label", ""),
+                        "type": node_data.get("type", "concept"),
+                        "metadata": {
+                            "description": node_data.get("metadata", {}).get("description", ""),
+                            "expansion_source": "automated_expansion",
+                            "expansion_prompt": prompt
+                        }
                     }
-                }
-                node = await self._merge_node(fixed_node_data)
-                if node:
-                    new_nodes.append(node)
+                    node = await self._merge_node(fixed_node_data)
+                    if node:
+                        new_nodes.append(node)
                     
-            new_edges = []
-            for edge_data in expansion_result.get("edges", []):
-                fixed_edge_data = {
-                    "sourceId": edge_data.get("sourceId"),
-                    "targetId": edge_data.get("targetId"),
-                    "label": edge_data.get("label", "related_to"),
-                    "weight": edge_data.get("weight", 1),
-                    "metadata": {
-                        "description": edge_data.get("metadata", {}).get("description", ""),
-                        "expansion_source": "automated_expansion",
-                        "expansion_prompt": prompt
+                new_edges = []
+                for edge_data in expansion_result.get("edges", []):
+                    fixed_edge_data = {
+                        "sourceId": edge_data.get("sourceId"),
+                        "targetId": edge_data.get("targetId"),
+                        "label": edge_data.get("label", "related_to"),
+                        "weight": edge_data.get("weight", 1),
+                        "metadata": {
+                            "description": edge_data.get("metadata", {}).get("description", ""),
+                            "expansion_source": "automated_expansion",
+                            "expansion_prompt": prompt
+                        }
                     }
-                }
-                edge = await self._merge_edge(fixed_edge_data)
-                if edge:
-                    new_edges.append(edge)
-            
+                    edge = await self._merge_edge(fixed_edge_data)
+                    if edge:
+                        new_edges.append(edge)
+
+                # Persist merges into existing nodes and edges in one batch
+                await self.pending_writes.flush()
+
             # Create snapshot for evolution tracking
             self.evolution_tracker.create_snapshot(self.graph, {
                 "event": "expansion",
@@ -410,7 +530,7 @@ class GraphManager:
                 "nodes_added": len(new_nodes),
                 "edges_added": len(new_edges)
             })
-            
+
             # Evaluate the expansion for feedback loop
             evaluation = self.feedback_loop.evaluate_expansion(
                 self.graph,
@@ -419,12 +539,12 @@ class GraphManager:
                 new_edges,
                 {"expansion_prompt": prompt, "reasoning_process": expansion_result.get("reasoning", "")}
             )
-            
+
             logger.info(f"Expansion evaluation: {json.dumps(evaluation)}")
-            
+
             # Recalculate clusters
             await self.recalculate_clusters()
-            
+
             # If we need to do more iterations and have added content, continue expanding
             self.expansion_iteration += 1
             if self.expansion_iteration < max_iterations and (new_nodes or new_edges):
@@ -435,22 +555,23 @@ class GraphManager:
                     # Slight delay to avoid overwhelming the system
                     await asyncio.sleep(1)
                     return await self.expand(next_question, max_iterations - 1)
-            
+
             return await self.get_graph_data()
-            
+
         except Exception as e:
             logger.error(f"Error during graph expansion: {str(e)}", exc_info=True)
             raise
         finally:
             self.is_expanding = False
 
-    async def _merge_node(self, node_data: dict) -> dict:
+    async def _merge_node(self, node_data: dict, reserved_id: Optional[int] = None) -> dict:
         """
         Merge a new node with existing nodes if similar.
         This implements the graph merging mechanism described by Buehler (2025).
         
         Args:
             node_data: Data for the new node
+            reserved_id: Id already reserved for the node if it is created
             
         Returns:
             The created or merged node
@@ -461,6 +582,7 @@ class GraphManager:
         if similar_node:
             # Merge with existing node
             node_id = similar_node
+            await self._ensure_resident(node_id)
             existing_data = self.graph.nodes[node_id]
             
             # Update metadata
@@ -485,6 +607,10 @@ class GraphManager:
             
             # Update the node
             self.graph.nodes[node_id]["metadata"] = metadata
+            self._index_node(node_id)
+            self.evolution_tracker.record_node_update(node_id)
+            self._count_mutation()
+            await self._record_write(UPDATE_NODE, self._node_row(node_id))
             
             # Log the merge
             logger.info(f"Merged node with label '{node_data.get('label')}' into existing node {node_id}")
@@ -492,16 +618,31 @@ class GraphManager:
             return self.graph.nodes[node_id]
         else:
             # Create new node
-            created_node = await create_node(node_data)
+            if reserved_id is not None:
+                created_node = {
+                    "id": int(reserved_id),
+                    "label": node_data.get("label"),
+                    "type": node_data.get("type", "concept"),
+                    "metadata": node_data.get("metadata", {})
+                }
+                await self._record_write(INSERT_NODE, dict(created_node))
+            elif self.write_behind is not None:
+                created_node = await self.write_behind.create_node(node_data)
+            else:
+                created_node = await self.storage.create_node(node_data)
             if created_node:
                 node_id = str(created_node["id"])
                 if not self.graph.has_node(node_id):
                     self.graph.add_node(node_id, **created_node)
+                    if self.cache is not None:
+                        self.cache.add_new_node(int(node_id))
+                    self._index_node(node_id)
                     # Track node creation for evolution
+                    # Only shared values: creation metadata is interned, labels live in the graph
                     self.evolution_tracker.record_node_creation(node_id, {
-                        "label": created_node.get("label", ""),
                         "type": created_node.get("type", "concept")
                     })
+                    self._count_mutation()
                     
                 return created_node
             return None
@@ -524,20 +665,18 @@ class GraphManager:
             return None
             
         # First, check for exact label matches
-        for node_id in self.graph.nodes():
-            existing_data = self.graph.nodes[node_id]
-            existing_label = existing_data.get("label", "").lower()
-            
-            if existing_label == node_label:
-                return node_id
+        exact_match = self.labels.find_exact(node_label)
+        if exact_match is not None:
+            return str(exact_match)
                 
-        # Then, check for fuzzy matches based on label and type
+        # Then, check for fuzzy matches based on label and type. Labels of every
+        # node are indexed; descriptions are only compared for resident nodes
         candidates = []
         
-        for node_id in self.graph.nodes():
-            existing_data = self.graph.nodes[node_id]
-            existing_label = existing_data.get("label", "").lower()
-            existing_type = existing_data.get("type", "concept")
+        for node_id, existing_label, existing_type in self.labels.entries():
+            node_id = str(node_id)
+            existing_label = existing_label.lower()
+            existing_data = self.graph.nodes.get(node_id) or {}
             existing_desc = existing_data.get("metadata", {}).get("description", "").lower()
             
             # Check if labels are similar
@@ -565,19 +704,21 @@ class GraphManager:
                 
         return None
 
-    async def _merge_edge(self, edge_data: dict) -> dict:
+    async def _merge_edge(self, edge_data: dict, reserved_id: Optional[int] = None) -> dict:
         """
         Create or update an edge, with conflict resolution.
         This implements the graph merging mechanism described by Buehler (2025).
         
         Args:
             edge_data: Data for the edge
+            reserved_id: Id already reserved for the edge if it is created
             
         Returns:
             The created or updated edge
         """
         source_id = str(edge_data.get("sourceId"))
         target_id = str(edge_data.get("targetId"))
+        await self._ensure_resident(source_id, target_id)
         
         # Check if both nodes exist
         if not (self.graph.has_node(source_id) and self.graph.has_node(target_id)):
@@ -620,32 +761,375 @@ class GraphManager:
             
             # Update edge in graph
             self.graph[source_id][target_id].update(updated_data)
+            self._index_edge(source_id, target_id)
+            self.evolution_tracker.record_edge_update(source_id, target_id)
+            self._count_mutation()
+            if updated_data.get("id"):
+                await self._record_write(UPDATE_EDGE, self._edge_row(source_id, target_id))
             
             logger.info(f"Updated edge between nodes {source_id} and {target_id}")
             
             return self.graph[source_id][target_id]
         else:
             # Create new edge
-            edge = await create_edge(edge_data)
+            if reserved_id is not None:
+                edge = {
+                    "id": int(reserved_id),
+                    "sourceId": int(source_id),
+                    "targetId": int(target_id),
+                    "label": edge_data.get("label", "related_to"),
+                    "weight": edge_data.get("weight", 1.0),
+                    "metadata": edge_data.get("metadata", {})
+                }
+                await self._record_write(INSERT_EDGE, dict(edge))
+            elif self.write_behind is not None:
+                edge = await self.write_behind.create_edge(edge_data)
+            else:
+                edge = await self.storage.create_edge(edge_data)
             if edge:
                 source_id = str(edge["sourceId"])
                 target_id = str(edge["targetId"])
                 self.graph.add_edge(source_id, target_id, **edge)
+                if self.cache is not None:
+                    self.cache.link(int(source_id), int(target_id))
+                self._index_edge(source_id, target_id)
                 
                 # Track edge creation for evolution
                 self.evolution_tracker.record_edge_creation(source_id, target_id, {
                     "label": edge.get("label", "related_to"),
                     "weight": edge.get("weight", 1)
                 })
+                self._count_mutation()
                 
                 return edge
             return None
 
+    def _node_row(self, node_id: str) -> dict:
+        """Database row for an in-memory node"""
+        data = self.graph.nodes[node_id]
+        return {
+            "id": int(node_id),
+            "label": data.get("label", f"Node {node_id}"),
+            "type": data.get("type", "concept"),
+            "metadata": data.get("metadata", {})
+        }
+
+    def _edge_row(self, source_id: str, target_id: str) -> dict:
+        """Database row for an in-memory edge"""
+        data = self.graph[source_id][target_id]
+        return {
+            "id": data.get("id"),
+            "label": data.get("label", "related_to"),
+            "weight": data.get("weight", 1.0),
+            "metadata": data.get("metadata", {})
+        }
+
+    def _index_node(self, node_id: str) -> None:
+        """Refresh the label and attribute index entries of an in-memory node"""
+        data = self.graph.nodes[node_id]
+        self.labels.add(int(node_id), data.get("label"), data.get("type", "concept"))
+        if self.cache is not None:
+            return
+        self.node_index.add(int(node_id), {"type": data.get("type", "concept")}, data.get("metadata") or {})
+
+    def _index_edge(self, source_id: str, target_id: str) -> None:
+        """Refresh the attribute index entry of an in-memory edge"""
+        data = self.graph[source_id][target_id]
+        if data.get("id") is None or self.cache is not None:
+            return
+        self.edge_index.add(
+            int(data["id"]),
+            {"label": data.get("label", "related_to")},
+            data.get("metadata") or {},
+            ref=(source_id, target_id)
+        )
+
+    async def find_nodes(self, metadata: Optional[Dict[str, List[Any]]] = None,
+                         node_type: Optional[str] = None,
+                         after: int = 0, limit: int = 100) -> Dict[str, Any]:
+        """
+        Page through nodes matching type and metadata filters.
+
+        Answered from the attribute index while the graph is loaded and pushed
+        down to the storage backend otherwise.
+
+        Args:
+            metadata: Metadata key to accepted values; every key must match
+            node_type: Optional node type
+            after: Return nodes with ids greater than this cursor
+            limit: Page size
+
+        Returns:
+            Dictionary with the page of nodes and the cursor of the next page
+        """
+        try:
+            if self.is_loaded:
+                ids = self.node_index.find({"type": node_type}, metadata, after, limit)
+                nodes = [self._node_payload(str(node_id)) for node_id in ids]
+                source = "memory"
+            else:
+                nodes = await self.storage.find_nodes(metadata, node_type, after, limit)
+                source = "storage"
+            return {
+                "items": nodes,
+                "nextCursor": nodes[-1]["id"] if len(nodes) == limit else None,
+                "source": source
+            }
+        except Exception as e:
+            logger.error(f"Error filtering nodes: {str(e)}", exc_info=True)
+            raise
+
+    async def find_edges(self, metadata: Optional[Dict[str, List[Any]]] = None,
+                         label: Optional[str] = None,
+                         after: int = 0, limit: int = 100) -> Dict[str, Any]:
+        """Page through edges matching label and metadata filters; see find_nodes"""
+        try:
+            if self.is_loaded:
+                ids = self.edge_index.find({"label": label}, metadata, after, limit)
+                edges = [self._edge_payload(*self.edge_index.refs[edge_id]) for edge_id in ids]
+                source = "memory"
+            else:
+                edges = await self.storage.find_edges(metadata, label, after, limit)
+                source = "storage"
+            return {
+                "items": edges,
+                "nextCursor": edges[-1]["id"] if len(edges) == limit else None,
+                "source": source
+            }
+        except Exception as e:
+            logger.error(f"Error filtering edges: {str(e)}", exc_info=True)
+            raise
+
+    def _node_payload(self, node_id: str) -> dict:
+        """API representation of an in-memory node"""
+        data = self.graph.nodes[node_id]
+        return {
+            "id": int(node_id),
+            "label": data.get("label", f"Node {node_id}"),
+            "type": data.get("type", "concept"),
+            "metadata": data.get("metadata", {})
+        }
+
+    def _edge_payload(self, source_id: str, target_id: str) -> dict:
+        """API representation of an in-memory edge"""
+        data = self.graph[source_id][target_id]
+        return {
+            "id": data.get("id"),
+            "sourceId": int(data.get("sourceId", source_id)),
+            "targetId": int(data.get("targetId", target_id)),
+            "label": data.get("label", "related_to"),
+            "weight": data.get("weight", 1.0),
+            "metadata": data.get("metadata", {})
+        }
+
+    def _degree(self, node_id: str) -> int:
+        """Degree of an in-memory node, counting edges to non-resident neighbors"""
+        if self.cache is not None:
+            return self.cache.degree(int(node_id))
+        return self.graph.degree(node_id)
+
+    async def _ensure_resident(self, *node_ids: str) -> None:
+        """Fault known nodes into the resident graph when running out of core"""
+        if self.cache is None:
+            return
+        ids = [int(node_id) for node_id in node_ids if node_id.isdigit() and int(node_id) in self.labels]
+        if ids:
+            await self.cache.ensure(ids)
+
+    def residency_stats(self) -> Dict[str, Any]:
+        """Residency mode, resident graph size and cache telemetry"""
+        return {
+            "mode": self.residency,
+            "residentNodes": self.graph.number_of_nodes(),
+            "residentEdges": self.graph.number_of_edges(),
+            "totalNodes": len(self.labels),
+            "cache": self.cache.stats() if self.cache is not None else None
+        }
+
+    def _memory_neighbors(self, node_id: int) -> List[int]:
+        return [int(neighbor) for neighbor in self.graph.neighbors(str(node_id))]
+
+    def _memory_subgraph(self, node_ids: List[int]) -> Dict[str, List[dict]]:
+        keys = [str(node_id) for node_id in node_ids]
+        return {
+            "nodes": [self._node_payload(key) for key in keys],
+            "edges": [self._edge_payload(u, v) for u, v in self.graph.subgraph(keys).edges()]
+        }
+
+    async def get_neighborhood(self, node_id: int, depth: int = 1, fanout: Optional[int] = None,
+                               max_nodes: int = DEFAULT_MAX_NODES) -> Optional[Dict[str, Any]]:
+        """
+        Get the nodes within depth hops of a node and the edges between them.
+
+        Traverses the in-memory graph when it is resident; otherwise the
+        traversal runs in the database as a recursive query, so the graph never
+        has to be loaded.
+
+        Args:
+            node_id: Node to start from
+            depth: Maximum number of hops
+            fanout: Maximum neighbors followed from each node (None for all)
+            max_nodes: Maximum nodes returned, nearest first
+
+        Returns:
+            Dictionary with nodes (each with its hop distance) and edges, or
+            None if the node does not exist
+        """
+        try:
+            if self.is_loaded:
+                if not self.graph.has_node(str(node_id)):
+                    return None
+                distances = bounded_neighborhood(self._memory_neighbors, node_id, depth, fanout, max_nodes)
+                subgraph = self._memory_subgraph(list(distances))
+                source = "memory"
+            else:
+                distances = await self.storage.neighborhood(node_id, depth, fanout, max_nodes)
+                subgraph = await self.storage.get_subgraph(list(distances))
+                if not any(node["id"] == node_id for node in subgraph["nodes"]):
+                    return None
+                source = "storage"
+
+            nodes = sorted(subgraph["nodes"], key=lambda node: (distances[node["id"]], node["id"]))
+            for node in nodes:
+                node["depth"] = distances[node["id"]]
+            return {"nodes": nodes, "edges": subgraph["edges"], "source": source}
+        except Exception as e:
+            logger.error(f"Error getting neighborhood of node {node_id}: {str(e)}", exc_info=True)
+            raise
+
+    async def find_path(self, source_id: int, target_id: int,
+                        max_depth: int = DEFAULT_MAX_PATH_DEPTH,
+                        fanout: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        Find a shortest path (fewest hops) between two nodes.
+
+        Uses the same resident/database split as get_neighborhood. Returns
+        None if either node does not exist.
+        """
+        try:
+            if self.is_loaded:
+                if not (self.graph.has_node(str(source_id)) and self.graph.has_node(str(target_id))):
+                    return None
+                path = bounded_shortest_path(self._memory_neighbors, source_id, target_id, max_depth, fanout)
+                subgraph = self._memory_subgraph(path or [])
+                source = "memory"
+            else:
+                endpoints = await self.storage.get_subgraph([source_id, target_id])
+                if len(endpoints["nodes"]) < len({source_id, target_id}):
+                    return None
+                path = await self.storage.shortest_path(source_id, target_id, max_depth, fanout)
+                subgraph = await self.storage.get_subgraph(path or [])
+                source = "storage"
+
+            if path is None:
+                return {"found": False, "length": None, "nodes": [], "edges": [], "source": source}
+
+            # Keep only the edges along the path, in path order
+            nodes_by_id = {node["id"]: node for node in subgraph["nodes"]}
+            edges_by_pair = {
+                frozenset((edge["sourceId"], edge["targetId"])): edge for edge in subgraph["edges"]
+            }
+            return {
+                "found": True,
+                "length": len(path) - 1,
+                "nodes": [nodes_by_id[node_id] for node_id in path],
+                "edges": [edges_by_pair[frozenset(pair)] for pair in zip(path, path[1:])],
+                "source": source
+            }
+        except Exception as e:
+            logger.error(f"Error finding path {source_id} -> {target_id}: {str(e)}", exc_info=True)
+            raise
+
+    async def _record_write(self, kind: str, row: dict) -> None:
+        """Queue a batched insert or update, coalesced with other writes to the row"""
+        if self.write_behind is not None:
+            await self.write_behind.enqueue(kind, row)
+        else:
+            await self.pending_writes.add(kind, row)
+
+    async def _flush_graph_writes(self) -> None:
+        await self.pending_writes.flush()
+        if self.write_behind is not None:
+            await self.write_behind.flush()
+
+    async def flush(self, retry_failed: bool = False) -> None:
+        """
+        Wait until all pending graph and history writes are persisted.
+
+        Args:
+            retry_failed: Queue write-behind writes that failed earlier again
+
+        Raises:
+            WriteBehindError: if graph writes could not be persisted
+        """
+        if retry_failed and self.write_behind is not None:
+            await self.write_behind.replay_failed()
+        try:
+            await self._flush_graph_writes()
+        finally:
+            await asyncio.to_thread(self.evolution_tracker.flush)
+
+    def _count_mutation(self) -> None:
+        """Count a graph mutation, waking the metrics sampler at the threshold"""
+        self.mutations_since_sample += 1
+        if self.mutations_since_sample >= self.sample_mutations:
+            self._sample_requested.set()
+
+    async def sample_metrics(self) -> None:
+        """Record a metrics history sample, computed off the event loop"""
+        self._sample_requested.clear()
+        self.mutations_since_sample = 0
+        # Copy the graph so mutations can continue while metrics are computed
+        graph = self.graph.copy()
+        degree = {node: self._degree(node) for node in graph.nodes()}
+        metrics = await asyncio.to_thread(self.calculate_metrics, graph, degree)
+        self.evolution_tracker.save_metrics(metrics)
+
+    async def _metrics_sampler_loop(self, interval: float):
+        while True:
+            try:
+                await asyncio.wait_for(self._sample_requested.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self.sample_metrics()
+            except Exception as e:
+                logger.error(f"Error sampling graph metrics: {str(e)}", exc_info=True)
+
+    def start_metrics_sampler(self, interval: float = METRICS_SAMPLE_INTERVAL) -> None:
+        """Start periodic metrics history sampling on the running event loop"""
+        if self._sampler_task is None or self._sampler_task.done():
+            self._sampler_task = asyncio.create_task(self._metrics_sampler_loop(interval))
+            logger.info(f"Started metrics sampling every {interval}s or {self.sample_mutations} mutations")
+
+    async def stop_metrics_sampler(self) -> None:
+        """Stop periodic metrics history sampling"""
+        task, self._sampler_task = self._sampler_task, None
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def shutdown(self) -> None:
+        """Persist pending writes and stop background work"""
+        await self.stop_metrics_sampler()
+        try:
+            await self.pending_writes.flush()
+            if self.write_behind is not None:
+                await self.write_behind.close()
+        finally:
+            await self.evolution_tracker.stop_compaction()
+            await asyncio.to_thread(self.evolution_tracker.close)
+
     async def create_node(self, node_data: dict) -> dict:
         """Create a new node with advanced merging logic"""
         try:
             logger.info(f"Creating new node with data: {node_data}")
-            return await self._merge_node(node_data)
+            node = await self._merge_node(node_data)
+            await self.pending_writes.flush()
+            return node
         except Exception as e:
             logger.error(f"Error creating node: {str(e)}", exc_info=True)
             raise
@@ -654,7 +1138,9 @@ class GraphManager:
         """Create a new edge with advanced merging logic"""
         try:
             logger.info(f"Creating new edge with data: {edge_data}")
-            return await self._merge_edge(edge_data)
+            edge = await self._merge_edge(edge_data)
+            await self.pending_writes.flush()
+            return edge
         except Exception as e:
             logger.error(f"Error creating edge: {str(e)}", exc_info=True)
             raise
@@ -670,7 +1156,7 @@ class GraphManager:
             # Find disconnected nodes
             disconnected_nodes = []
             for node in self.graph.nodes():
-                if self.graph.degree(node) == 0:
+                if self._degree(node) == 0:
                     disconnected_nodes.append(node)
 
             if not disconnected_nodes:
@@ -678,26 +1164,22 @@ class GraphManager:
                 return await self.get_graph_data()
 
             logger.info(f"Found {len(disconnected_nodes)} disconnected nodes")
-            
-            # First try to find meaningful connections using semantic similarity
-            connected_count = 0
-            for node_id in disconnected_nodes:
-                # Get node data for the semantic analysis
-                node_data = self.graph.nodes[node_id]
-                node_label = node_data.get("label", f"Node {node_id}")
-                node_type = node_data.get("type", "concept")
-                node_desc = node_data.get("metadata", {}).get("description", "")
-                
-                # Use suggest_relationships to find potential connections
-                suggestions = await suggest_relationships(self.graph)
-                
-                # Filter suggestions involving this node
-                relevant_suggestions = [
-                    s for s in suggestions
-                    if s["sourceId"] == int(node_id) or s["targetId"] == int(node_id)
-                ]
-                
-                if relevant_suggestions:
+
+            # Collect relationship suggestions before the unit of work, so no
+            # connection is pinned while waiting on the LLM
+            await self._ensure_resident(*disconnected_nodes)
+            suggestions = await suggest_relationships(self.graph)
+
+            async with self.storage.unit_of_work():
+                # First try to find meaningful connections using semantic similarity
+                connected_count = 0
+                for node_id in disconnected_nodes:
+                    # Filter suggestions involving this node
+                    relevant_suggestions = [
+                        s for s in suggestions
+                        if s["sourceId"] == int(node_id) or s["targetId"] == int(node_id)
+                    ]
+
                     # Create edges for the best suggestions
                     for suggestion in relevant_suggestions[:2]:  # Limit to 2 connections per node
                         edge_data = {
@@ -711,71 +1193,80 @@ class GraphManager:
                                 "confidence": suggestion["confidence"]
                             }
                         }
-                        await self.create_edge(edge_data)
+                        await self._merge_edge(edge_data)
                         connected_count += 1
-                        
-            # If we still have disconnected nodes, connect them to the main component
-            if connected_count < len(disconnected_nodes):
-                # Get the largest connected component
-                components = list(nx.connected_components(self.graph))
-                if components:
-                    main_component = max(components, key=len)
-                    
-                    # For each remaining disconnected node, find best matches in main component
-                    for node_id in disconnected_nodes:
-                        if self.graph.degree(node_id) == 0:  # Still disconnected
-                            node_data = self.graph.nodes[node_id]
-                            node_label = node_data.get("label", "")
-                            node_type = node_data.get("type", "concept")
-                            
-                            # Find best matches in main component based on type
-                            type_matches = [
-                                n for n in main_component
-                                if self.graph.nodes[n].get("type") == node_type
-                            ]
-                            
-                            if type_matches:
-                                # Pick a random match of the same type
-                                import random
-                                target_id = random.choice(type_matches)
-                            else:
-                                # Pick any node from main component
-                                target_id = next(iter(main_component))
-                                
-                            # Create edge
-                            edge_data = {
-                                "sourceId": int(node_id),
-                                "targetId": int(target_id),
-                                "label": "related_to",
-                                "weight": 0.5,
-                                "metadata": {
-                                    "description": "Automatic connection of isolated node",
-                                    "source": "auto_reconnect",
-                                    "confidence": 0.5
+
+                # If we still have disconnected nodes, connect them to the main component
+                if connected_count < len(disconnected_nodes):
+                    # Get the largest connected component
+                    components = list(nx.connected_components(self.graph))
+                    if components:
+                        main_component = max(components, key=len)
+
+                        # For each remaining disconnected node, find best matches in main component
+                        for node_id in disconnected_nodes:
+                            await self._ensure_resident(node_id)
+                            if self._degree(node_id) == 0:  # Still disconnected
+                                node_type = self.graph.nodes[node_id].get("type", "concept")
+
+                                # Find best matches in main component based on type
+                                type_matches = [
+                                    n for n in main_component
+                                    if self.labels.get(int(n))[1] == node_type
+                                ]
+
+                                if type_matches:
+                                    # Pick a random match of the same type
+                                    import random
+                                    target_id = random.choice(type_matches)
+                                else:
+                                    # Pick any node from main component
+                                    target_id = next(iter(main_component))
+
+                                # Create edge
+                                edge_data = {
+                                    "sourceId": int(node_id),
+                                    "targetId": int(target_id),
+                                    "label": "related_to",
+                                    "weight": 0.5,
+                                    "metadata": {
+                                        "description": "Automatic connection of isolated node",
+                                        "source": "auto_reconnect",
+                                        "confidence": 0.5
+                                    }
                                 }
-                            }
-                            await self.create_edge(edge_data)
-            
+                                await self._merge_edge(edge_data)
+
+                await self.pending_writes.flush()
+
             # Create snapshot after reconnection
             self.evolution_tracker.create_snapshot(self.graph, {
                 "event": "reconnect_nodes",
                 "reconnected_count": connected_count
             })
-            
+
             return await self.get_graph_data()
         except Exception as e:
             logger.error(f"Error reconnecting nodes: {str(e)}", exc_info=True)
             raise
 
-    async def recalculate_clusters(self) -> dict:
+    async def recalculate_clusters(self, method: Optional[str] = None,
+                                   resolution: Optional[float] = None) -> dict:
         """
         Recalculate graph clusters using the advanced self-organization capabilities.
+
+        Args:
+            method: Community detection engine; keeps the current one if None
+            resolution: Modularity resolution, higher values give smaller
+                clusters; keeps the current one if None
         """
         try:
             logger.info("Recalculating graph clusters")
-            
-            # Initialize semantic clustering - synchronous operation
-            self.semantic_clustering = SemanticClusteringService(self.graph)
+            current = self.semantic_clustering
+            if current is not None:
+                method = method or current.method
+                resolution = current.resolution if resolution is None else resolution
+            self.semantic_clustering = SemanticClusteringService(self.graph, method, resolution)
             
             # Create snapshot after clustering
             self.evolution_tracker.create_snapshot(self.graph, {
@@ -788,6 +1279,149 @@ class GraphManager:
             logger.error(f"Error recalculating clusters: {str(e)}", exc_info=True)
             raise
             
+    async def get_graph_at(self, timestamp: Optional[float] = None,
+                           snapshot_id: Optional[str] = None) -> Optional[dict]:
+        """
+        Get the graph as it was at a snapshot or point in time.
+
+        Args:
+            timestamp: Epoch seconds; the latest snapshot taken by then is used
+            snapshot_id: A specific snapshot
+
+        Returns:
+            Dictionary with the snapshot record, nodes and edges, or None if
+            no snapshot matches
+        """
+        try:
+            found = await asyncio.to_thread(self.evolution_tracker.graph_at, timestamp, snapshot_id)
+            if found is None:
+                return None
+            record, graph = found
+            payload = graph_payload(graph)
+            return {
+                "snapshot": {
+                    "id": format_snapshot_id(record.number),
+                    "timestamp": datetime.fromtimestamp(record.timestamp).isoformat(),
+                    "nodes": record.nodes,
+                    "edges": record.edges
+                },
+                "nodes": payload["nodes"],
+                "edges": payload["edges"]
+            }
+        except Exception as e:
+            logger.error(f"Error reconstructing historical graph: {str(e)}", exc_info=True)
+            raise
+
+    def _graph_diff(self, from_id: str, to_id: str) -> Optional[dict]:
+        found = [self.evolution_tracker.graph_at(snapshot_id=snapshot_id) for snapshot_id in (from_id, to_id)]
+        if None in found:
+            return None
+        (old_record, old), (new_record, new) = found
+        diff = diff_arrays(graph_arrays(old), graph_arrays(new))
+
+        def nodes(graph: nx.Graph, ids) -> List[dict]:
+            return graph_payload(graph.subgraph(str(node_id) for node_id in ids.tolist()))["nodes"]
+
+        def edges(graph: nx.Graph, keys) -> List[dict]:
+            pairs = [(str(source), str(target)) for source, target in keys.tolist()]
+            return graph_payload(graph.edge_subgraph(pairs))["edges"]
+
+        def snapshot(record) -> dict:
+            return {
+                "id": format_snapshot_id(record.number),
+                "timestamp": datetime.fromtimestamp(record.timestamp).isoformat(),
+                "nodes": record.nodes,
+                "edges": record.edges
+            }
+
+        return {
+            "from": snapshot(old_record),
+            "to": snapshot(new_record),
+            "nodes": {
+                "added": nodes(new, diff["nodes"]["added"]),
+                "removed": nodes(old, diff["nodes"]["removed"]),
+                "changed": nodes(new, diff["nodes"]["changed"])
+            },
+            "edges": {
+                "added": edges(new, diff["edges"]["added"]),
+                "removed": edges(old, diff["edges"]["removed"]),
+                "changed": edges(new, diff["edges"]["changed"])
+            }
+        }
+
+    async def get_graph_diff(self, from_id: str, to_id: str) -> Optional[dict]:
+        """
+        Nodes and edges added, removed and changed between two snapshots.
+
+        Removed elements are reported as they were in the first snapshot,
+        added and changed ones as they are in the second.
+
+        Returns:
+            Dictionary with both snapshot records and the node and edge
+            changes, or None if either snapshot is unknown
+        """
+        try:
+            return await asyncio.to_thread(self._graph_diff, from_id, to_id)
+        except Exception as e:
+            logger.error(f"Error diffing snapshots {from_id} -> {to_id}: {str(e)}", exc_info=True)
+            raise
+
+    async def get_window(self, start: Optional[float] = None, end: Optional[float] = None,
+                         context: bool = False) -> dict:
+        """
+        The subgraph created between start and end (epoch seconds).
+
+        Args:
+            start: Window start, unbounded if None
+            end: Window end, unbounded if None
+            context: Also return the other edges of the created nodes, and the
+                older nodes that window and context edges connect to
+
+        Returns:
+            Dictionary with the created nodes and edges, plus contextNodes and
+            contextEdges when context is requested
+        """
+        try:
+            node_ids, pairs = await asyncio.to_thread(self.evolution_tracker.created_between, start, end)
+            await self._ensure_resident(*node_ids, *(node for pair in pairs for node in pair))
+            nodes = [node_id for node_id in node_ids if self.graph.has_node(node_id)]
+            edges = [(u, v) for u, v in pairs if self.graph.has_edge(u, v)]
+            result = {
+                "from": datetime.fromtimestamp(start).isoformat() if start is not None else None,
+                "to": datetime.fromtimestamp(end).isoformat() if end is not None else None,
+                "nodes": graph_payload(self.graph.subgraph(nodes))["nodes"],
+                "edges": graph_payload(self.graph.edge_subgraph(edges))["edges"]
+            }
+            if context:
+                created = set(nodes)
+                window_edges = {frozenset(edge) for edge in edges}
+                context_edges = [
+                    (node_id, neighbor) for node_id in nodes for neighbor in self.graph.neighbors(node_id)
+                    if frozenset((node_id, neighbor)) not in window_edges
+                    and (neighbor not in created or node_id < neighbor)
+                ]
+                context_nodes = {node for edge in edges + context_edges for node in edge} - created
+                result["contextNodes"] = graph_payload(self.graph.subgraph(context_nodes))["nodes"]
+                result["contextEdges"] = graph_payload(self.graph.edge_subgraph(context_edges))["edges"]
+            return result
+        except Exception as e:
+            logger.error(f"Error getting creation window: {str(e)}", exc_info=True)
+            raise
+
+    async def get_hub_growth(self, window_hours: float, limit: int = 10) -> List[dict]:
+        """Nodes whose degree grew fastest in the last window_hours, with their labels"""
+        try:
+            growth = await asyncio.to_thread(
+                self.evolution_tracker.fastest_growing_nodes, window_hours, None, limit
+            )
+            for entry in growth:
+                known = self.labels.get(int(entry["nodeId"])) if entry["nodeId"].isdigit() else None
+                entry["label"] = known[0] if known else None
+            return growth
+        except Exception as e:
+            logger.error(f"Error analyzing hub growth: {str(e)}", exc_info=True)
+            raise
+
     async def get_evolution_metrics(self) -> dict:
         """
         Get metrics about the graph's evolution over time.
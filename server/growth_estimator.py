@@ -0,0 +1,134 @@
+"""Online growth-rate estimation for the graph history.
+
+Node and edge counts follow N(t) ∝ t^α for a scale-free growth process, with
+t the time since the first snapshot. The exponent is the slope of a
+least-squares line through (log t, log N), which only needs the running sums
+of x, y, x² and xy. Each snapshot updates the sums in O(1) and reading the
+estimate is O(1), instead of refitting the whole history on every request.
+
+A second set of sums covers a sliding window of recent snapshots; points
+leaving the window are subtracted again, giving the current growth trend.
+"""
+import os
+import math
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, Optional, Tuple
+
+# Span of the recent-growth window
+GROWTH_WINDOW_HOURS = float(os.environ.get("EVOLUTION_GROWTH_WINDOW_HOURS", "24"))
+
+Point = Tuple[float, int, int]
+
+
+class LogLogFit:
+    """Running sufficient statistics of a least-squares fit of log y on log x"""
+
+    def __init__(self):
+        self.count = 0
+        self.sum_x = 0.0
+        self.sum_y = 0.0
+        self.sum_xx = 0.0
+        self.sum_xy = 0.0
+
+    def update(self, x: float, y: float, sign: int = 1) -> None:
+        """Add (sign=1) or remove (sign=-1) a point; non-positive values have no log and are skipped"""
+        if x <= 0 or y <= 0:
+            return
+        log_x, log_y = math.log(x), math.log(y)
+        self.count += sign
+        self.sum_x += sign * log_x
+        self.sum_y += sign * log_y
+        self.sum_xx += sign * log_x * log_x
+        self.sum_xy += sign * log_x * log_y
+
+    def slope(self) -> Optional[float]:
+        if self.count < 2:
+            return None
+        denominator = self.count * self.sum_xx - self.sum_x * self.sum_x
+        if abs(denominator) < 1e-12:
+            return None
+        return (self.count * self.sum_xy - self.sum_x * self.sum_y) / denominator
+
+
+class GrowthEstimator:
+    """Growth rates and power-law exponents over all snapshots and a recent window"""
+
+    def __init__(self, window_hours: float = GROWTH_WINDOW_HOURS):
+        self.window_hours = window_hours
+        self.reset()
+
+    def reset(self) -> None:
+        self.first: Optional[Point] = None
+        self.last: Optional[Point] = None
+        self.count = 0
+        self.nodes_fit = LogLogFit()
+        self.edges_fit = LogLogFit()
+        self.window: Deque[Point] = deque()
+        self.window_nodes_fit = LogLogFit()
+        self.window_edges_fit = LogLogFit()
+
+    def rebuild(self, points: Iterable[Point]) -> None:
+        """Recompute the sums from (timestamp, nodes, edges) points in time order"""
+        self.reset()
+        for timestamp, nodes, edges in points:
+            self.add(timestamp, nodes, edges)
+
+    def add(self, timestamp: float, nodes: int, edges: int) -> None:
+        """Account for a snapshot taken at timestamp (epoch seconds)"""
+        if self.first is None:
+            self.first = (timestamp, nodes, edges)
+        self.last = (timestamp, nodes, edges)
+        self.count += 1
+        elapsed = timestamp - self.first[0]
+        self.nodes_fit.update(elapsed, nodes)
+        self.edges_fit.update(elapsed, edges)
+
+        self.window.append(self.last)
+        self.window_nodes_fit.update(elapsed, nodes)
+        self.window_edges_fit.update(elapsed, edges)
+        horizon = timestamp - self.window_hours * 3600
+        while self.window[0][0] < horizon:
+            old_timestamp, old_nodes, old_edges = self.window.popleft()
+            self.window_nodes_fit.update(old_timestamp - self.first[0], old_nodes, sign=-1)
+            self.window_edges_fit.update(old_timestamp - self.first[0], old_edges, sign=-1)
+
+    @staticmethod
+    def _rates(first: Point, last: Point) -> Tuple[Optional[float], Optional[float], float]:
+        hours = (last[0] - first[0]) / 3600
+        if hours <= 0:
+            return None, None, hours
+        return (last[1] - first[1]) / hours, (last[2] - first[2]) / hours, hours
+
+    def estimate(self) -> Dict[str, Any]:
+        """
+        Current growth estimate.
+
+        Returns:
+            Dict with node/edge growth rates (per hour) and power-law exponents
+            over all snapshots, and the same for the recent window under "recent"
+        """
+        if self.count < 2:
+            return {"node_growth_rate": None, "edge_growth_rate": None, "enough_data": False}
+        node_rate, edge_rate, hours = self._rates(self.first, self.last)
+        if node_rate is None:
+            return {"node_growth_rate": None, "edge_growth_rate": None, "enough_data": False}
+
+        recent_node_rate, recent_edge_rate, recent_hours = self._rates(self.window[0], self.last)
+        return {
+            "node_growth_rate": node_rate,
+            "edge_growth_rate": edge_rate,
+            "node_power_law_exponent": self.nodes_fit.slope(),
+            "edge_power_law_exponent": self.edges_fit.slope(),
+            "enough_data": True,
+            "hours_tracked": hours,
+            "snapshots_count": self.count,
+            "recent": {
+                "window_hours": self.window_hours,
+                "node_growth_rate": recent_node_rate,
+                "edge_growth_rate": recent_edge_rate,
+                "node_power_law_exponent": self.window_nodes_fit.slope(),
+                "edge_power_law_exponent": self.window_edges_fit.slope(),
+                "hours_tracked": recent_hours,
+                "snapshots_count": len(self.window)
+            }
+        }
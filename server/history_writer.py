@@ -0,0 +1,83 @@
+"""Background writer for graph history files.
+
+Snapshot, metrics and feedback writes are handed to a dedicated thread
+through a bounded queue, so request handlers never wait on file I/O. Callers
+pass already-encoded bytes (or a frozen copy of what to encode), so the data
+cannot change between submission and the write. flush() blocks until every
+submitted write has reached the file system.
+"""
+import os
+import logging
+import queue
+import threading
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Writes queued before submitters wait for the writer to catch up
+HISTORY_WRITER_QUEUE_SIZE = int(os.environ.get("HISTORY_WRITER_QUEUE_SIZE", "1000"))
+
+_STOP = object()
+
+
+class HistoryWriter:
+    """Single writer thread applying file writes in submission order"""
+
+    def __init__(self, max_queue_size: int = HISTORY_WRITER_QUEUE_SIZE):
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.written = 0
+        self.failed = 0
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="history-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            job = self._queue.get()
+            try:
+                if job is _STOP:
+                    return
+                job()
+                self.written += 1
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Error writing graph history: {str(e)}", exc_info=True)
+            finally:
+                self._queue.task_done()
+
+    def submit(self, job: Callable[[], Any]) -> None:
+        """Queue a write; blocks only while the queue is full"""
+        self._ensure_started()
+        self._queue.put(job)
+
+    def append(self, path: str, data: bytes) -> None:
+        """Queue an append of data to path"""
+        def write():
+            with open(path, "ab") as f:
+                f.write(data)
+        self.submit(write)
+
+    def flush(self) -> None:
+        """Block until every submitted write has completed"""
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self) -> None:
+        """Flush and stop the writer thread"""
+        if self._thread is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._thread = None
+
+    @property
+    def pending(self) -> int:
+        return self._queue.unfinished_tasks
+
+    def stats(self) -> Dict[str, Any]:
+        return {"pending": self.pending, "written": self.written, "failed": self.failed}
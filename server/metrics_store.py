@@ -0,0 +1,177 @@
+"""Columnar time series store for graph metrics history.
+
+Each metrics sample is reduced to a fixed set of scalar columns (node and
+edge counts, degree and betweenness summaries, power-law fit) appended as
+float64 values to one file per column. Range queries load only the timestamp
+column, binary-search it and slice the requested columns.
+
+Samples older than the raw retention are rolled up into per-bucket means in
+a downsampled tier. Top-k node summaries are kept separately, at most one per
+summary interval.
+"""
+import os
+import json
+import heapq
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .history_writer import HistoryWriter
+
+logger = logging.getLogger(__name__)
+
+# Metrics history settings
+RAW_RETENTION_HOURS = float(os.environ.get("METRICS_RAW_RETENTION_HOURS", "168"))
+DOWNSAMPLE_SECONDS = float(os.environ.get("METRICS_DOWNSAMPLE_SECONDS", "3600"))
+SUMMARY_INTERVAL = float(os.environ.get("METRICS_SUMMARY_INTERVAL", "300"))
+TOP_K = int(os.environ.get("METRICS_TOP_K", "10"))
+
+SCALAR_COLUMNS = (
+    "nodes", "edges", "meanDegree", "maxDegree",
+    "meanBetweenness", "maxBetweenness", "powerLawExponent", "fitQuality"
+)
+TIMESTAMP = "timestamp"
+RAW = "raw"
+DOWNSAMPLED = "downsampled"
+
+
+def summarize_metrics(metrics: Dict[str, Any]) -> Dict[str, float]:
+    """Scalar columns of a calculate_metrics result"""
+    degree = np.fromiter(metrics.get("degree", {}).values(), dtype=np.float64)
+    betweenness = np.fromiter(metrics.get("betweenness", {}).values(), dtype=np.float64)
+    scale_freeness = metrics.get("scaleFreeness", {})
+    return {
+        "nodes": float(metrics.get("totalNodes", len(degree))),
+        "edges": float(degree.sum() / 2),
+        "meanDegree": float(degree.mean()) if degree.size else 0.0,
+        "maxDegree": float(degree.max()) if degree.size else 0.0,
+        "meanBetweenness": float(betweenness.mean()) if betweenness.size else 0.0,
+        "maxBetweenness": float(betweenness.max()) if betweenness.size else 0.0,
+        "powerLawExponent": float(scale_freeness.get("powerLawExponent", 0.0)),
+        "fitQuality": float(scale_freeness.get("fitQuality", 0.0))
+    }
+
+
+def top_k(values: Dict[str, float], k: int = TOP_K) -> List[Tuple[str, float]]:
+    """Highest k entries of a per-node metric map"""
+    return [(node_id, float(value)) for node_id, value in heapq.nlargest(k, values.items(), key=lambda i: i[1])]
+
+
+class MetricsStore:
+    """Raw and downsampled column files plus top-k summaries in a directory"""
+
+    def __init__(self, path: str, writer: HistoryWriter,
+                 raw_retention_hours: float = RAW_RETENTION_HOURS,
+                 downsample_seconds: float = DOWNSAMPLE_SECONDS,
+                 summary_interval: float = SUMMARY_INTERVAL):
+        self.path = path
+        self.writer = writer
+        self.raw_retention_hours = raw_retention_hours
+        self.downsample_seconds = downsample_seconds
+        self.summary_interval = summary_interval
+        self.last_summary: Optional[float] = None
+        for tier in (RAW, DOWNSAMPLED):
+            os.makedirs(os.path.join(path, tier), exist_ok=True)
+
+    def column_path(self, tier: str, name: str) -> str:
+        return os.path.join(self.path, tier, f"{name}.f64")
+
+    @property
+    def summaries_path(self) -> str:
+        return os.path.join(self.path, "summaries.jsonl")
+
+    def append(self, timestamp: float, metrics: Dict[str, Any]) -> None:
+        """Queue one sample; top-k summaries are kept once per summary interval"""
+        row = summarize_metrics(metrics)
+        self.writer.append(self.column_path(RAW, TIMESTAMP), np.float64(timestamp).tobytes())
+        for name in SCALAR_COLUMNS:
+            self.writer.append(self.column_path(RAW, name), np.float64(row[name]).tobytes())
+
+        if self.last_summary is None or timestamp - self.last_summary >= self.summary_interval:
+            self.last_summary = timestamp
+            summary = {
+                "timestamp": timestamp,
+                "degree": top_k(metrics.get("degree", {})),
+                "betweenness": top_k(metrics.get("betweenness", {})),
+                "eigenvector": top_k(metrics.get("eigenvector", {}))
+            }
+            self.writer.append(self.summaries_path, (json.dumps(summary) + "\n").encode("utf-8"))
+
+    def _load_tier(self, tier: str, names: Iterable[str]) -> Dict[str, np.ndarray]:
+        """Columns of a tier, trimmed to the rows every column has"""
+        columns = {}
+        for name in (TIMESTAMP, *names):
+            path = self.column_path(tier, name)
+            columns[name] = np.fromfile(path, dtype="<f8") if os.path.exists(path) else np.empty(0)
+        rows = min(len(column) for column in columns.values())
+        return {name: column[:rows] for name, column in columns.items()}
+
+    def query(self, names: Optional[List[str]] = None, start: Optional[float] = None,
+              end: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Samples with start <= timestamp <= end, oldest first.
+
+        Downsampled rows (older than the raw retention) come before raw rows.
+
+        Returns:
+            Dictionary with timestamps and one value list per requested column
+        """
+        names = list(names or SCALAR_COLUMNS)
+        unknown = [name for name in names if name not in SCALAR_COLUMNS]
+        if unknown:
+            raise KeyError(f"Unknown metrics: {', '.join(unknown)}")
+        self.writer.flush()
+
+        timestamps, series = [], {name: [] for name in names}
+        for tier in (DOWNSAMPLED, RAW):
+            columns = self._load_tier(tier, names)
+            times = columns[TIMESTAMP]
+            low = 0 if start is None else int(np.searchsorted(times, start, side="left"))
+            high = len(times) if end is None else int(np.searchsorted(times, end, side="right"))
+            timestamps.extend(times[low:high].tolist())
+            for name in names:
+                series[name].extend(columns[name][low:high].tolist())
+        return {"timestamps": timestamps, "series": series}
+
+    def summaries(self, start: Optional[float] = None, end: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Top-k summaries with start <= timestamp <= end"""
+        self.writer.flush()
+        if not os.path.exists(self.summaries_path):
+            return []
+        result = []
+        with open(self.summaries_path) as f:
+            for line in f:
+                summary = json.loads(line)
+                if (start is None or summary["timestamp"] >= start) and (end is None or summary["timestamp"] <= end):
+                    result.append(summary)
+        return result
+
+    def downsample(self, now: float) -> None:
+        """Queue a roll-up of raw samples older than the raw retention into bucket means"""
+        bucket = self.downsample_seconds
+        cutoff = np.floor((now - self.raw_retention_hours * 3600) / bucket) * bucket
+        self.writer.submit(lambda: self._downsample(cutoff))
+
+    def _downsample(self, cutoff: float) -> None:
+        raw = self._load_tier(RAW, SCALAR_COLUMNS)
+        old = int(np.searchsorted(raw[TIMESTAMP], cutoff, side="left"))
+        if old == 0:
+            return
+
+        # Mean of every complete bucket before the cutoff, stamped with the bucket start
+        buckets = np.floor(raw[TIMESTAMP][:old] / self.downsample_seconds)
+        starts, inverse, counts = np.unique(buckets, return_inverse=True, return_counts=True)
+        rolled = {TIMESTAMP: starts * self.downsample_seconds}
+        for name in SCALAR_COLUMNS:
+            rolled[name] = np.bincount(inverse, weights=raw[name][:old]) / counts
+
+        for name, values in rolled.items():
+            with open(self.column_path(DOWNSAMPLED, name), "ab") as f:
+                f.write(values.astype("<f8").tobytes())
+        for name, values in raw.items():
+            path = self.column_path(RAW, name)
+            tmp_path = f"{path}.tmp"
+            values[old:].astype("<f8").tofile(tmp_path)
+            os.replace(tmp_path, path)
+        logger.info(f"Downsampled {old} metrics samples into {len(starts)} buckets")
@@ -30,12 +30,19 @@ class ClusterMetadata(BaseModel):
     centroidNode: Optional[str] = None
     semanticTheme: str
     coherenceScore: float
+    size: Optional[int] = None
 
 class ClusterResult(BaseModel):
     clusterId: int
     nodes: List[str]
     metadata: ClusterMetadata
 
+class ClusteringSummary(BaseModel):
+    method: str
+    resolution: float
+    modularity: float
+    clusterCount: int
+
 class ScaleFreeness(BaseModel):
     powerLawExponent: float
     fitQuality: float
@@ -50,6 +57,7 @@ class GraphEvolutionMetrics(BaseModel):
     enough_data: bool = False
     hours_tracked: Optional[float] = None
     snapshots_count: Optional[int] = None
+    recent: Optional[Dict[str, Any]] = None
 
 class HubFormationAnalysis(BaseModel):
     node_id: str
@@ -77,12 +85,16 @@ class GraphMetrics(BaseModel):
     scaleFreeness: ScaleFreeness
     evolution: Optional[GraphEvolutionMetrics] = None
     hubFormation: Optional[HubFormationResult] = None
+    approximate: bool = False
+    residentNodes: Optional[int] = None
+    totalNodes: Optional[int] = None
 
 class GraphData(BaseModel):
     nodes: List[Node]
     edges: List[Edge]
     metrics: Optional[GraphMetrics] = None
     clusters: Optional[List[ClusterResult]] = None
+    clustering: Optional[ClusteringSummary] = None
 
 class GraphExpansionResult(BaseModel):
     nodes: List[Node]
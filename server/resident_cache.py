@@ -0,0 +1,219 @@
+"""Out-of-core residency for the knowledge graph.
+
+In "lru" residency mode the graph manager keeps only hot nodes in memory.
+ResidentGraphCache is a bounded LRU of nodes and their full adjacency, mirrored
+into the manager's networkx graph as the subgraph induced by the resident
+nodes; misses are filled from storage in batches. LabelIndex is a compact,
+always-resident id/label/type index so merge lookups still see every node.
+"""
+import os
+import logging
+import random
+from array import array
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import networkx as nx
+
+from .storage import StorageBackend
+
+logger = logging.getLogger(__name__)
+
+# Residency settings
+GRAPH_RESIDENCY = os.environ.get("GRAPH_RESIDENCY", "full").lower()
+GRAPH_CACHE_SIZE = int(os.environ.get("GRAPH_CACHE_SIZE", "10000"))
+GRAPH_CACHE_FETCH_BATCH = int(os.environ.get("GRAPH_CACHE_FETCH_BATCH", "500"))
+GRAPH_METRICS_SAMPLE_SIZE = int(os.environ.get("GRAPH_METRICS_SAMPLE_SIZE", "500"))
+
+RESIDENCY_MODES = ("full", "lru")
+
+
+class LabelIndex:
+    """
+    Compact id -> (label, type) index over every node in the graph.
+
+    Ids and type codes live in typed arrays and types are interned, so the
+    per-node cost is roughly the label string plus one dict entry.
+    """
+
+    def __init__(self):
+        self._ids = array("q")
+        self._labels: List[str] = []
+        self._type_codes = array("H")
+        self._types: List[str] = []
+        self._type_lookup: Dict[str, int] = {}
+        self._positions: Dict[int, int] = {}
+        self._exact: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, node_id: int) -> bool:
+        return node_id in self._positions
+
+    def _type_code(self, node_type: str) -> int:
+        code = self._type_lookup.get(node_type)
+        if code is None:
+            code = self._type_lookup[node_type] = len(self._types)
+            self._types.append(node_type)
+        return code
+
+    def add(self, node_id: int, label: Optional[str], node_type: Optional[str]) -> None:
+        label = label or ""
+        code = self._type_code(node_type or "concept")
+        position = self._positions.get(node_id)
+        if position is None:
+            self._positions[node_id] = len(self._ids)
+            self._ids.append(node_id)
+            self._labels.append(label)
+            self._type_codes.append(code)
+        else:
+            self._labels[position] = label
+            self._type_codes[position] = code
+        # The first node with a label wins exact matches, as in a scan
+        self._exact.setdefault(label.lower(), node_id)
+
+    def get(self, node_id: int) -> Optional[Tuple[str, str]]:
+        position = self._positions.get(node_id)
+        if position is None:
+            return None
+        return self._labels[position], self._types[self._type_codes[position]]
+
+    def find_exact(self, label: str) -> Optional[int]:
+        """Id of the first node whose label equals label, ignoring case"""
+        return self._exact.get(label.lower())
+
+    def entries(self) -> Iterator[Tuple[int, str, str]]:
+        """(id, label, type) for every node, in insertion order"""
+        types = self._types
+        for node_id, label, code in zip(self._ids, self._labels, self._type_codes):
+            yield node_id, label, types[code]
+
+    def sample(self, k: int, rng: Optional[random.Random] = None) -> List[int]:
+        rng = rng or random
+        return rng.sample(list(self._ids), min(k, len(self._ids)))
+
+    def clear(self) -> None:
+        self.__init__()
+
+
+class ResidentGraphCache:
+    """
+    Bounded LRU of resident nodes with their adjacency.
+
+    Each entry maps a resident node id to {neighbor id: edge data} for all of
+    its edges, so degrees are exact even when neighbors are not resident.
+    The graph holds the resident nodes and the edges between them; evicting a
+    node removes it from the graph. Before misses are fetched, before_fetch is
+    awaited so pending writes are visible to the read.
+    """
+
+    def __init__(self, graph: nx.Graph, storage: StorageBackend,
+                 capacity: int = GRAPH_CACHE_SIZE,
+                 fetch_batch_size: int = GRAPH_CACHE_FETCH_BATCH,
+                 before_fetch: Optional[Callable[[], Awaitable[Any]]] = None):
+        self.graph = graph
+        self.storage = storage
+        self.capacity = capacity
+        self.fetch_batch_size = fetch_batch_size
+        self.before_fetch = before_fetch
+        self._lru: "OrderedDict[int, Dict[int, dict]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.fetches = 0
+
+    def __len__(self) -> int:
+        return len(self._lru)
+
+    def __contains__(self, node_id: int) -> bool:
+        return node_id in self._lru
+
+    def degree(self, node_id: int) -> int:
+        """Degree of a resident node over all of its edges"""
+        return len(self._lru[node_id])
+
+    async def ensure(self, node_ids: Iterable[int]) -> None:
+        """Make nodes resident, fetching misses from storage in batches"""
+        wanted = list(dict.fromkeys(int(node_id) for node_id in node_ids))
+        missing = []
+        for node_id in wanted:
+            if node_id in self._lru:
+                self._lru.move_to_end(node_id)
+                self.hits += 1
+            else:
+                missing.append(node_id)
+        if missing:
+            self.misses += len(missing)
+            if self.before_fetch is not None:
+                await self.before_fetch()
+            for start in range(0, len(missing), self.fetch_batch_size):
+                chunk = missing[start:start + self.fetch_batch_size]
+                self._admit(await self.storage.get_adjacency(chunk))
+                self.fetches += 1
+        self._evict(protect=set(wanted))
+
+    def add_new_node(self, node_id: int) -> None:
+        """Register a node just created in the graph (it has no edges yet)"""
+        self._lru[node_id] = {}
+        self._evict(protect={node_id})
+
+    def link(self, source_id: int, target_id: int) -> None:
+        """Record an edge just added to the graph between two resident nodes"""
+        data = self.graph[str(source_id)][str(target_id)]
+        self._lru[source_id][target_id] = data
+        self._lru[target_id][source_id] = data
+
+    def _admit(self, data: Dict[str, List[dict]]) -> None:
+        admitted = []
+        for node in data["nodes"]:
+            node_id = node["id"]
+            if node_id in self._lru:
+                continue
+            self._lru[node_id] = {}
+            self.graph.add_node(str(node_id), **node)
+            admitted.append(node_id)
+        admitted_set = set(admitted)
+
+        # Lowest edge id per node pair, matching a fully loaded graph
+        for edge in sorted(data["edges"], key=lambda e: e["id"]):
+            source_id, target_id = edge["sourceId"], edge["targetId"]
+            for node_id, other_id in ((source_id, target_id), (target_id, source_id)):
+                if node_id not in admitted_set or other_id in self._lru[node_id]:
+                    continue
+                if other_id in self._lru:
+                    source_key, target_key = str(source_id), str(target_id)
+                    if not self.graph.has_edge(source_key, target_key):
+                        self.graph.add_edge(source_key, target_key, **edge)
+                    self.link(source_id, target_id)
+                else:
+                    self._lru[node_id][other_id] = edge
+
+    def _evict(self, protect: set) -> None:
+        if len(self._lru) <= self.capacity:
+            return
+        for node_id in list(self._lru):
+            if len(self._lru) <= self.capacity:
+                break
+            if node_id in protect:
+                continue
+            del self._lru[node_id]
+            self.graph.remove_node(str(node_id))
+            self.evictions += 1
+
+    def clear(self, graph: Optional[nx.Graph] = None) -> None:
+        self._lru.clear()
+        if graph is not None:
+            self.graph = graph
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "resident": len(self._lru),
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": self.hits / lookups if lookups else None,
+            "evictions": self.evictions,
+            "fetches": self.fetches
+        }
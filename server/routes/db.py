@@ -0,0 +1,33 @@
+from fastapi import APIRouter, HTTPException
+import logging
+from ..graph_manager import graph_manager
+
+router = APIRouter(prefix="/api/db", tags=["database"])
+logger = logging.getLogger(__name__)
+
+def _pooled_storage():
+    """The active storage backend, or 404 if it has no connection pool"""
+    storage = graph_manager.storage
+    if not storage.has_pool:
+        raise HTTPException(status_code=404, detail=f"The {storage.name} storage backend has no connection pool")
+    return storage
+
+@router.get("/pool")
+async def get_pool_telemetry():
+    """Get connection pool occupancy, acquire waits, query latency and timeouts"""
+    storage = _pooled_storage()
+    try:
+        return storage.stats()
+    except Exception as e:
+        logger.error(f"Error getting pool telemetry: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail={"message": "Failed to get pool telemetry", "error": str(e)}
+        )
+
+@router.post("/pool/reset")
+async def reset_pool_telemetry():
+    """Clear the collected pool telemetry, e.g. between benchmark runs"""
+    _pooled_storage().reset_stats()
+    logger.info("Pool telemetry reset")
+    return {"status": "success"}
@@ -1,9 +1,13 @@
-from fastapi import APIRouter, HTTPException, Body
+from fastapi import APIRouter, HTTPException, Body, Query, Request
+import asyncio
 import logging
+from datetime import datetime
 from typing import Dict, List, Optional, Any
 from ..models.schemas import GraphData, GraphMetrics, ExpandGraphRequest, ContentAnalysisRequest
-from ..database import get_full_graph
 from ..graph_manager import graph_manager
+from ..write_behind import WriteBehindError
+from ..attribute_index import metadata_filter_values
+from ..traversal import DEFAULT_MAX_NODES, DEFAULT_MAX_PATH_DEPTH, MAX_TRAVERSAL_DEPTH
 from ..utils.graph_utils import create_networkx_graph, calculate_metrics
 
 router = APIRouter(prefix="/api/graph", tags=["graph"])
@@ -55,13 +59,18 @@ async def analyze_content(request: ContentAnalysisRequest):
         )
 
 @router.post("/cluster", response_model=GraphData)
-async def reapply_clustering():
-    """Reapply clustering to the graph"""
+async def reapply_clustering(
+    resolution: Optional[float] = Query(None, gt=0),
+    method: Optional[str] = None
+):
+    """Reapply clustering to the graph, optionally with another engine or resolution"""
     try:
         logger.info("Received request to reapply clustering")
-        data = await graph_manager.recalculate_clusters()
+        data = await graph_manager.recalculate_clusters(method, resolution)
         logger.info("Clustering recalculation completed successfully")
         return data
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error recalculating clusters: {str(e)}", exc_info=True)
         raise HTTPException(
@@ -84,6 +93,220 @@ async def reconnect_nodes():
             detail={"message": "Failed to reconnect nodes", "error": str(e)}
         )
         
+@router.post("/flush")
+async def flush_pending_writes(retry_failed: bool = Query(False, alias="retryFailed")):
+    """Wait until all queued graph writes have been persisted, optionally retrying failed ones"""
+    try:
+        logger.info("Received request to flush pending graph writes")
+        await graph_manager.flush(retry_failed)
+        stats = graph_manager.write_behind.stats() if graph_manager.write_behind else None
+        return {"status": "success", "writeBehind": stats}
+    except WriteBehindError as e:
+        logger.error(f"Graph writes not persisted: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail={"message": "Failed to persist graph writes", "error": str(e),
+                    "writeBehind": graph_manager.write_behind.stats()}
+        )
+    except Exception as e:
+        logger.error(f"Error flushing pending writes: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail={"message": "Failed to flush pending writes", "error": str(e)}
+        )
+
+def _metadata_filters(request: Request) -> Dict[str, List[Any]]:
+    """Collect meta.<key>=<value> query parameters"""
+    return {
+        key[len("meta."):]: metadata_filter_values(value)
+        for key, value in request.query_params.items()
+        if key.startswith("meta.") and len(key) > len("meta.")
+    }
+
+@router.get("/nodes")
+async def find_nodes(
+    request: Request,
+    type: Optional[str] = None,
+    after: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000)
+):
+    """Page through nodes filtered by type and meta.<key>=<value> parameters"""
+    try:
+        metadata = _metadata_filters(request)
+        logger.info(f"Received node query: type={type}, metadata={metadata}, after={after}")
+        return await graph_manager.find_nodes(metadata, type, after, limit)
+    except Exception as e:
+        logger.error(f"Error querying nodes: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail={"message": "Failed to query nodes", "error": str(e)}
+        )
+
+@router.get("/edges")
+async def find_edges(
+    request: Request,
+    label: Optional[str] = None,
+    after: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000)
+):
+    """Page through edges filtered by label and meta.<key>=<value> parameters"""
+    try:
+        metadata = _metadata_filters(request)
+        logger.info(f"Received edge query: label={label}, metadata={metadata}, after={after}")
+        return await graph_manager.find_edges(metadata, label, after, limit)
+    except Exception as e:
+        logger.error(f"Error querying edges: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail={"message": "Failed to query edges", "error": str(e)}
+        )
+
+@router.get("/nodes/{node_id}/neighborhood")
+async def get_neighborhood(
+    node_id: int,
+    depth: int = Query(1, ge=0, le=MAX_TRAVERSAL_DEPTH),
+    fanout: Optional[int] = Query(None, ge=1),
+    max_nodes: int = Query(DEFAULT_MAX_NODES, ge=1, le=10000, alias="maxNodes")
+):
+    """Get the nodes within depth hops of a node and the edges between them"""
+    try:
+        logger.info(f"Received neighborhood query for node {node_id}: depth={depth}, fanout={fanout}")
+        data = await graph_manager.get_neighborhood(node_id, depth, fanout, max_nodes)
+    except Exception as e:
+        logger.error(f"Error querying neighborhood: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail={"message": "Failed to query neighborhood", "error": str(e)}
+        )
+    if data is None:
+        raise HTTPException(status_code=404, detail=f"Node {node_id} not found")
+    return data
+
+@router.get("/path")
+async def find_path(
+    source: int,
+    target: int,
+    max_depth: int = Query(DEFAULT_MAX_PATH_DEPTH, ge=1, le=MAX_TRAVERSAL_DEPTH, alias="maxDepth"),
+    fanout: Optional[int] = Query(None, ge=1)
+):
+    """Find a shortest path between two nodes"""
+    try:
+        logger.info(f"Received path query {source} -> {target}: maxDepth={max_depth}, fanout={fanout}")
+        data = await graph_manager.find_path(source, target, max_depth, fanout)
+    except Exception as e:
+        logger.error(f"Error querying path: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail={"message": "Failed to query path", "error": str(e)}
+        )
+    if data is None:
+        raise HTTPException(status_code=404, detail="Source or target node not found")
+    return data
+
+@router.get("/residency")
+async def get_residency_stats():
+    """Get the residency mode, resident graph size and node cache statistics"""
+    return graph_manager.residency_stats()
+
+def _parse_timestamp(value: str) -> float:
+    """Epoch seconds from an ISO 8601 timestamp or a number of seconds"""
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+@router.get("/at")
+async def get_graph_at(
+    timestamp: Optional[str] = None,
+    snapshot: Optional[str] = None
+):
+    """Get the graph as of a snapshot or point in time (ISO 8601 or epoch seconds)"""
+    if (timestamp is None) == (snapshot is None):
+        raise HTTPException(status_code=400, detail="Specify exactly one of timestamp or snapshot")
+    try:
+        at = _parse_timestamp(timestamp) if timestamp is not None else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid timestamp: {timestamp}")
+    try:
+        logger.info(f"Received historical graph query: timestamp={timestamp}, snapshot={snapshot}")
+        data = await graph_manager.get_graph_at(at, snapshot)
+    except Exception as e:
+        logger.error(f"Error reconstructing historical graph: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail={"message": "Failed to reconstruct historical graph", "error": str(e)}
+        )
+    if data is None:
+        raise HTTPException(status_code=404, detail="No snapshot found")
+    return data
+
+@router.get("/window")
+async def get_creation_window(
+    start: Optional[str] = Query(None, alias="from"),
+    end: Optional[str] = Query(None, alias="to"),
+    context: bool = False
+):
+    """Get the nodes and edges created in a time range (ISO 8601 or epoch seconds)"""
+    try:
+        start_at = _parse_timestamp(start) if start is not None else None
+        end_at = _parse_timestamp(end) if end is not None else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid time range: {str(e)}")
+    try:
+        logger.info(f"Received creation window query: {start} -> {end}")
+        return await graph_manager.get_window(start_at, end_at, context)
+    except Exception as e:
+        logger.error(f"Error getting creation window: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail={"message": "Failed to get creation window", "error": str(e)}
+        )
+
+@router.get("/diff")
+async def get_graph_diff(
+    start: str = Query(..., alias="from"),
+    end: str = Query(..., alias="to")
+):
+    """Get the nodes and edges added, removed and changed between two snapshots"""
+    try:
+        logger.info(f"Received graph diff query: {start} -> {end}")
+        data = await graph_manager.get_graph_diff(start, end)
+    except Exception as e:
+        logger.error(f"Error diffing snapshots: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail={"message": "Failed to diff snapshots", "error": str(e)}
+        )
+    if data is None:
+        raise HTTPException(status_code=404, detail="Snapshot not found")
+    return data
+
+@router.get("/metrics/history")
+async def get_metrics_history(
+    metrics: Optional[str] = None,
+    start: Optional[str] = Query(None, alias="from"),
+    end: Optional[str] = Query(None, alias="to")
+):
+    """Get scalar metrics history and top-k summaries in a time range"""
+    try:
+        names = [name for name in metrics.split(",") if name] if metrics else None
+        start_at = _parse_timestamp(start) if start is not None else None
+        end_at = _parse_timestamp(end) if end is not None else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid time range: {str(e)}")
+    try:
+        return await asyncio.to_thread(
+            graph_manager.evolution_tracker.get_metrics_history, names, start_at, end_at
+        )
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=e.args[0])
+    except Exception as e:
+        logger.error(f"Error getting metrics history: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail={"message": "Failed to get metrics history", "error": str(e)}
+        )
+
 @router.get("/evolution")
 async def get_evolution_metrics():
     """Get metrics about the graph's evolution over time"""
@@ -99,6 +322,72 @@ async def get_evolution_metrics():
             detail={"message": "Failed to get evolution metrics", "error": str(e)}
         )
         
+@router.get("/feedback")
+async def get_feedback(
+    type: Optional[str] = None,
+    start: Optional[str] = Query(None, alias="from"),
+    end: Optional[str] = Query(None, alias="to"),
+    limit: int = Query(50, ge=1, le=1000),
+    offset: int = Query(0, ge=0)
+):
+    """Page through recorded feedback by type and time range, newest first"""
+    try:
+        start_at = _parse_timestamp(start) if start is not None else None
+        end_at = _parse_timestamp(end) if end is not None else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid time range: {str(e)}")
+    try:
+        return await asyncio.to_thread(
+            graph_manager.evolution_tracker.get_feedback, type, start_at, end_at, limit, offset
+        )
+    except Exception as e:
+        logger.error(f"Error getting feedback: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail={"message": "Failed to get feedback", "error": str(e)}
+        )
+
+@router.get("/evolution/degree/{node_id}")
+async def get_degree_trajectory(
+    node_id: str,
+    start: Optional[str] = Query(None, alias="from"),
+    end: Optional[str] = Query(None, alias="to")
+):
+    """Get the degree of a node over time"""
+    try:
+        start_at = _parse_timestamp(start) if start is not None else None
+        end_at = _parse_timestamp(end) if end is not None else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid time range: {str(e)}")
+    try:
+        data = await asyncio.to_thread(
+            graph_manager.evolution_tracker.degree_trajectory, node_id, start_at, end_at
+        )
+    except Exception as e:
+        logger.error(f"Error getting degree trajectory: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail={"message": "Failed to get degree trajectory", "error": str(e)}
+        )
+    if data is None:
+        raise HTTPException(status_code=404, detail=f"Node {node_id} not found in the creation history")
+    return data
+
+@router.get("/evolution/hubs")
+async def get_hub_growth(
+    window: float = Query(24, gt=0, description="Window in hours"),
+    limit: int = Query(10, ge=1, le=1000)
+):
+    """Get the nodes whose degree grew fastest in the last window hours"""
+    try:
+        return {"windowHours": window, "nodes": await graph_manager.get_hub_growth(window, limit)}
+    except Exception as e:
+        logger.error(f"Error getting hub growth: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail={"message": "Failed to get hub growth", "error": str(e)}
+        )
+
 @router.post("/feedback")
 async def add_feedback(feedback: Dict[str, Any] = Body(...)):
     """Add user feedback for the graph evolution feedback loop"""
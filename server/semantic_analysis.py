@@ -2,7 +2,7 @@
 import os
 import logging
 import json
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Callable, Awaitable
 from fastapi import HTTPException, status
 from anthropic import AsyncAnthropic
 
@@ -34,8 +34,17 @@ def is_valid_base64(str_val: str) -> bool:
     except:
         return False
 
-async def analyze_content(content: Dict[str, Any], existing_nodes: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
-    """Analyze content and extract knowledge graph elements"""
+async def analyze_content(content: Dict[str, Any],
+                          existing_nodes: Optional[List[Dict[str, Any]]] = None,
+                          reserve_ids: Optional[Callable[[int], Awaitable[range]]] = None) -> Dict[str, Any]:
+    """
+    Analyze content and extract knowledge graph elements.
+
+    New nodes are numbered after the existing ones, which is how the model
+    refers to them in edges. When reserve_ids is given, a contiguous block of
+    final ids is claimed for the new nodes instead and edge endpoints are
+    rewritten to those ids, so the caller can insert the results as-is.
+    """
     try:
         if not content:
             raise HTTPException(
@@ -138,24 +147,6 @@ Content to analyze:
                     detail="Incomplete response from semantic analysis"
                 )
 
-            # Add IDs to new nodes
-            last_node_id = max([0] + [n.get("id", 0) for n in existing_nodes])
-            nodes_with_ids = []
-
-            for i, node in enumerate(parsed_response.get("nodes", [])):
-                node_with_id = dict(node)
-                node_with_id["id"] = last_node_id + i + 1
-                nodes_with_ids.append(node_with_id)
-
-            result = {
-                "nodes": nodes_with_ids,
-                "edges": parsed_response.get("edges", []),
-                "reasoning": parsed_response.get("reasoning", "")
-            }
-
-            logger.info(f"Analysis complete with {len(result['nodes'])} nodes and {len(result['edges'])} edges")
-            return result
-
         except Exception as e:
             logger.error(f"Anthropic API error: {str(e)}")
             raise HTTPException(
@@ -163,6 +154,41 @@ Content to analyze:
                 detail="Error calling Anthropic API"
             )
 
+        # Add IDs to new nodes
+        last_node_id = max([0] + [n.get("id", 0) for n in existing_nodes])
+        parsed_nodes = parsed_response.get("nodes", [])
+        edges = parsed_response.get("edges", [])
+
+        if reserve_ids is not None and parsed_nodes:
+            node_ids = await reserve_ids(len(parsed_nodes))
+            # Provisional ids used by the model -> reserved ids
+            id_map = {last_node_id + i + 1: node_id for i, node_id in enumerate(node_ids)}
+            edges = [
+                dict(
+                    edge,
+                    sourceId=id_map.get(edge.get("sourceId"), edge.get("sourceId")),
+                    targetId=id_map.get(edge.get("targetId"), edge.get("targetId"))
+                )
+                for edge in edges
+            ]
+        else:
+            node_ids = range(last_node_id + 1, last_node_id + len(parsed_nodes) + 1)
+
+        nodes_with_ids = []
+        for node, node_id in zip(parsed_nodes, node_ids):
+            node_with_id = dict(node)
+            node_with_id["id"] = node_id
+            nodes_with_ids.append(node_with_id)
+
+        result = {
+            "nodes": nodes_with_ids,
+            "edges": edges,
+            "reasoning": parsed_response.get("reasoning", "")
+        }
+
+        logger.info(f"Analysis complete with {len(result['nodes'])} nodes and {len(result['edges'])} edges")
+        return result
+
     except HTTPException:
         raise
 
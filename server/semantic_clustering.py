@@ -1,14 +1,61 @@
+import os
 import logging
+import random
+from collections import Counter, defaultdict
 from typing import Dict, List, Any, Optional
 import networkx as nx
-from sklearn.cluster import AgglomerativeClustering
-import numpy as np
+
+from .community_detection import CLUSTERING_METHOD, CLUSTERING_RESOLUTION, ENGINES, detect_communities
 
 logger = logging.getLogger(__name__)
 
+# Clusters with more distinct labels estimate the substring term from a sample
+COHERENCE_EXACT_LABELS = int(os.environ.get("COHERENCE_EXACT_LABELS", "1000"))
+COHERENCE_SAMPLE_PAIRS = int(os.environ.get("COHERENCE_SAMPLE_PAIRS", "20000"))
+
+# Similarity weights in tenths, as in calculate_node_similarity
+TYPE_WEIGHT, EXACT_WEIGHT, PARTIAL_WEIGHT, PREFIX_WEIGHT, EDGE_WEIGHT, MAX_SIMILARITY = 9, 4, 3, 2, 4, 10
+
+
+def _pairs(count: int) -> int:
+    return count * (count - 1) // 2
+
+
+def _first_token(label: str) -> str:
+    return label.split(' ')[0]
+
+
+def _label_weight(label1: str, label2: str) -> int:
+    if label1 == label2:
+        return EXACT_WEIGHT
+    if label1 in label2 or label2 in label1:
+        return PARTIAL_WEIGHT
+    if _first_token(label1) == _first_token(label2):
+        return PREFIX_WEIGHT
+    return 0
+
+
+def _substring_correction(same_type: int, other_type: int, same_prefix: bool) -> int:
+    """
+    Tenths to add for node pairs whose different labels contain one another.
+
+    The prefix term already counted them if their first tokens match, and a
+    same-type pair caps at 1.0 either way.
+    """
+    if same_prefix:
+        return other_type * (PARTIAL_WEIGHT - PREFIX_WEIGHT)
+    return same_type * (MAX_SIMILARITY - TYPE_WEIGHT) + other_type * PARTIAL_WEIGHT
+
 class SemanticClusteringService:
-    def __init__(self, graph: nx.Graph):
+    def __init__(self, graph: nx.Graph, method: Optional[str] = None,
+                 resolution: Optional[float] = None):
         self.graph = graph
+        self.method = (method or CLUSTERING_METHOD).lower()
+        if self.method not in ENGINES:
+            raise ValueError(f"Unknown clustering method: {self.method}")
+        self.resolution = CLUSTERING_RESOLUTION if resolution is None else resolution
+        # Method, resolution, modularity and cluster count of the last run
+        self.summary: Dict[str, Any] = {}
 
     def calculate_node_similarity(self, node1: str, node2: str) -> float:
         """Calculate similarity between two nodes"""
@@ -75,61 +122,107 @@ class SemanticClusteringService:
         return f"{dominant_type} cluster"
 
     def calculate_cluster_coherence(self, nodes: List[str]) -> float:
-        """Calculate the coherence of a cluster"""
+        """
+        Calculate the coherence of a cluster: the mean pairwise node similarity.
+
+        Computed from counts instead of comparing every pair: type matches
+        from the pairs within each type, exact and prefix label matches from
+        groups of equal labels and first tokens, and edges one by one. Only
+        the substring term compares labels, once per pair of distinct labels;
+        with more than COHERENCE_EXACT_LABELS of them it is estimated from a
+        sample of node pairs.
+        """
         if len(nodes) < 2:
             return 1.0
 
-        total_similarity = 0.0
-        pair_count = 0
-
-        for i in range(len(nodes)):
-            for j in range(i + 1, len(nodes)):
-                similarity = self.calculate_node_similarity(nodes[i], nodes[j])
-                total_similarity += similarity
-                pair_count += 1
-
-        return total_similarity / pair_count if pair_count > 0 else 0.0
+        labels, types = [], []
+        for node_id in nodes:
+            attrs = self.graph.nodes[node_id]
+            labels.append((attrs.get("label") or "").lower())
+            types.append(attrs.get("type"))
+
+        # Every pair gets the type weight plus its label weight, capped at 1.0
+        same_type = sum(_pairs(c) for c in Counter(types).values())
+        exact = sum(_pairs(c) for c in Counter(labels).values())
+        exact_same_type = sum(_pairs(c) for c in Counter(zip(labels, types)).values())
+        prefix = sum(_pairs(c) for c in Counter(map(_first_token, labels)).values()) - exact
+        prefix_same_type = sum(
+            _pairs(c) for c in Counter(zip(map(_first_token, labels), types)).values()
+        ) - exact_same_type
+        capped = MAX_SIMILARITY - TYPE_WEIGHT
+        total = (TYPE_WEIGHT * same_type
+                 + capped * exact_same_type + EXACT_WEIGHT * (exact - exact_same_type)
+                 + capped * prefix_same_type + PREFIX_WEIGHT * (prefix - prefix_same_type)
+                 + self._substring_term(labels, types))
+
+        # Edges add their weight on top of what the pair already scored
+        position = {node_id: i for i, node_id in enumerate(nodes)}
+        for u, v in self.graph.edges(nodes):
+            if u == v or u not in position or v not in position:
+                continue
+            i, j = position[u], position[v]
+            base = (TYPE_WEIGHT if types[i] == types[j] else 0) + _label_weight(labels[i], labels[j])
+            total += min(MAX_SIMILARITY, base + EDGE_WEIGHT) - min(MAX_SIMILARITY, base)
+
+        return total / MAX_SIMILARITY / _pairs(len(nodes))
+
+    def _substring_term(self, labels: List[str], types: List[Any]) -> float:
+        """Tenths contributed by node pairs whose different labels contain one another"""
+        type_counts: Dict[str, Counter] = defaultdict(Counter)
+        for label, node_type in zip(labels, types):
+            type_counts[label][node_type] += 1
+
+        if len(type_counts) <= COHERENCE_EXACT_LABELS:
+            distinct = sorted(type_counts, key=len)
+            total = 0
+            for i, shorter in enumerate(distinct):
+                for longer in distinct[i + 1:]:
+                    if shorter not in longer:
+                        continue
+                    a, b = type_counts[shorter], type_counts[longer]
+                    pairs = sum(a.values()) * sum(b.values())
+                    same = sum(count * b[node_type] for node_type, count in a.items())
+                    total += _substring_correction(
+                        same, pairs - same, _first_token(shorter) == _first_token(longer)
+                    )
+            return total
+
+        # Estimate from uniformly sampled node pairs
+        rng = random.Random(0)
+        n = len(labels)
+        sampled = 0
+        for _ in range(COHERENCE_SAMPLE_PAIRS):
+            i, j = rng.sample(range(n), 2)
+            label1, label2 = labels[i], labels[j]
+            if label1 != label2 and (label1 in label2 or label2 in label1):
+                same = types[i] == types[j]
+                sampled += _substring_correction(
+                    int(same), int(not same), _first_token(label1) == _first_token(label2)
+                )
+        return sampled * _pairs(n) / COHERENCE_SAMPLE_PAIRS
 
     def cluster_nodes(self) -> List[Dict[str, Any]]:
-        """Cluster nodes in the graph"""
-        logger.info('Starting clustering process...')
+        """Cluster nodes in the graph with the configured community detection engine"""
+        logger.info(f'Starting clustering process ({self.method}, resolution {self.resolution})...')
+        communities, modularity = detect_communities(self.graph, self.method, self.resolution)
+        logger.info(f'Found {len(communities)} communities, modularity {modularity:.4f}')
         clusters = []
-        visited = set()
-
-        # Get connected components
-        components = list(nx.connected_components(self.graph))
-        logger.info(f'Found {len(components)} connected components')
-
-        for i, component in enumerate(components):
-            # Skip already visited nodes
-            unvisited_nodes = [
-                node for node in component if node not in visited
-            ]
-            if not unvisited_nodes:
-                continue
-
-            # Mark nodes as visited
-            visited.update(unvisited_nodes)
 
-            centroid_node = self.find_cluster_centroid(unvisited_nodes)
-            semantic_theme = self.infer_cluster_theme(unvisited_nodes)
-            coherence_score = self.calculate_cluster_coherence(unvisited_nodes)
+        for i, nodes in enumerate(communities):
+            centroid_node = self.find_cluster_centroid(nodes)
+            semantic_theme = self.infer_cluster_theme(nodes)
+            coherence_score = self.calculate_cluster_coherence(nodes)
 
-            cluster = {
+            clusters.append({
                 "clusterId": i,
-                "nodes": unvisited_nodes,
+                "nodes": nodes,
                 "metadata": {
                     "centroidNode": centroid_node,
                     "semanticTheme": semantic_theme,
-                    "coherenceScore": coherence_score
+                    "coherenceScore": coherence_score,
+                    "size": len(nodes)
                 }
-            }
-
-            logger.info(
-                f'Created cluster: {i}, nodes: {len(unvisited_nodes)}, theme: {semantic_theme}'
-            )
-
-            clusters.append(cluster)
+            })
 
         # Sort clusters by size and coherence
         sorted_clusters = sorted(
@@ -137,6 +230,12 @@ class SemanticClusteringService:
             key=lambda c: len(c["nodes"]) * c["metadata"]["coherenceScore"],
             reverse=True
         )
+        self.summary = {
+            "method": self.method,
+            "resolution": self.resolution,
+            "modularity": modularity,
+            "clusterCount": len(sorted_clusters)
+        }
 
         logger.info(f'Final clustering results: {len(sorted_clusters)} clusters')
 
@@ -150,4 +249,4 @@ class SemanticClusteringService:
             for cluster in sorted_clusters
         ]
 
-        return formatted_clusters
\ No newline at end of file
+        return formatted_clusters
@@ -0,0 +1,222 @@
+"""Compact columnar binary format for graph checkpoints.
+
+Layout: the magic bytes, a little-endian uint32 directory length, a JSON
+directory, then one zlib-compressed blob per column. The directory records
+each column's offset, length and encoding, so a single column can be read
+without decoding the others.
+
+Columns:
+    strings        interned strings (node keys, labels, types, edge labels)
+    node_key       string index of each node key
+    node_id        "id" attribute, or MISSING
+    node_label     string index of "label", or MISSING
+    node_type      string index of "type", or MISSING
+    node_attrs     remaining node attributes (metadata, merge history, ...)
+    edge_source    position of each edge's first endpoint in the node columns
+    edge_target    position of each edge's second endpoint
+    edge_id        "id" attribute, or MISSING
+    edge_weight    float "weight" attribute, or NaN
+    edge_label     string index of "label", or MISSING
+    edge_attrs     remaining edge attributes
+
+Attributes only move into a typed column when they have that column's type,
+so reading a checkpoint restores the original attribute dicts exactly.
+"""
+import os
+import json
+import math
+import struct
+import zlib
+from typing import Any, Callable, Dict, List, Tuple, Union
+
+import networkx as nx
+import numpy as np
+
+MAGIC = b"KGC1"
+MISSING = -1
+COMPRESSION_LEVEL = 6
+
+Column = Union[np.ndarray, List[Any]]
+
+
+class _StringTable:
+    def __init__(self):
+        self.strings: List[str] = []
+        self._index: Dict[str, int] = {}
+
+    def intern(self, value: str) -> int:
+        index = self._index.get(value)
+        if index is None:
+            index = self._index[value] = len(self.strings)
+            self.strings.append(value)
+        return index
+
+
+def _is_int(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool) and value >= 0
+
+
+def _is_float(value: Any) -> bool:
+    return isinstance(value, float) and not math.isnan(value)
+
+
+def _split(attributes: Dict[str, Any], key: str, accept: Callable[[Any], bool]) -> Tuple[Any, bool]:
+    """Pop attributes[key] if it has the column's type"""
+    value = attributes.get(key)
+    if key in attributes and accept(value):
+        del attributes[key]
+        return value, True
+    return None, False
+
+
+def encode_columns(graph: nx.Graph) -> Dict[str, Any]:
+    """
+    Encode a graph into uncompressed column buffers.
+
+    The result no longer references the graph, so it can be compressed and
+    written (see write_encoded) while the graph keeps changing.
+    """
+    strings = _StringTable()
+    positions: Dict[Any, int] = {}
+    node_key, node_id, node_label, node_type, node_attrs = [], [], [], [], []
+    for position, (key, data) in enumerate(graph.nodes(data=True)):
+        positions[key] = position
+        node_key.append(strings.intern(str(key)))
+        rest = dict(data)
+        value, ok = _split(rest, "id", _is_int)
+        node_id.append(value if ok else MISSING)
+        value, ok = _split(rest, "label", lambda v: isinstance(v, str))
+        node_label.append(strings.intern(value) if ok else MISSING)
+        value, ok = _split(rest, "type", lambda v: isinstance(v, str))
+        node_type.append(strings.intern(value) if ok else MISSING)
+        node_attrs.append(rest)
+
+    edge_source, edge_target, edge_id, edge_weight, edge_label, edge_attrs = [], [], [], [], [], []
+    for u, v, data in graph.edges(data=True):
+        edge_source.append(positions[u])
+        edge_target.append(positions[v])
+        rest = dict(data)
+        value, ok = _split(rest, "id", _is_int)
+        edge_id.append(value if ok else MISSING)
+        value, ok = _split(rest, "weight", _is_float)
+        edge_weight.append(value if ok else math.nan)
+        value, ok = _split(rest, "label", lambda v: isinstance(v, str))
+        edge_label.append(strings.intern(value) if ok else MISSING)
+        edge_attrs.append(rest)
+
+    columns: Dict[str, Column] = {
+        "strings": strings.strings,
+        "node_key": np.array(node_key, dtype=np.int32),
+        "node_id": np.array(node_id, dtype=np.int64),
+        "node_label": np.array(node_label, dtype=np.int32),
+        "node_type": np.array(node_type, dtype=np.int32),
+        "node_attrs": node_attrs,
+        "edge_source": np.array(edge_source, dtype=np.int32),
+        "edge_target": np.array(edge_target, dtype=np.int32),
+        "edge_id": np.array(edge_id, dtype=np.int64),
+        "edge_weight": np.array(edge_weight, dtype=np.float64),
+        "edge_label": np.array(edge_label, dtype=np.int32),
+        "edge_attrs": edge_attrs,
+    }
+
+    encoded: Dict[str, Any] = {"nodes": len(node_key), "edges": len(edge_source), "columns": {}}
+    for name, column in columns.items():
+        if isinstance(column, np.ndarray):
+            encoded["columns"][name] = ({"encoding": "array", "dtype": column.dtype.str}, column.tobytes())
+        else:
+            raw = json.dumps(column, separators=(",", ":"), default=str).encode("utf-8")
+            encoded["columns"][name] = ({"encoding": "json"}, raw)
+    return encoded
+
+
+def write_encoded(path: str, encoded: Dict[str, Any]) -> None:
+    """Compress encoded columns and write them, atomically replacing path"""
+    directory: Dict[str, Any] = {"nodes": encoded["nodes"], "edges": encoded["edges"], "columns": {}}
+    blobs = []
+    offset = 0
+    for name, (entry, raw) in encoded["columns"].items():
+        blob = zlib.compress(raw, COMPRESSION_LEVEL)
+        entry = dict(entry)
+        entry.update(offset=offset, length=len(blob))
+        directory["columns"][name] = entry
+        blobs.append(blob)
+        offset += len(blob)
+
+    header = json.dumps(directory, separators=(",", ":")).encode("utf-8")
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(header)))
+        f.write(header)
+        for blob in blobs:
+            f.write(blob)
+    os.replace(tmp_path, path)
+
+
+def write_columnar(path: str, graph: nx.Graph) -> None:
+    """Write a graph in the columnar format, atomically replacing path"""
+    write_encoded(path, encode_columns(graph))
+
+
+def _read_directory(f) -> Tuple[Dict[str, Any], int]:
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError("Not a columnar graph checkpoint")
+    (header_length,) = struct.unpack("<I", f.read(4))
+    directory = json.loads(f.read(header_length))
+    return directory, len(MAGIC) + 4 + header_length
+
+
+def _decode(f, data_start: int, entry: Dict[str, Any]) -> Column:
+    f.seek(data_start + entry["offset"])
+    raw = zlib.decompress(f.read(entry["length"]))
+    if entry["encoding"] == "array":
+        return np.frombuffer(raw, dtype=np.dtype(entry["dtype"]))
+    return json.loads(raw)
+
+
+def read_directory(path: str) -> Dict[str, Any]:
+    """Node and edge counts and the column directory of a checkpoint"""
+    with open(path, "rb") as f:
+        return _read_directory(f)[0]
+
+
+def read_column(path: str, name: str) -> Column:
+    """Decode a single column, leaving the rest of the file unread"""
+    with open(path, "rb") as f:
+        directory, data_start = _read_directory(f)
+        if name not in directory["columns"]:
+            raise KeyError(f"Unknown checkpoint column: {name}")
+        return _decode(f, data_start, directory["columns"][name])
+
+
+def read_columnar(path: str) -> nx.Graph:
+    """Rebuild the graph stored in a checkpoint"""
+    with open(path, "rb") as f:
+        directory, data_start = _read_directory(f)
+        columns = {name: _decode(f, data_start, entry) for name, entry in directory["columns"].items()}
+
+    strings = columns["strings"]
+    keys = [strings[index] for index in columns["node_key"]]
+    graph = nx.Graph()
+    for position, key in enumerate(keys):
+        attributes = {}
+        if columns["node_id"][position] != MISSING:
+            attributes["id"] = int(columns["node_id"][position])
+        if columns["node_label"][position] != MISSING:
+            attributes["label"] = strings[columns["node_label"][position]]
+        if columns["node_type"][position] != MISSING:
+            attributes["type"] = strings[columns["node_type"][position]]
+        attributes.update(columns["node_attrs"][position])
+        graph.add_node(key, **attributes)
+
+    for position in range(directory["edges"]):
+        attributes = {}
+        if columns["edge_id"][position] != MISSING:
+            attributes["id"] = int(columns["edge_id"][position])
+        if not math.isnan(columns["edge_weight"][position]):
+            attributes["weight"] = float(columns["edge_weight"][position])
+        if columns["edge_label"][position] != MISSING:
+            attributes["label"] = strings[columns["edge_label"][position]]
+        attributes.update(columns["edge_attrs"][position])
+        graph.add_edge(keys[columns["edge_source"][position]], keys[columns["edge_target"][position]], **attributes)
+    return graph
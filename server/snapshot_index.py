@@ -0,0 +1,133 @@
+"""Snapshot index and retention policy for the graph history.
+
+snapshots.idx holds one fixed-width binary record per snapshot, in snapshot
+number order: (number, timestamp, checkpoint, offset, nodes, edges). Numbers
+and timestamps only ever increase, so a snapshot is found by number or by time
+with a binary search over the file instead of a scan.
+"""
+import os
+import struct
+from collections import namedtuple
+from typing import Callable, Iterable, List, Optional, Set
+
+from .history_writer import HistoryWriter
+
+# Retention: keep every snapshot this recent, then one per hour, then one per day
+KEEP_ALL_HOURS = float(os.environ.get("EVOLUTION_KEEP_ALL_HOURS", "24"))
+KEEP_HOURLY_DAYS = float(os.environ.get("EVOLUTION_KEEP_HOURLY_DAYS", "30"))
+
+_RECORD = struct.Struct("<qdqqqq")
+RECORD_SIZE = _RECORD.size
+
+IndexRecord = namedtuple("IndexRecord", ["number", "timestamp", "checkpoint", "offset", "nodes", "edges"])
+
+
+class SnapshotIndex:
+    """Append-only file of fixed-width snapshot records"""
+
+    def __init__(self, path: str, writer: HistoryWriter):
+        self.path = path
+        self.writer = writer
+        self._count = os.path.getsize(path) // RECORD_SIZE if os.path.exists(path) else 0
+        self._last: Optional[IndexRecord] = None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, record: IndexRecord) -> None:
+        self.writer.append(self.path, _RECORD.pack(*record))
+        self._count += 1
+        self._last = record
+
+    def _read_at(self, f, position: int) -> IndexRecord:
+        f.seek(position * RECORD_SIZE)
+        return IndexRecord(*_RECORD.unpack(f.read(RECORD_SIZE)))
+
+    def _search(self, key: Callable[[IndexRecord], float], value: float) -> Optional[IndexRecord]:
+        """Last record whose key is <= value"""
+        self.writer.flush()
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path, "rb") as f:
+            low, high = 0, os.path.getsize(self.path) // RECORD_SIZE
+            found = None
+            while low < high:
+                middle = (low + high) // 2
+                record = self._read_at(f, middle)
+                if key(record) <= value:
+                    found = record
+                    low = middle + 1
+                else:
+                    high = middle
+            return found
+
+    def get(self, number: int) -> Optional[IndexRecord]:
+        """Record of a snapshot number"""
+        record = self._search(lambda r: r.number, number)
+        return record if record is not None and record.number == number else None
+
+    def find_at(self, timestamp: float) -> Optional[IndexRecord]:
+        """Latest snapshot taken at or before timestamp (epoch seconds)"""
+        return self._search(lambda r: r.timestamp, timestamp)
+
+    def last(self) -> Optional[IndexRecord]:
+        if self._last is None and self._count:
+            self.writer.flush()
+            with open(self.path, "rb") as f:
+                self._last = self._read_at(f, os.path.getsize(self.path) // RECORD_SIZE - 1)
+        return self._last
+
+    def records(self, flush: bool = True) -> List[IndexRecord]:
+        """All records; without flush, only those already written to the file"""
+        if flush:
+            self.writer.flush()
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, "rb") as f:
+            data = f.read()
+        return [IndexRecord(*fields) for fields in _RECORD.iter_unpack(data[:len(data) - len(data) % RECORD_SIZE])]
+
+    def remove(self, numbers: Set[int]) -> None:
+        """Queue a rewrite of the index without the given snapshot numbers"""
+        self._count -= len(numbers)
+
+        def rewrite():
+            with open(self.path, "rb") as f:
+                data = f.read()
+            kept = b"".join(
+                data[i:i + RECORD_SIZE] for i in range(0, len(data) - RECORD_SIZE + 1, RECORD_SIZE)
+                if _RECORD.unpack_from(data, i)[0] not in numbers
+            )
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(kept)
+            os.replace(tmp_path, self.path)
+        self.writer.submit(rewrite)
+
+
+def retained(records: Iterable[IndexRecord], now: float,
+             keep_all_hours: float = KEEP_ALL_HOURS,
+             keep_hourly_days: float = KEEP_HOURLY_DAYS) -> Set[int]:
+    """
+    Snapshot numbers kept by the retention policy.
+
+    Every snapshot younger than keep_all_hours is kept; older ones keep the
+    latest snapshot of each hour up to keep_hourly_days, then of each day.
+    The newest snapshot is always kept.
+    """
+    keep: Set[int] = set()
+    buckets = {}
+    newest = None
+    for record in records:
+        newest = record.number
+        age = now - record.timestamp
+        if age <= keep_all_hours * 3600:
+            keep.add(record.number)
+        elif age <= keep_hourly_days * 86400:
+            buckets[("hour", int(record.timestamp // 3600))] = record.number
+        else:
+            buckets[("day", int(record.timestamp // 86400))] = record.number
+    keep.update(buckets.values())
+    if newest is not None:
+        keep.add(newest)
+    return keep
@@ -0,0 +1,144 @@
+"""Append-only event log of graph deltas with periodic full checkpoints.
+
+The history directory holds numbered checkpoint/segment pairs:
+checkpoint_<seq>.kgc is the full graph when the segment was opened, in the
+columnar format of snapshot_format, and events_<seq>.jsonl records every node
+and edge change after it, interleaved with snapshot markers. A snapshot is the pair (checkpoint seq, byte offset just
+past its marker), so the graph at that snapshot is the checkpoint with the
+segment replayed up to the offset.
+"""
+import os
+import json
+import logging
+from typing import Any, Dict, Iterator, List, Optional
+
+import networkx as nx
+
+from .history_writer import HistoryWriter
+from .snapshot_format import encode_columns, write_encoded, read_columnar
+
+logger = logging.getLogger(__name__)
+
+# Start a new checkpoint once a segment holds this many deltas
+CHECKPOINT_INTERVAL = int(os.environ.get("EVOLUTION_CHECKPOINT_INTERVAL", "10000"))
+
+CHECKPOINT_PREFIX = "checkpoint_"
+SEGMENT_PREFIX = "events_"
+
+# Event kinds
+NODE = "node"
+EDGE = "edge"
+SNAPSHOT = "snapshot"
+
+
+def apply_event(graph: nx.Graph, event: Dict[str, Any]) -> None:
+    """Apply one logged delta to a graph; snapshot markers are ignored"""
+    if event["op"] == NODE:
+        if graph.has_node(event["id"]):
+            graph.nodes[event["id"]].clear()
+        graph.add_node(event["id"], **event["attributes"])
+    elif event["op"] == EDGE:
+        if graph.has_edge(event["source"], event["target"]):
+            graph[event["source"]][event["target"]].clear()
+        graph.add_edge(event["source"], event["target"], **event["attributes"])
+
+
+class SnapshotLog:
+    """Checkpoints and delta segments in a history directory"""
+
+    def __init__(self, history_path: str, checkpoint_interval: int = CHECKPOINT_INTERVAL,
+                 writer: Optional[HistoryWriter] = None):
+        self.history_path = history_path
+        # Files are written by the writer thread; positions are tracked here
+        self.writer = writer or HistoryWriter()
+        self.checkpoint_interval = checkpoint_interval
+        self.seq: Optional[int] = None
+        self.offset = 0
+        self.events_since_checkpoint = 0
+        existing = self.checkpoints()
+        self._next_seq = existing[-1] + 1 if existing else 1
+
+    def checkpoint_path(self, seq: int) -> str:
+        return os.path.join(self.history_path, f"{CHECKPOINT_PREFIX}{seq:08d}.kgc")
+
+    def segment_path(self, seq: int) -> str:
+        return os.path.join(self.history_path, f"{SEGMENT_PREFIX}{seq:08d}.jsonl")
+
+    def checkpoints(self) -> List[int]:
+        """Sequence numbers of the checkpoints on disk, oldest first"""
+        seqs = []
+        for name in os.listdir(self.history_path):
+            if name.startswith(CHECKPOINT_PREFIX) and name.endswith(".kgc"):
+                stem = name[len(CHECKPOINT_PREFIX):].split(".", 1)[0]
+                if stem.isdigit():
+                    seqs.append(int(stem))
+        return sorted(seqs)
+
+    def needs_checkpoint(self, pending_events: int) -> bool:
+        """Whether the next snapshot should start a new checkpoint"""
+        return self.seq is None or self.events_since_checkpoint + pending_events > self.checkpoint_interval
+
+    def write_checkpoint(self, graph: nx.Graph) -> int:
+        """Write the full graph as a new checkpoint and open its (empty) segment"""
+        seq = self._next_seq
+        checkpoint_path, segment_path = self.checkpoint_path(seq), self.segment_path(seq)
+        encoded = encode_columns(graph)
+
+        def write():
+            write_encoded(checkpoint_path, encoded)
+            open(segment_path, "w").close()
+        self.writer.submit(write)
+        self.seq = seq
+        self.offset = 0
+        self.events_since_checkpoint = 0
+        self._next_seq = seq + 1
+        logger.info(f"Queued graph checkpoint {seq} with {graph.number_of_nodes()} nodes")
+        return seq
+
+    def append(self, events: List[Dict[str, Any]]) -> int:
+        """Append events to the current segment and return the offset past them"""
+        payload = "".join(json.dumps(event, separators=(",", ":"), default=str) + "\n" for event in events)
+        data = payload.encode("utf-8")
+        self.writer.append(self.segment_path(self.seq), data)
+        self.offset += len(data)
+        self.events_since_checkpoint += sum(1 for event in events if event["op"] != SNAPSHOT)
+        return self.offset
+
+    def read_checkpoint(self, seq: int) -> nx.Graph:
+        self.writer.flush()
+        return read_columnar(self.checkpoint_path(seq))
+
+    def read_events(self, seq: int, offset: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Events of a segment, up to offset bytes if given"""
+        self.writer.flush()
+        with open(self.segment_path(seq), "rb") as f:
+            data = f.read() if offset is None else f.read(offset)
+        for line in data.splitlines():
+            if line:
+                yield json.loads(line)
+
+    def reconstruct(self, seq: int, offset: int) -> nx.Graph:
+        """The graph at a (checkpoint, offset) position"""
+        graph = self.read_checkpoint(seq)
+        for event in self.read_events(seq, offset):
+            apply_event(graph, event)
+        return graph
+
+    def drop(self, seq: int) -> None:
+        """Queue removal of a checkpoint and its segment"""
+        paths = [self.checkpoint_path(seq), self.segment_path(seq)]
+
+        def remove():
+            for path in paths:
+                if os.path.exists(path):
+                    os.remove(path)
+        self.writer.submit(remove)
+
+    def truncate(self, seq: int, offset: int) -> None:
+        """Queue truncation of a closed segment to its first offset bytes"""
+        path = self.segment_path(seq)
+
+        def cut():
+            with open(path, "r+b") as f:
+                f.truncate(offset)
+        self.writer.submit(cut)
@@ -0,0 +1,901 @@
+"""Pluggable storage backends for the knowledge graph.
+
+StorageBackend is the interface the graph manager and the write-behind
+writer persist through: node/edge CRUD, bulk inserts and updates with
+pre-reserved ids, units of work and batched full-graph streaming.
+
+PostgresStorage wraps the asyncpg functions in server.database. SQLiteStorage
+keeps the graph in an embedded SQLite file in WAL mode, so benchmarks and
+single-box deployments don't need a separate database process. The backend is
+chosen with STORAGE_BACKEND ("postgres" or "sqlite").
+"""
+import os
+import json
+import sqlite3
+import logging
+import asyncio
+import contextvars
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Dict, List, Any, Optional
+
+from . import database
+from .traversal import bounded_neighborhood, DEFAULT_MAX_NODES
+from .utils.rows import coalesce_rows
+
+logger = logging.getLogger(__name__)
+
+# Storage settings
+STORAGE_BACKEND = os.environ.get("STORAGE_BACKEND", "postgres").lower()
+SQLITE_PATH = os.environ.get("SQLITE_PATH", "./knowledge_graph.db")
+SQLITE_BUSY_TIMEOUT = float(os.environ.get("SQLITE_BUSY_TIMEOUT", "30"))
+STREAM_BATCH_SIZE = int(os.environ.get("STORAGE_STREAM_BATCH_SIZE", "1000"))
+
+TABLES = ("nodes", "edges")
+
+
+class StorageBackend(ABC):
+    """Persistence interface for graph nodes and edges"""
+
+    name = "abstract"
+    # Whether the backend has a connection pool with telemetry
+    has_pool = False
+
+    @abstractmethod
+    async def init(self) -> None:
+        """Connect and create the schema if needed"""
+
+    @abstractmethod
+    async def close(self) -> None:
+        """Release connections"""
+
+    @abstractmethod
+    def unit_of_work(self, transaction: bool = False):
+        """Async context manager grouping the calls made inside it"""
+
+    @abstractmethod
+    async def get_node(self, node_id: int) -> Optional[dict]:
+        """Get a node by ID"""
+
+    @abstractmethod
+    async def create_node(self, node_data: dict) -> dict:
+        """Create a node with a storage-assigned id"""
+
+    @abstractmethod
+    async def delete_node(self, node_id: int) -> bool:
+        """Delete a node and the edges attached to it"""
+
+    @abstractmethod
+    async def get_edge(self, edge_id: int) -> Optional[dict]:
+        """Get an edge by ID"""
+
+    @abstractmethod
+    async def create_edge(self, edge_data: dict) -> Optional[dict]:
+        """Create an edge; returns None if either endpoint does not exist"""
+
+    @abstractmethod
+    async def delete_edge(self, edge_id: int) -> bool:
+        """Delete an edge"""
+
+    @abstractmethod
+    async def get_all_nodes(self) -> List[dict]:
+        """Get all nodes"""
+
+    @abstractmethod
+    async def get_all_edges(self) -> List[dict]:
+        """Get all edges"""
+
+    @abstractmethod
+    async def reserve_ids(self, table: str, count: int) -> range:
+        """Claim a contiguous block of ids no other insert will be assigned"""
+
+    @abstractmethod
+    async def insert_nodes(self, nodes: List[Dict[str, Any]]) -> None:
+        """Insert nodes with pre-allocated ids"""
+
+    @abstractmethod
+    async def insert_edges(self, edges: List[Dict[str, Any]]) -> None:
+        """Insert edges with pre-allocated ids"""
+
+    @abstractmethod
+    async def update_nodes(self, nodes: List[Dict[str, Any]]) -> None:
+        """Persist label, type and metadata of existing nodes"""
+
+    @abstractmethod
+    async def update_edges(self, edges: List[Dict[str, Any]]) -> None:
+        """Persist label, weight and metadata of existing edges"""
+
+    @abstractmethod
+    async def find_nodes(self, metadata: Optional[Dict[str, List[Any]]] = None,
+                         node_type: Optional[str] = None,
+                         after: int = 0, limit: int = 100) -> List[dict]:
+        """Nodes matching type and metadata filters (key -> accepted values), in id order"""
+
+    @abstractmethod
+    async def find_edges(self, metadata: Optional[Dict[str, List[Any]]] = None,
+                         label: Optional[str] = None,
+                         after: int = 0, limit: int = 100) -> List[dict]:
+        """Edges matching label and metadata filters (key -> accepted values), in id order"""
+
+    @abstractmethod
+    async def neighborhood(self, node_id: int, depth: int, fanout: Optional[int] = None,
+                           max_nodes: int = DEFAULT_MAX_NODES) -> Dict[int, int]:
+        """Nodes within depth hops, mapped to hop distance (see traversal.bounded_neighborhood)"""
+
+    @abstractmethod
+    async def shortest_path(self, source_id: int, target_id: int, max_depth: int,
+                            fanout: Optional[int] = None) -> Optional[List[int]]:
+        """Shortest path node ids within max_depth hops (see traversal.bounded_shortest_path)"""
+
+    @abstractmethod
+    async def get_subgraph(self, node_ids: List[int]) -> Dict[str, List[dict]]:
+        """Nodes with the given ids and the edges between them"""
+
+    @abstractmethod
+    async def get_adjacency(self, node_ids: List[int]) -> Dict[str, List[dict]]:
+        """Nodes with the given ids and every edge incident to them, in id order"""
+
+    @abstractmethod
+    def iter_nodes(self, batch_size: int = STREAM_BATCH_SIZE) -> AsyncIterator[List[dict]]:
+        """Stream all nodes in id order, one batch at a time"""
+
+    @abstractmethod
+    def iter_edges(self, batch_size: int = STREAM_BATCH_SIZE) -> AsyncIterator[List[dict]]:
+        """Stream all edges in id order, one batch at a time"""
+
+    def stats(self) -> Dict[str, Any]:
+        """Backend telemetry for monitoring"""
+        return {"backend": self.name}
+
+    def reset_stats(self) -> None:
+        """Clear collected telemetry, e.g. between benchmark runs"""
+
+    async def reserve_node_ids(self, count: int) -> range:
+        """Claim a contiguous block of node ids"""
+        return await self.reserve_ids("nodes", count)
+
+    async def reserve_edge_ids(self, count: int) -> range:
+        """Claim a contiguous block of edge ids"""
+        return await self.reserve_ids("edges", count)
+
+    async def get_full_graph(self) -> Dict[str, List[dict]]:
+        """Get the full graph data"""
+        nodes = [node async for batch in self.iter_nodes() for node in batch]
+        edges = [edge async for batch in self.iter_edges() for edge in batch]
+        logger.info(f"Retrieved graph with {len(nodes)} nodes and {len(edges)} edges")
+        return {"nodes": nodes, "edges": edges}
+
+
+class PostgresStorage(StorageBackend):
+    """Storage backed by the asyncpg connection pool in server.database"""
+
+    name = "postgres"
+    has_pool = True
+
+    async def init(self) -> None:
+        await database.init_db()
+        database.start_health_check()
+        if database.ADAPTIVE_POOL_ENABLED:
+            database.start_pool_controller()
+
+    async def close(self) -> None:
+        await database.cleanup_pool()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name, "pool": database.get_pool_stats()}
+
+    def reset_stats(self) -> None:
+        database.pool_telemetry.reset()
+
+    def unit_of_work(self, transaction: bool = False):
+        return database.unit_of_work(transaction)
+
+    async def get_node(self, node_id: int) -> Optional[dict]:
+        return await database.get_node(node_id)
+
+    async def create_node(self, node_data: dict) -> dict:
+        return await database.create_node(node_data)
+
+    async def delete_node(self, node_id: int) -> bool:
+        return await database.delete_node(node_id)
+
+    async def get_edge(self, edge_id: int) -> Optional[dict]:
+        return await database.get_edge(edge_id)
+
+    async def create_edge(self, edge_data: dict) -> Optional[dict]:
+        return await database.create_edge(edge_data)
+
+    async def delete_edge(self, edge_id: int) -> bool:
+        return await database.delete_edge(edge_id)
+
+    async def get_all_nodes(self) -> List[dict]:
+        return await database.get_all_nodes()
+
+    async def get_all_edges(self) -> List[dict]:
+        return await database.get_all_edges()
+
+    async def get_full_graph(self) -> Dict[str, List[dict]]:
+        return await database.get_full_graph()
+
+    async def reserve_ids(self, table: str, count: int) -> range:
+        return await database.reserve_ids(table, count)
+
+    async def insert_nodes(self, nodes: List[Dict[str, Any]]) -> None:
+        await database.insert_nodes(nodes)
+
+    async def insert_edges(self, edges: List[Dict[str, Any]]) -> None:
+        await database.insert_edges(edges)
+
+    async def update_nodes(self, nodes: List[Dict[str, Any]]) -> None:
+        await database.update_nodes(nodes)
+
+    async def update_edges(self, edges: List[Dict[str, Any]]) -> None:
+        await database.update_edges(edges)
+
+    async def find_nodes(self, metadata: Optional[Dict[str, List[Any]]] = None,
+                         node_type: Optional[str] = None,
+                         after: int = 0, limit: int = 100) -> List[dict]:
+        return await database.find_nodes(metadata, node_type, after, limit)
+
+    async def find_edges(self, metadata: Optional[Dict[str, List[Any]]] = None,
+                         label: Optional[str] = None,
+                         after: int = 0, limit: int = 100) -> List[dict]:
+        return await database.find_edges(metadata, label, after, limit)
+
+    async def neighborhood(self, node_id: int, depth: int, fanout: Optional[int] = None,
+                           max_nodes: int = DEFAULT_MAX_NODES) -> Dict[int, int]:
+        return await database.neighborhood(node_id, depth, fanout, max_nodes)
+
+    async def shortest_path(self, source_id: int, target_id: int, max_depth: int,
+                            fanout: Optional[int] = None) -> Optional[List[int]]:
+        return await database.shortest_path(source_id, target_id, max_depth, fanout)
+
+    async def get_subgraph(self, node_ids: List[int]) -> Dict[str, List[dict]]:
+        return await database.get_subgraph(node_ids)
+
+    async def get_adjacency(self, node_ids: List[int]) -> Dict[str, List[dict]]:
+        return await database.get_adjacency(node_ids)
+
+    def iter_nodes(self, batch_size: int = STREAM_BATCH_SIZE) -> AsyncIterator[List[dict]]:
+        return database.iter_nodes(batch_size)
+
+    def iter_edges(self, batch_size: int = STREAM_BATCH_SIZE) -> AsyncIterator[List[dict]]:
+        return database.iter_edges(batch_size)
+
+
+# SQLite storage whose transaction the current task is running in
+_sqlite_transaction: contextvars.ContextVar[Optional["SQLiteStorage"]] = contextvars.ContextVar(
+    "sqlite_transaction", default=None
+)
+
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS nodes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    label TEXT NOT NULL,
+    type TEXT NOT NULL DEFAULT 'concept',
+    metadata TEXT NOT NULL DEFAULT '{}'
+);
+CREATE TABLE IF NOT EXISTS edges (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    source_id INTEGER REFERENCES nodes(id),
+    target_id INTEGER REFERENCES nodes(id),
+    label TEXT NOT NULL DEFAULT 'related_to',
+    weight REAL NOT NULL DEFAULT 1.0,
+    metadata TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS idx_nodes_type ON nodes (type);
+CREATE INDEX IF NOT EXISTS idx_edges_label ON edges (label);
+CREATE INDEX IF NOT EXISTS idx_edges_source ON edges (source_id, target_id);
+CREATE INDEX IF NOT EXISTS idx_edges_target ON edges (target_id, source_id);
+"""
+
+# SQLite has no LATERAL joins. Each traversal row carries the fan-out cutoff
+# of its node: the ?3-th smallest neighbor id (?3 is the fan-out; -1 means no
+# limit), computed once when the row is produced. Neighbors are expanded in
+# two branches so both use the edge indexes: idx_edges_source for outgoing
+# and idx_edges_target for incoming edges.
+_SQLITE_FANOUT_CUTOFF = """CASE WHEN ?3 < 0 THEN NULL ELSE (
+    SELECT neighbor_id FROM (
+        SELECT target_id AS neighbor_id FROM edges WHERE source_id = {node}
+        UNION
+        SELECT source_id FROM edges WHERE target_id = {node}
+    ) ORDER BY neighbor_id LIMIT 1 OFFSET ?3 - 1
+) END"""
+
+
+# Neighbors of one node, lowest ids first, limited to the fan-out (-1 means
+# no limit)
+_SQLITE_NEIGHBORS = """
+    SELECT target_id AS neighbor_id FROM edges WHERE source_id = ?1
+    UNION
+    SELECT source_id FROM edges WHERE target_id = ?1
+    ORDER BY neighbor_id LIMIT ?2
+"""
+
+
+def _sqlite_expand(table: str, columns: str, where: str) -> str:
+    """Recursive step over both edge directions, with the fan-out cutoff applied"""
+    branches = []
+    for near, far in (("source_id", "target_id"), ("target_id", "source_id")):
+        branches.append(f"""
+            SELECT e.{far}, {columns},
+                   {_SQLITE_FANOUT_CUTOFF.format(node=f"e.{far}")}
+            FROM {table} h
+            JOIN edges e ON e.{near} = h.node_id
+            WHERE (h.cutoff IS NULL OR e.{far} <= h.cutoff) AND {where}""")
+    return "\n            UNION".join(branches)
+
+
+def _node_from_row(row: sqlite3.Row) -> dict:
+    return {
+        "id": row["id"],
+        "label": row["label"],
+        "type": row["type"],
+        "metadata": json.loads(row["metadata"]) if row["metadata"] else {}
+    }
+
+
+def _edge_from_row(row: sqlite3.Row) -> dict:
+    return {
+        "id": row["id"],
+        "sourceId": row["source_id"],
+        "targetId": row["target_id"],
+        "label": row["label"],
+        "weight": row["weight"],
+        "metadata": json.loads(row["metadata"]) if row["metadata"] else {}
+    }
+
+
+@contextmanager
+def _atomic(conn: sqlite3.Connection):
+    """Run a block in a write transaction unless one is already open"""
+    if conn.in_transaction:
+        yield
+        return
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+class SQLiteStorage(StorageBackend):
+    """
+    Storage in an embedded SQLite database file.
+
+    A single connection in WAL mode is driven by one worker thread, so blocking
+    sqlite3 calls never run on the event loop. Statements outside a
+    transactional unit of work take a lock for their duration; a transactional
+    unit holds it until commit, which keeps other tasks from reading its
+    uncommitted rows through the shared connection.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str = SQLITE_PATH):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.path,
+            timeout=SQLITE_BUSY_TIMEOUT,
+            isolation_level=None,  # transactions are managed explicitly
+            check_same_thread=False
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        conn.executescript(_SQLITE_SCHEMA)
+        logger.info(f"Opened SQLite storage at {self.path}")
+        return conn
+
+    def _invoke(self, fn, args):
+        if self._conn is None:
+            self._conn = self._open()
+        return fn(self._conn, *args)
+
+    async def _call(self, fn, *args):
+        """Run fn(conn, *args) on the worker thread"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-storage")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._invoke, fn, args)
+
+    def _get_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock, self._lock_loop = asyncio.Lock(), loop
+        return self._lock
+
+    async def _run(self, fn, *args):
+        if _sqlite_transaction.get() is self:
+            return await self._call(fn, *args)
+        async with self._get_lock():
+            return await self._call(fn, *args)
+
+    async def init(self) -> None:
+        try:
+            await self._run(lambda conn: None)
+            logger.info("SQLite storage initialized")
+        except Exception as e:
+            logger.error(f"Failed to initialize SQLite storage: {str(e)}", exc_info=True)
+            raise
+
+    async def close(self) -> None:
+        if self._executor is None:
+            return
+
+        def close_connection(conn):
+            conn.close()
+            self._conn = None
+
+        try:
+            if self._conn is not None:
+                await self._run(close_connection)
+        finally:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+            logger.info("SQLite storage closed")
+
+    @asynccontextmanager
+    async def unit_of_work(self, transaction: bool = False):
+        # Every statement already shares the one connection; only transactions need state
+        if not transaction or _sqlite_transaction.get() is self:
+            yield self
+            return
+        async with self._get_lock():
+            await self._call(lambda conn: conn.execute("BEGIN IMMEDIATE"))
+            token = _sqlite_transaction.set(self)
+            try:
+                yield self
+            except BaseException:
+                await self._call(lambda conn: conn.execute("ROLLBACK"))
+                raise
+            else:
+                await self._call(lambda conn: conn.execute("COMMIT"))
+            finally:
+                _sqlite_transaction.reset(token)
+
+    async def get_node(self, node_id: int) -> Optional[dict]:
+        try:
+            row = await self._run(
+                lambda conn: conn.execute("SELECT * FROM nodes WHERE id = ?", (node_id,)).fetchone()
+            )
+            return _node_from_row(row) if row else None
+        except Exception as e:
+            logger.error(f"Error retrieving node {node_id}: {str(e)}", exc_info=True)
+            raise
+
+    async def create_node(self, node_data: dict) -> dict:
+        def insert(conn):
+            cursor = conn.execute(
+                "INSERT INTO nodes (label, type, metadata) VALUES (?, ?, ?)",
+                (
+                    node_data.get("label"),
+                    node_data.get("type", "concept"),
+                    json.dumps(node_data.get("metadata", {}))
+                )
+            )
+            return conn.execute("SELECT * FROM nodes WHERE id = ?", (cursor.lastrowid,)).fetchone()
+
+        try:
+            node = _node_from_row(await self._run(insert))
+            logger.info(f"Created new node with ID {node['id']}")
+            return node
+        except Exception as e:
+            logger.error(f"Error creating node: {str(e)}", exc_info=True)
+            raise
+
+    async def delete_node(self, node_id: int) -> bool:
+        def delete(conn):
+            with _atomic(conn):
+                conn.execute("DELETE FROM edges WHERE source_id = ? OR target_id = ?", (node_id, node_id))
+                return conn.execute("DELETE FROM nodes WHERE id = ?", (node_id,)).rowcount > 0
+
+        try:
+            return await self._run(delete)
+        except Exception as e:
+            logger.error(f"Error deleting node {node_id}: {str(e)}", exc_info=True)
+            raise
+
+    async def get_edge(self, edge_id: int) -> Optional[dict]:
+        try:
+            row = await self._run(
+                lambda conn: conn.execute("SELECT * FROM edges WHERE id = ?", (edge_id,)).fetchone()
+            )
+            return _edge_from_row(row) if row else None
+        except Exception as e:
+            logger.error(f"Error retrieving edge {edge_id}: {str(e)}", exc_info=True)
+            raise
+
+    async def create_edge(self, edge_data: dict) -> Optional[dict]:
+        source_id = edge_data.get("sourceId")
+        target_id = edge_data.get("targetId")
+
+        def insert(conn):
+            found = conn.execute(
+                "SELECT COUNT(*) FROM nodes WHERE id IN (?, ?)", (source_id, target_id)
+            ).fetchone()[0]
+            if found < (1 if source_id == target_id else 2):
+                return None
+            cursor = conn.execute(
+                """
+                INSERT INTO edges (source_id, target_id, label, weight, metadata)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (
+                    source_id,
+                    target_id,
+                    edge_data.get("label", "related_to"),
+                    edge_data.get("weight", 1.0),
+                    json.dumps(edge_data.get("metadata", {}))
+                )
+            )
+            return conn.execute("SELECT * FROM edges WHERE id = ?", (cursor.lastrowid,)).fetchone()
+
+        try:
+            row = await self._run(insert)
+            if row is None:
+                logger.warning("Source or target node does not exist")
+                return None
+            edge = _edge_from_row(row)
+            logger.info(f"Created new edge with ID {edge['id']}")
+            return edge
+        except Exception as e:
+            logger.error(f"Error creating edge: {str(e)}", exc_info=True)
+            raise
+
+    async def delete_edge(self, edge_id: int) -> bool:
+        try:
+            return await self._run(
+                lambda conn: conn.execute("DELETE FROM edges WHERE id = ?", (edge_id,)).rowcount > 0
+            )
+        except Exception as e:
+            logger.error(f"Error deleting edge {edge_id}: {str(e)}", exc_info=True)
+            raise
+
+    async def get_all_nodes(self) -> List[dict]:
+        return [node async for batch in self.iter_nodes() for node in batch]
+
+    async def get_all_edges(self) -> List[dict]:
+        return [edge async for batch in self.iter_edges() for edge in batch]
+
+    async def reserve_ids(self, table: str, count: int) -> range:
+        """
+        Claim a contiguous block of ids from a table's AUTOINCREMENT counter.
+
+        AUTOINCREMENT never hands out an id at or below sqlite_sequence.seq, so
+        advancing it inside a write transaction reserves the block.
+        """
+        if table not in TABLES:
+            raise ValueError(f"Unknown table: {table}")
+        if count <= 0:
+            return range(0)
+
+        def reserve(conn):
+            with _atomic(conn):
+                row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (table,)).fetchone()
+                if row is None:
+                    last_id = conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0]
+                    conn.execute(
+                        "INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (table, last_id + count)
+                    )
+                else:
+                    last_id = row["seq"]
+                    conn.execute(
+                        "UPDATE sqlite_sequence SET seq = ? WHERE name = ?", (last_id + count, table)
+                    )
+                return last_id + 1
+
+        try:
+            start = await self._run(reserve)
+            logger.debug(f"Reserved {table} ids {start}..{start + count - 1}")
+            return range(start, start + count)
+        except Exception as e:
+            logger.error(f"Error reserving {count} ids for {table}: {str(e)}", exc_info=True)
+            raise
+
+    async def _executemany(self, sql: str, params: List[tuple]) -> None:
+        def write(conn):
+            with _atomic(conn):
+                conn.executemany(sql, params)
+
+        await self._run(write)
+
+    async def insert_nodes(self, nodes: List[Dict[str, Any]]) -> None:
+        if not nodes:
+            return
+        try:
+            await self._executemany(
+                "INSERT INTO nodes (id, label, type, metadata) VALUES (?, ?, ?, ?)",
+                [
+                    (
+                        node["id"],
+                        node.get("label"),
+                        node.get("type", "concept"),
+                        json.dumps(node.get("metadata", {}))
+                    )
+                    for node in nodes
+                ]
+            )
+            logger.debug(f"Inserted {len(nodes)} nodes")
+        except Exception as e:
+            logger.error(f"Error inserting {len(nodes)} nodes: {str(e)}", exc_info=True)
+            raise
+
+    async def insert_edges(self, edges: List[Dict[str, Any]]) -> None:
+        if not edges:
+            return
+        try:
+            await self._executemany(
+                """
+                INSERT INTO edges (id, source_id, target_id, label, weight, metadata)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                [
+                    (
+                        edge["id"],
+                        edge["sourceId"],
+                        edge["targetId"],
+                        edge.get("label", "related_to"),
+                        edge.get("weight", 1.0),
+                        json.dumps(edge.get("metadata", {}))
+                    )
+                    for edge in edges
+                ]
+            )
+            logger.debug(f"Inserted {len(edges)} edges")
+        except Exception as e:
+            logger.error(f"Error inserting {len(edges)} edges: {str(e)}", exc_info=True)
+            raise
+
+    async def update_nodes(self, nodes: List[Dict[str, Any]]) -> None:
+        nodes = coalesce_rows(nodes)
+        if not nodes:
+            return
+        try:
+            await self._executemany(
+                "UPDATE nodes SET label = ?, type = ?, metadata = ? WHERE id = ?",
+                [
+                    (
+                        node.get("label"),
+                        node.get("type", "concept"),
+                        json.dumps(node.get("metadata", {})),
+                        node["id"]
+                    )
+                    for node in nodes
+                ]
+            )
+            logger.debug(f"Updated {len(nodes)} nodes")
+        except Exception as e:
+            logger.error(f"Error updating {len(nodes)} nodes: {str(e)}", exc_info=True)
+            raise
+
+    async def update_edges(self, edges: List[Dict[str, Any]]) -> None:
+        edges = coalesce_rows(edges)
+        if not edges:
+            return
+        try:
+            await self._executemany(
+                "UPDATE edges SET label = ?, weight = ?, metadata = ? WHERE id = ?",
+                [
+                    (
+                        edge.get("label", "related_to"),
+                        float(edge.get("weight", 1.0)),
+                        json.dumps(edge.get("metadata", {})),
+                        edge["id"]
+                    )
+                    for edge in edges
+                ]
+            )
+            logger.debug(f"Updated {len(edges)} edges")
+        except Exception as e:
+            logger.error(f"Error updating {len(edges)} edges: {str(e)}", exc_info=True)
+            raise
+
+    async def _find(self, table: str, columns: Dict[str, Any], metadata: Dict[str, List[Any]],
+                    after: int, limit: int) -> List[sqlite3.Row]:
+        conditions = ["id > ?"]
+        args: List[Any] = [after]
+        for column, value in columns.items():
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                args.append(value)
+        for key, values in metadata.items():
+            # json_extract yields SQL scalars: JSON true/false compare equal to 1/0
+            path = '$."' + key.replace('"', '\\"') + '"'
+            alternatives = []
+            for value in values:
+                if value is None:
+                    alternatives.append("json_type(metadata, ?) = 'null'")
+                    args.append(path)
+                else:
+                    alternatives.append("json_extract(metadata, ?) = ?")
+                    args.extend((path, value))
+            conditions.append("(" + " OR ".join(alternatives) + ")")
+        args.append(limit)
+        query = f"SELECT * FROM {table} WHERE {' AND '.join(conditions)} ORDER BY id LIMIT ?"
+        return await self._run(lambda conn: conn.execute(query, args).fetchall())
+
+    async def find_nodes(self, metadata: Optional[Dict[str, List[Any]]] = None,
+                         node_type: Optional[str] = None,
+                         after: int = 0, limit: int = 100) -> List[dict]:
+        try:
+            rows = await self._find("nodes", {"type": node_type}, metadata or {}, after, limit)
+            return [_node_from_row(row) for row in rows]
+        except Exception as e:
+            logger.error(f"Error filtering nodes: {str(e)}", exc_info=True)
+            raise
+
+    async def find_edges(self, metadata: Optional[Dict[str, List[Any]]] = None,
+                         label: Optional[str] = None,
+                         after: int = 0, limit: int = 100) -> List[dict]:
+        try:
+            rows = await self._find("edges", {"label": label}, metadata or {}, after, limit)
+            return [_edge_from_row(row) for row in rows]
+        except Exception as e:
+            logger.error(f"Error filtering edges: {str(e)}", exc_info=True)
+            raise
+
+    async def neighborhood(self, node_id: int, depth: int, fanout: Optional[int] = None,
+                           max_nodes: int = DEFAULT_MAX_NODES) -> Dict[int, int]:
+        # A recursive query can't see which nodes it already reached, so it
+        # would expand whole levels past max_nodes. SQLite is in-process, so a
+        # lookup per expanded node costs no round trip and the shared
+        # traversal can stop as soon as max_nodes are found.
+        limit = -1 if fanout is None else fanout
+
+        def traverse(conn):
+            def neighbors(current: int) -> List[int]:
+                return [row["neighbor_id"] for row in conn.execute(_SQLITE_NEIGHBORS, (current, limit))]
+            return bounded_neighborhood(neighbors, node_id, depth, fanout, max_nodes)
+
+        try:
+            return await self._run(traverse)
+        except Exception as e:
+            logger.error(f"Error querying neighborhood of node {node_id}: {str(e)}", exc_info=True)
+            raise
+
+    async def shortest_path(self, source_id: int, target_id: int, max_depth: int,
+                            fanout: Optional[int] = None) -> Optional[List[int]]:
+        query = f"""
+            WITH RECURSIVE walk(node_id, depth, parent_id, cutoff) AS (
+                SELECT ?1, 0, NULL, {_SQLITE_FANOUT_CUTOFF.format(node="?1")}
+                UNION
+                {_sqlite_expand("walk", "h.depth + 1, h.node_id", "h.depth < ?4 AND h.node_id <> ?2")}
+            ),
+            back(node_id, depth) AS (
+                SELECT ?2, (SELECT MIN(depth) FROM walk WHERE node_id = ?2)
+                UNION ALL
+                SELECT (
+                    SELECT MIN(w.parent_id) FROM walk w
+                    WHERE w.node_id = b.node_id AND w.depth = b.depth
+                ), b.depth - 1
+                FROM back b
+                WHERE b.depth > 0
+            )
+            SELECT node_id, depth FROM back ORDER BY depth
+        """
+        params = (source_id, target_id, -1 if fanout is None else fanout, max_depth)
+        try:
+            rows = await self._run(lambda conn: conn.execute(query, params).fetchall())
+            if not rows or rows[0]["depth"] is None:
+                return None
+            return [row["node_id"] for row in rows]
+        except Exception as e:
+            logger.error(f"Error querying path {source_id} -> {target_id}: {str(e)}", exc_info=True)
+            raise
+
+    async def get_subgraph(self, node_ids: List[int]) -> Dict[str, List[dict]]:
+        def fetch(conn):
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS subgraph_ids (id INTEGER PRIMARY KEY)")
+            conn.execute("DELETE FROM subgraph_ids")
+            conn.executemany("INSERT OR IGNORE INTO subgraph_ids (id) VALUES (?)", [(i,) for i in node_ids])
+            nodes = conn.execute(
+                "SELECT n.* FROM nodes n JOIN subgraph_ids s ON s.id = n.id ORDER BY n.id"
+            ).fetchall()
+            # Lowest edge id per node pair, as the in-memory graph keeps
+            edges = conn.execute(
+                """
+                SELECT e.* FROM edges e
+                WHERE e.source_id IN (SELECT id FROM subgraph_ids)
+                  AND e.target_id IN (SELECT id FROM subgraph_ids)
+                  AND e.id = (
+                      SELECT MIN(d.id) FROM edges d
+                      WHERE (d.source_id = e.source_id AND d.target_id = e.target_id)
+                         OR (d.source_id = e.target_id AND d.target_id = e.source_id)
+                  )
+                ORDER BY e.id
+                """
+            ).fetchall()
+            return nodes, edges
+
+        try:
+            nodes, edges = await self._run(fetch)
+            return {
+                "nodes": [_node_from_row(row) for row in nodes],
+                "edges": [_edge_from_row(row) for row in edges]
+            }
+        except Exception as e:
+            logger.error(f"Error retrieving subgraph of {len(node_ids)} nodes: {str(e)}", exc_info=True)
+            raise
+
+    async def get_adjacency(self, node_ids: List[int]) -> Dict[str, List[dict]]:
+        def fetch(conn):
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS adjacency_ids (id INTEGER PRIMARY KEY)")
+            conn.execute("DELETE FROM adjacency_ids")
+            conn.executemany("INSERT OR IGNORE INTO adjacency_ids (id) VALUES (?)", [(i,) for i in node_ids])
+            nodes = conn.execute(
+                "SELECT n.* FROM nodes n JOIN adjacency_ids a ON a.id = n.id ORDER BY n.id"
+            ).fetchall()
+            edges = conn.execute(
+                """
+                SELECT e.* FROM edges e JOIN adjacency_ids a ON a.id = e.source_id
+                UNION
+                SELECT e.* FROM edges e JOIN adjacency_ids a ON a.id = e.target_id
+                ORDER BY id
+                """
+            ).fetchall()
+            return nodes, edges
+
+        try:
+            nodes, edges = await self._run(fetch)
+            return {
+                "nodes": [_node_from_row(row) for row in nodes],
+                "edges": [_edge_from_row(row) for row in edges]
+            }
+        except Exception as e:
+            logger.error(f"Error retrieving adjacency of {len(node_ids)} nodes: {str(e)}", exc_info=True)
+            raise
+
+    async def _iter_table(self, table: str, batch_size: int, from_row):
+        last_id = 0
+        while True:
+            try:
+                rows = await self._run(
+                    lambda conn: conn.execute(
+                        f"SELECT * FROM {table} WHERE id > ? ORDER BY id LIMIT ?", (last_id, batch_size)
+                    ).fetchall()
+                )
+            except Exception as e:
+                logger.error(f"Error streaming {table} after id {last_id}: {str(e)}", exc_info=True)
+                raise
+            if not rows:
+                return
+            yield [from_row(row) for row in rows]
+            last_id = rows[-1]["id"]
+
+    def iter_nodes(self, batch_size: int = STREAM_BATCH_SIZE) -> AsyncIterator[List[dict]]:
+        return self._iter_table("nodes", batch_size, _node_from_row)
+
+    def iter_edges(self, batch_size: int = STREAM_BATCH_SIZE) -> AsyncIterator[List[dict]]:
+        return self._iter_table("edges", batch_size, _edge_from_row)
+
+
+def create_storage(backend: str = STORAGE_BACKEND) -> StorageBackend:
+    """Build the storage backend named by backend ("postgres" or "sqlite")"""
+    if backend in ("postgres", "postgresql"):
+        return PostgresStorage()
+    if backend == "sqlite":
+        return SQLiteStorage()
+    raise ValueError(f"Unknown storage backend: {backend}")
+
+
+_storage: Optional[StorageBackend] = None
+
+
+def get_storage() -> StorageBackend:
+    """Process-wide storage backend selected by STORAGE_BACKEND"""
+    global _storage
+    if _storage is None:
+        _storage = create_storage()
+        logger.info(f"Using {_storage.name} storage backend")
+    return _storage
@@ -0,0 +1,93 @@
+"""Bounded graph traversals shared by the in-memory and database query paths.
+
+The storage backends run the same traversals over the edges table, as
+recursive SQL or, for the in-process SQLite neighborhood, by calling these
+functions directly; these functions define the semantics all must agree on:
+edges are undirected, each expanded node follows at most `fanout` of its
+neighbors (lowest ids first), and ties between equally short paths go to the
+lowest parent id.
+"""
+import heapq
+from typing import Callable, Dict, Iterable, List, Optional
+
+# Default traversal limits
+DEFAULT_MAX_NODES = 1000
+DEFAULT_MAX_PATH_DEPTH = 6
+MAX_TRAVERSAL_DEPTH = 10
+
+Neighbors = Callable[[int], Iterable[int]]
+
+
+def _expand(neighbors: Neighbors, node_id: int, fanout: Optional[int]) -> List[int]:
+    adjacent = neighbors(node_id)
+    if fanout is None:
+        return sorted(adjacent)
+    return heapq.nsmallest(fanout, adjacent)
+
+
+def bounded_neighborhood(neighbors: Neighbors, start: int, depth: int,
+                         fanout: Optional[int] = None,
+                         max_nodes: int = DEFAULT_MAX_NODES) -> Dict[int, int]:
+    """
+    Nodes within depth hops of start, mapped to their hop distance.
+
+    Args:
+        neighbors: Returns the neighbor ids of a node
+        start: Node to start from
+        depth: Maximum number of hops
+        fanout: Maximum neighbors followed from each node (None for all)
+        max_nodes: Maximum nodes returned, nearest (then lowest id) first
+
+    Returns:
+        Dictionary of node id to distance, ordered by distance then id
+    """
+    distances = {start: 0}
+    frontier = [start]
+    for hop in range(1, depth + 1):
+        next_frontier = []
+        for node_id in frontier:
+            for neighbor_id in _expand(neighbors, node_id, fanout):
+                if neighbor_id not in distances:
+                    distances[neighbor_id] = hop
+                    next_frontier.append(neighbor_id)
+        # Deeper nodes sort after these, so a full level ends the search
+        if not next_frontier or len(distances) >= max_nodes:
+            break
+        frontier = next_frontier
+    ordered = sorted(distances.items(), key=lambda item: (item[1], item[0]))
+    return dict(ordered[:max_nodes])
+
+
+def bounded_shortest_path(neighbors: Neighbors, source: int, target: int,
+                          max_depth: int = DEFAULT_MAX_PATH_DEPTH,
+                          fanout: Optional[int] = None) -> Optional[List[int]]:
+    """
+    Shortest path from source to target of at most max_depth hops.
+
+    Returns the node ids along the path, or None if target is not reachable
+    within the limits.
+    """
+    if source == target:
+        return [source]
+    parents: Dict[int, int] = {}
+    distances = {source: 0}
+    frontier = [source]
+    for hop in range(1, max_depth + 1):
+        next_frontier = []
+        for node_id in frontier:
+            for neighbor_id in _expand(neighbors, node_id, fanout):
+                if neighbor_id not in distances:
+                    distances[neighbor_id] = hop
+                    parents[neighbor_id] = node_id
+                    next_frontier.append(neighbor_id)
+                elif distances[neighbor_id] == hop:
+                    parents[neighbor_id] = min(parents[neighbor_id], node_id)
+        if target in distances:
+            path = [target]
+            while path[-1] != source:
+                path.append(parents[path[-1]])
+            return path[::-1]
+        if not next_frontier:
+            break
+        frontier = next_frontier
+    return None
@@ -1,3 +1,4 @@
 from .graph_utils import create_networkx_graph, calculate_metrics
+from .rows import coalesce_rows
 
-__all__ = ['create_networkx_graph', 'calculate_metrics']
+__all__ = ['create_networkx_graph', 'calculate_metrics', 'coalesce_rows']
@@ -0,0 +1,9 @@
+from typing import Any, Dict, List
+
+
+def coalesce_rows(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Keep only the latest row per id, preserving first-seen order"""
+    latest: Dict[int, Dict[str, Any]] = {}
+    for row in rows:
+        latest[row["id"]] = row
+    return list(latest.values())
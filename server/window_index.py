@@ -0,0 +1,70 @@
+"""Time-ordered index over node and edge creation.
+
+The creation store keeps records in arrival order, which is almost but not
+always time order (a re-recorded element keeps its position). This index
+holds the positions sorted by creation time, so the elements created in a
+time range are found with two binary searches. It is rebuilt only after new
+records arrive.
+"""
+import threading
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .creation_index import CreationTimestamps, MISSING, to_micros
+
+
+class CreationWindowIndex:
+    """Node and edge positions of the creation store, sorted by creation time"""
+
+    def __init__(self, creations: CreationTimestamps):
+        self.creations = creations
+        self._lock = threading.Lock()
+        self._node_version: Optional[int] = None
+        self._edge_version: Optional[int] = None
+        self.node_order = np.empty(0, dtype=np.int64)
+        self.node_times = np.empty(0, dtype=np.int64)
+        self.edge_order = np.empty(0, dtype=np.int64)
+        self.edge_times = np.empty(0, dtype=np.int64)
+        self.edge_source = np.empty(0, dtype=np.int64)
+        self.edge_target = np.empty(0, dtype=np.int64)
+
+    def _refresh(self) -> None:
+        if self._node_version != self.creations.node_version:
+            version, times = self.creations.node_columns()
+            # Nodes only seen as edge endpoints have no creation time
+            recorded = np.flatnonzero(times != MISSING)
+            order = recorded[np.argsort(times[recorded], kind="stable")]
+            self.node_order, self.node_times = order, times[order]
+            self._node_version = version
+        if self._edge_version != self.creations.edge_version:
+            version, source, target, times = self.creations.edge_columns()
+            order = np.argsort(times, kind="stable")
+            self.edge_order, self.edge_times = order, times[order]
+            self.edge_source, self.edge_target = source, target
+            self._edge_version = version
+
+    @staticmethod
+    def _range(times: np.ndarray, start: Optional[float], end: Optional[float]) -> Tuple[int, int]:
+        low = 0 if start is None else int(np.searchsorted(times, to_micros(start), side="left"))
+        high = len(times) if end is None else int(np.searchsorted(times, to_micros(end), side="right"))
+        return low, high
+
+    def created_between(self, start: Optional[float] = None,
+                        end: Optional[float] = None) -> Tuple[List[str], List[Tuple[str, str]]]:
+        """
+        Nodes and edges created with start <= time <= end (epoch seconds), oldest first.
+
+        Returns:
+            (node ids, (source, target) edge pairs)
+        """
+        with self._lock:
+            self._refresh()
+            low, high = self._range(self.node_times, start, end)
+            nodes = self.node_order[low:high]
+            low, high = self._range(self.edge_times, start, end)
+            edges = self.edge_order[low:high]
+            source, target = self.edge_source[edges], self.edge_target[edges]
+        node_ids = self.creations.node_ids
+        return ([node_ids[position] for position in nodes.tolist()],
+                [(node_ids[u], node_ids[v]) for u, v in zip(source.tolist(), target.tolist())])
@@ -0,0 +1,333 @@
+"""Write-behind persistence for graph mutations.
+
+Mutations are applied to the in-memory graph immediately and persisted by a
+background writer task that flushes queued inserts and updates in batches.
+Ids are reserved from the storage backend in blocks so new nodes and edges
+have their final ids before they reach the database.
+"""
+import os
+import logging
+import asyncio
+import contextvars
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, List, Any, Optional
+
+from .storage import StorageBackend, get_storage
+
+logger = logging.getLogger(__name__)
+
+# Write-behind settings
+WRITE_BEHIND_QUEUE_SIZE = int(os.environ.get("WRITE_BEHIND_QUEUE_SIZE", "10000"))
+WRITE_BEHIND_BATCH_SIZE = int(os.environ.get("WRITE_BEHIND_BATCH_SIZE", "500"))
+WRITE_BEHIND_LINGER = float(os.environ.get("WRITE_BEHIND_LINGER", "0.05"))
+WRITE_BEHIND_MAX_RETRIES = int(os.environ.get("WRITE_BEHIND_MAX_RETRIES", "3"))
+ID_BLOCK_SIZE = int(os.environ.get("WRITE_BEHIND_ID_BLOCK_SIZE", "100"))
+
+# Operation kinds, in the order they are applied within a batch
+INSERT_NODE = "insert_node"
+INSERT_EDGE = "insert_edge"
+UPDATE_NODE = "update_node"
+UPDATE_EDGE = "update_edge"
+KIND_ORDER = (INSERT_NODE, INSERT_EDGE, UPDATE_NODE, UPDATE_EDGE)
+
+
+class WriteBehindError(RuntimeError):
+    """Writes could not be persisted; they are held in WriteBehindQueue.failed"""
+
+
+@dataclass
+class WriteOp:
+    kind: str
+    row: Dict[str, Any]
+
+
+class IdAllocator:
+    """Hands out ids from contiguous blocks reserved from a table's sequence"""
+
+    def __init__(self, storage: StorageBackend, table: str, block_size: int = ID_BLOCK_SIZE):
+        self.storage = storage
+        self.table = table
+        self.block_size = block_size
+        self._ids = deque()
+        self._lock = asyncio.Lock()
+
+    async def next_id(self) -> int:
+        if not self._ids:
+            async with self._lock:
+                if not self._ids:
+                    self._ids.extend(await self.storage.reserve_ids(self.table, self.block_size))
+        return self._ids.popleft()
+
+
+class WriteBehindQueue:
+    """
+    Bounded queue of pending graph writes drained by a background task.
+
+    enqueue() blocks once the queue is full, which applies backpressure to the
+    producers instead of growing memory without bound. flush() waits until
+    everything queued so far has been written, and close() flushes before
+    stopping the writer so queued mutations survive a clean shutdown.
+
+    A batch that keeps failing is retried row by row, so only the rows that
+    fail on their own are set aside in `failed`. Both flush() and close()
+    raise WriteBehindError while any are held; replay_failed() queues them
+    again.
+    """
+
+    def __init__(self,
+                 storage: Optional[StorageBackend] = None,
+                 max_queue_size: int = WRITE_BEHIND_QUEUE_SIZE,
+                 batch_size: int = WRITE_BEHIND_BATCH_SIZE,
+                 linger: float = WRITE_BEHIND_LINGER,
+                 max_retries: int = WRITE_BEHIND_MAX_RETRIES,
+                 id_block_size: int = ID_BLOCK_SIZE):
+        self.storage = storage or get_storage()
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.linger = linger
+        self.max_retries = max_retries
+        self.node_ids = IdAllocator(self.storage, "nodes", id_block_size)
+        self.edge_ids = IdAllocator(self.storage, "edges", id_block_size)
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self.written = 0
+        self.batches = 0
+        self.failed: deque = deque()
+
+    def _ensure_started(self):
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        if self._task is None or self._task.done():
+            # Run in a fresh context so the writer never joins the caller's unit of work
+            self._task = asyncio.create_task(self._run(), context=contextvars.Context())
+            logger.info("Started write-behind writer task")
+
+    async def enqueue(self, kind: str, row: Dict[str, Any]) -> None:
+        """Queue a write; waits while the queue is full"""
+        self._ensure_started()
+        await self._queue.put(WriteOp(kind, row))
+
+    async def create_node(self, node_data: dict) -> dict:
+        """Assign a pre-allocated id to a new node and queue its insert"""
+        node = {
+            "id": await self.node_ids.next_id(),
+            "label": node_data.get("label"),
+            "type": node_data.get("type", "concept"),
+            "metadata": node_data.get("metadata", {})
+        }
+        await self.enqueue(INSERT_NODE, dict(node))
+        return node
+
+    async def create_edge(self, edge_data: dict) -> dict:
+        """Assign a pre-allocated id to a new edge and queue its insert"""
+        edge = {
+            "id": await self.edge_ids.next_id(),
+            "sourceId": int(edge_data.get("sourceId")),
+            "targetId": int(edge_data.get("targetId")),
+            "label": edge_data.get("label", "related_to"),
+            "weight": edge_data.get("weight", 1.0),
+            "metadata": edge_data.get("metadata", {})
+        }
+        await self.enqueue(INSERT_EDGE, dict(edge))
+        return edge
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def _check_failed(self) -> None:
+        if self.failed:
+            raise WriteBehindError(f"{len(self.failed)} graph writes could not be persisted")
+
+    async def flush(self) -> None:
+        """
+        Wait until every write queued so far has been persisted.
+
+        Raises:
+            WriteBehindError: if failed writes are held
+        """
+        if self._queue is not None:
+            if self._task is None or self._task.done():
+                self._ensure_started()
+            await self._queue.join()
+        self._check_failed()
+
+    async def replay_failed(self) -> None:
+        """Queue the failed writes again and flush"""
+        ops, self.failed = list(self.failed), deque()
+        if ops:
+            logger.info(f"Replaying {len(ops)} failed graph writes")
+            self._ensure_started()
+            for op in ops:
+                await self._queue.put(op)
+        await self.flush()
+
+    async def close(self) -> None:
+        """
+        Flush pending writes and stop the writer task.
+
+        Raises:
+            WriteBehindError: if failed writes are held
+        """
+        try:
+            if self._queue is not None:
+                await self._queue.join()
+        finally:
+            task, self._task = self._task, None
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+            logger.info("Write-behind writer stopped")
+        self._check_failed()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": self.pending,
+            "maxQueueSize": self.max_queue_size,
+            "written": self.written,
+            "batches": self.batches,
+            "failed": len(self.failed)
+        }
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            try:
+                self._drain_into(batch)
+                if len(batch) < self.batch_size and self.linger > 0:
+                    # Give concurrent producers a moment to fill the batch
+                    await asyncio.sleep(self.linger)
+                    self._drain_into(batch)
+                await self._write_with_retry(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _drain_into(self, batch: List[WriteOp]):
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+
+    async def _write_with_retry(self, batch: List[WriteOp]):
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                await self._write_batch(batch)
+                self.written += len(batch)
+                self.batches += 1
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(
+                    f"Write-behind batch of {len(batch)} ops failed "
+                    f"(attempt {attempt}/{self.max_retries}): {str(e)}",
+                    exc_info=True
+                )
+                if attempt < self.max_retries:
+                    await asyncio.sleep(0.1 * 2 ** attempt)
+        if len(batch) == 1:
+            self.failed.extend(batch)
+        else:
+            await self._write_rows(batch)
+
+    async def _write_rows(self, batch: List[WriteOp]):
+        """Write a failed batch one row at a time, setting aside the rows that fail"""
+        # Stable sort keeps nodes before edges and later updates after earlier ones
+        for op in sorted(batch, key=lambda op: KIND_ORDER.index(op.kind)):
+            try:
+                await self._write_batch([op])
+                self.written += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Write-behind {op.kind} {op.row.get('id')} failed: {str(e)}")
+                self.failed.append(op)
+
+    async def _write_batch(self, batch: List[WriteOp]):
+        grouped: Dict[str, Dict[int, Dict[str, Any]]] = {
+            INSERT_NODE: {}, INSERT_EDGE: {}, UPDATE_NODE: {}, UPDATE_EDGE: {}
+        }
+        for op in batch:
+            if op.kind == UPDATE_NODE and op.row["id"] in grouped[INSERT_NODE]:
+                # Row not written yet: fold the update into its insert
+                grouped[INSERT_NODE][op.row["id"]].update(op.row)
+            elif op.kind == UPDATE_EDGE and op.row["id"] in grouped[INSERT_EDGE]:
+                grouped[INSERT_EDGE][op.row["id"]].update(op.row)
+            else:
+                # Repeated updates to the same row coalesce to the latest one
+                grouped[op.kind][op.row["id"]] = op.row
+
+        # Nodes before the edges that reference them, inserts before updates
+        async with self.storage.unit_of_work(transaction=True):
+            await self.storage.insert_nodes(list(grouped[INSERT_NODE].values()))
+            await self.storage.insert_edges(list(grouped[INSERT_EDGE].values()))
+            await self.storage.update_nodes(list(grouped[UPDATE_NODE].values()))
+            await self.storage.update_edges(list(grouped[UPDATE_EDGE].values()))
+        logger.debug(f"Flushed write-behind batch of {len(batch)} ops")
+
+
+class WriteBuffer:
+    """
+    Buffers inserts with pre-assigned ids and coalesces updates until the next flush.
+
+    Used when write-behind is off: rows are collected for the duration of an
+    operation and written in bulk, inserts in foreign-key order before the
+    updates, so repeated merges into the same row cost a single write.
+    """
+
+    def __init__(self, storage: Optional[StorageBackend] = None,
+                 max_pending: int = WRITE_BEHIND_BATCH_SIZE):
+        self.storage = storage or get_storage()
+        self.max_pending = max_pending
+        self._rows: Dict[str, Dict[int, Dict[str, Any]]] = self._empty()
+
+    @staticmethod
+    def _empty() -> Dict[str, Dict[int, Dict[str, Any]]]:
+        return {INSERT_NODE: {}, INSERT_EDGE: {}, UPDATE_NODE: {}, UPDATE_EDGE: {}}
+
+    def __len__(self) -> int:
+        return sum(len(rows) for rows in self._rows.values())
+
+    def _buffer(self, kind: str, row: Dict[str, Any]) -> None:
+        if kind == UPDATE_NODE and row["id"] in self._rows[INSERT_NODE]:
+            self._rows[INSERT_NODE][row["id"]].update(row)
+        elif kind == UPDATE_EDGE and row["id"] in self._rows[INSERT_EDGE]:
+            self._rows[INSERT_EDGE][row["id"]].update(row)
+        else:
+            self._rows[kind][row["id"]] = row
+
+    async def add(self, kind: str, row: Dict[str, Any]) -> None:
+        """Buffer a write, flushing early once the buffer is full"""
+        self._buffer(kind, row)
+        if len(self) >= self.max_pending:
+            await self.flush()
+
+    async def flush(self) -> None:
+        """
+        Write all buffered rows in one transaction.
+
+        On error nothing is written and the rows stay buffered, ahead of any
+        added meanwhile, for the next flush.
+        """
+        if not len(self):
+            return
+        rows, self._rows = self._rows, self._empty()
+        try:
+            async with self.storage.unit_of_work(transaction=True):
+                await self.storage.insert_nodes(list(rows[INSERT_NODE].values()))
+                await self.storage.insert_edges(list(rows[INSERT_EDGE].values()))
+                await self.storage.update_nodes(list(rows[UPDATE_NODE].values()))
+                await self.storage.update_edges(list(rows[UPDATE_EDGE].values()))
+        except Exception:
+            newer, self._rows = self._rows, rows
+            for kind in KIND_ORDER:
+                for row in newer[kind].values():
+                    self._buffer(kind, row)
+            raise
+        logger.debug(f"Flushed {sum(len(r) for r in rows.values())} buffered writes")
@@ -124,4 +124,34 @@ async def cleanup_fixture(event_loop):
                 await asyncio.gather(*tasks, return_exceptions=True)
                 logger.info("Pending tasks cleaned up")
     except Exception as e:
-        logger.error(f"Error in cleanup: {e}")
\ No newline at end of file
+        logger.error(f"Error in cleanup: {e}")
+
+@pytest.fixture
+async def sqlite_storage(tmp_path):
+    """Embedded SQLite storage in a temporary file."""
+    from server.storage import SQLiteStorage
+
+    storage = SQLiteStorage(str(tmp_path / "graph.db"))
+    await storage.init()
+    yield storage
+    await storage.close()
+
+@pytest.fixture
+async def graph_manager_factory(sqlite_storage, tmp_path, monkeypatch):
+    """Build graph managers on the SQLite storage, shut down after the test."""
+    from server.graph_manager import GraphManager
+
+    # Graph history is written relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    managers = []
+
+    def build(**kwargs):
+        kwargs.setdefault("write_behind", False)
+        kwargs.setdefault("storage", sqlite_storage)
+        manager = GraphManager(**kwargs)
+        managers.append(manager)
+        return manager
+
+    yield build
+    for manager in managers:
+        await manager.shutdown()
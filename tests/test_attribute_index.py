@@ -0,0 +1,62 @@
+import pytest
+import logging
+from server.attribute_index import AttributeIndex, metadata_filter_values
+
+# Configure logging for tests
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def test_attribute_index_intersects_filters():
+    """Test that field and metadata filters intersect and page in id order."""
+    index = AttributeIndex()
+    for i in range(1, 11):
+        index.add(i, {"type": "concept" if i % 2 else "entity"}, {"batch": i % 3, "tags": ["a"]})
+
+    assert index.find({"type": "concept"}, {"batch": [1]}) == [1, 7]
+    assert index.find(None, {"batch": [0, 1]}, after=4, limit=3) == [6, 7, 9]
+    assert index.find({"type": None}, None, limit=2) == [1, 2]
+    # Nested values are not indexed
+    assert index.find(None, {"tags": [["a"]]}) == []
+
+    # Re-adding an element replaces its previous terms
+    index.add(7, {"type": "entity"}, {"batch": 2})
+    assert index.find({"type": "concept"}, {"batch": [1]}) == [1]
+    index.remove(1)
+    assert index.find({"type": "concept"}, {"batch": [1]}) == []
+
+def test_metadata_filter_values_keep_string_and_typed_forms():
+    """Test that query string values match both their string and JSON forms."""
+    assert metadata_filter_values("automated_expansion") == ["automated_expansion"]
+    assert metadata_filter_values("3") == [3, "3"]
+    assert metadata_filter_values("true") == [True, "true"]
+    assert metadata_filter_values('{"a": 1}') == ['{"a": 1}']
+
+@pytest.mark.asyncio
+async def test_graph_manager_filters_loaded_graph(sqlite_storage, graph_manager_factory):
+    """Test that a loaded graph answers filters from memory, including merges."""
+    manager = graph_manager_factory()
+    unloaded = await manager.find_nodes({"expansion_source": ["automated_expansion"]})
+    assert unloaded["source"] == "storage"
+
+    assert await manager.initialize()
+    first = await manager.create_node({
+        "label": "Alpha", "metadata": {"expansion_source": "automated_expansion"}
+    })
+    second = await manager.create_node({"label": "Beta", "metadata": {}})
+    await manager.create_edge({
+        "sourceId": first["id"],
+        "targetId": second["id"],
+        "metadata": {"source": "auto_reconnect"}
+    })
+
+    result = await manager.find_nodes({"expansion_source": ["automated_expansion"]})
+    assert result["source"] == "memory"
+    assert [node["id"] for node in result["items"]] == [first["id"]]
+    assert result["nextCursor"] is None
+
+    edges = await manager.find_edges({"source": ["auto_reconnect"]})
+    assert [(e["sourceId"], e["targetId"]) for e in edges["items"]] == [(first["id"], second["id"])]
+
+    # Memory and storage agree
+    stored = await sqlite_storage.find_edges({"source": ["auto_reconnect"]})
+    assert [e["id"] for e in stored] == [e["id"] for e in edges["items"]]
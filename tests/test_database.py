@@ -2,7 +2,11 @@ import pytest
 import asyncio
 import logging
 import asyncpg
-from server.database import init_db, get_pool, get_node, create_node, get_edge, create_edge, cleanup_pool
+from server.database import (
+    init_db, get_pool, get_node, create_node, get_edge, create_edge, cleanup_pool,
+    get_db, unit_of_work, reserve_node_ids, insert_nodes, get_pool_stats,
+    LatencyHistogram, ConnectionLimiter, PoolSizeController
+)
 
 # Configure logging for tests
 logging.basicConfig(level=logging.INFO)
@@ -192,4 +196,132 @@ async def test_invalid_operations(db_pool):
         logger.info("Invalid operations test passed")
     except Exception as e:
         logger.error(f"Invalid operations test failed: {e}")
-        raise
\ No newline at end of file
+        raise
+
+@pytest.mark.asyncio
+async def test_unit_of_work_reuses_connection(db_pool):
+    """Test that a unit of work holds one connection across statements."""
+    try:
+        async with unit_of_work() as uow:
+            async with get_db() as first:
+                await first.fetchval("SELECT 1")
+            async with get_db() as second:
+                await second.fetchval("SELECT 1")
+            assert first is second
+            assert uow.connection is first
+
+        # The connection is released when the unit of work ends
+        assert uow.connection is None
+
+        logger.info("Unit of work test passed")
+    except Exception as e:
+        logger.error(f"Unit of work test failed: {e}")
+        raise
+
+@pytest.mark.asyncio
+async def test_unit_of_work_transaction_rollback(db_pool):
+    """Test that a transactional unit of work rolls back on error."""
+    try:
+        test_label = f"test_uow_rollback_{asyncio.get_event_loop().time()}"
+        with pytest.raises(RuntimeError):
+            async with unit_of_work(transaction=True):
+                await create_node({"label": test_label, "type": "test"})
+                raise RuntimeError("abort unit of work")
+
+        async with get_db() as conn:
+            count = await conn.fetchval(
+                "SELECT COUNT(*) FROM nodes WHERE label = $1",
+                test_label
+            )
+        assert count == 0, "Unit of work rollback failed"
+
+        logger.info("Unit of work rollback test passed")
+    except Exception as e:
+        logger.error(f"Unit of work rollback test failed: {e}")
+        raise
+
+@pytest.mark.asyncio
+async def test_nested_transactional_unit_of_work_rolls_back(db_pool):
+    """Test that a transactional unit nested in a plain one is still atomic."""
+    test_label = f"test_uow_nested_{asyncio.get_event_loop().time()}"
+    async with unit_of_work():
+        await create_node({"label": f"{test_label}_outer", "type": "test"})
+        with pytest.raises(RuntimeError):
+            async with unit_of_work(transaction=True):
+                await create_node({"label": test_label, "type": "test"})
+                raise RuntimeError("abort nested unit of work")
+
+    async with get_db() as conn:
+        labels = await conn.fetch("SELECT label FROM nodes WHERE label LIKE $1", f"{test_label}%")
+    assert [row["label"] for row in labels] == [f"{test_label}_outer"]
+
+@pytest.mark.asyncio
+async def test_reserved_id_block_is_contiguous(db_pool):
+    """Test that reserved ids form a contiguous block no insert can land in."""
+    try:
+        block = await reserve_node_ids(5)
+        assert len(block) == 5
+        assert list(block) == list(range(block.start, block.start + 5))
+
+        # Inserts after the reservation are numbered past the block
+        node = await create_node({"label": f"After_reservation_{block.start}", "type": "test"})
+        assert node["id"] >= block.stop
+
+        # Reserved ids can be inserted explicitly
+        await insert_nodes([{"id": block.start, "label": f"Reserved_{block.start}", "type": "test"}])
+        reserved = await get_node(block.start)
+        assert reserved is not None
+
+        logger.info("Id reservation test passed")
+    except Exception as e:
+        logger.error(f"Id reservation test failed: {e}")
+        raise
+
+@pytest.mark.asyncio
+async def test_pool_stats_record_acquire_waits(db_pool):
+    """Test that connection checkouts and queries show up in pool telemetry."""
+    before = get_pool_stats()
+    async with get_db() as conn:
+        await conn.fetchval("SELECT 1")
+        assert get_pool_stats()["checkedOut"] == before["checkedOut"] + 1
+
+    stats = get_pool_stats()
+    assert stats["acquireWait"]["count"] == before["acquireWait"]["count"] + 1
+    assert stats["queryLatency"]["SELECT"]["count"] >= 1
+    assert stats["size"] >= stats["idle"]
+
+def test_latency_histogram_percentiles():
+    """Test that histogram percentiles resolve to bucket upper bounds."""
+    histogram = LatencyHistogram(buckets=(1, 10, 100))
+    for value in [0.5] * 90 + [50] * 9 + [500]:
+        histogram.observe(value)
+    assert histogram.percentile(0.5) == 1
+    assert histogram.percentile(0.95) == 100
+    assert histogram.percentile(1.0) == 500
+    assert histogram.to_dict()["buckets"]["overflow"] == 1
+
+def test_pool_size_controller_tracks_wait_time():
+    """Test that the limit grows under contention and shrinks when idle."""
+    controller = PoolSizeController(min_size=2, max_size=10, target_wait_ms=20, grow_step=2)
+    assert controller.adjust(4, p95_wait_ms=100, peak_in_use=4) == 6
+    assert controller.adjust(9, p95_wait_ms=100, peak_in_use=9) == 10
+    assert controller.adjust(6, p95_wait_ms=10, peak_in_use=6) == 6
+    assert controller.adjust(6, p95_wait_ms=1, peak_in_use=2) == 5
+    assert controller.adjust(2, p95_wait_ms=0, peak_in_use=0) == 2
+
+@pytest.mark.asyncio
+async def test_connection_limiter_admits_waiters_when_raised():
+    """Test that raising the limit admits queued checkouts."""
+    limiter = ConnectionLimiter(1)
+    await limiter.acquire()
+    waiter = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+    assert not waiter.done()
+
+    limiter.set_limit(2)
+    await asyncio.wait_for(waiter, timeout=1)
+    assert limiter.active == 2
+
+    limiter.release()
+    limiter.release()
+    assert limiter.active == 0
@@ -0,0 +1,462 @@
+import pytest
+import logging
+import os
+import json
+import time
+from datetime import datetime
+import asyncio
+import threading
+import networkx as nx
+import numpy as np
+from server.graph_evolution import GraphEvolutionTracker
+from server.history_writer import HistoryWriter
+from server.growth_estimator import GrowthEstimator
+from server.snapshot_index import IndexRecord, retained
+from server.graph_diff import graph_arrays, diff_arrays
+from server.snapshot_format import write_columnar, read_columnar, read_column, read_directory, MISSING
+
+# Configure logging for tests
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+@pytest.fixture
+def tracker(tmp_path):
+    """Evolution tracker writing to a temporary history directory."""
+    return GraphEvolutionTracker(history_path=str(tmp_path / "history"))
+
+def _add_node(tracker, graph, node_id, **attributes):
+    graph.add_node(node_id, **attributes)
+    tracker.record_node_creation(node_id, {"type": attributes.get("type", "concept")})
+
+def _add_edge(tracker, graph, source, target, **attributes):
+    graph.add_edge(source, target, **attributes)
+    tracker.record_edge_creation(source, target, {"label": attributes.get("label", "")})
+
+def test_snapshots_log_deltas_after_checkpoint(tracker):
+    """Test that snapshots after the first append only the changed elements."""
+    graph = nx.Graph()
+    _add_node(tracker, graph, "1", label="Alpha", metadata={})
+    _add_node(tracker, graph, "2", label="Beta", metadata={})
+    first = tracker.create_snapshot(graph, {"event": "initialization"})
+
+    _add_node(tracker, graph, "3", label="Gamma", metadata={})
+    _add_edge(tracker, graph, "1", "3", label="related_to", weight=0.5)
+    graph.nodes["1"]["metadata"]["description"] = "merged"
+    tracker.record_node_update("1")
+    second = tracker.create_snapshot(graph, {"event": "expansion"})
+
+    records = tracker.snapshots
+    assert records[0]["checkpoint"] == records[1]["checkpoint"]
+    events = list(tracker.log.read_events(records[1]["checkpoint"]))
+    assert [event["op"] for event in events] == ["snapshot", "node", "node", "edge", "snapshot"]
+    assert [f for f in os.listdir(tracker.history_path) if f.startswith("snapshot_")] == []
+
+    before = tracker.load_snapshot(first)
+    assert set(before.nodes()) == {"1", "2"}
+    assert before.nodes["1"]["metadata"] == {}
+
+    after = tracker.load_snapshot(second)
+    assert set(after.nodes()) == {"1", "2", "3"}
+    assert after.nodes["1"]["metadata"] == {"description": "merged"}
+    assert after["1"]["3"]["weight"] == 0.5
+    assert tracker.load_snapshot("missing") is None
+
+def test_snapshot_log_starts_new_checkpoint(tmp_path):
+    """Test that a full checkpoint is written once the segment passes the interval."""
+    tracker = GraphEvolutionTracker(history_path=str(tmp_path / "history"))
+    tracker.log.checkpoint_interval = 2
+    graph = nx.Graph()
+    tracker.create_snapshot(graph)
+    for i in range(3):
+        _add_node(tracker, graph, str(i), label=f"Node {i}")
+    last = tracker.create_snapshot(graph)
+
+    assert [s["checkpoint"] for s in tracker.snapshots] == [1, 2]
+    assert tracker.snapshots[-1]["nodes"] == 3
+    assert set(tracker.load_snapshot(last).nodes()) == {"0", "1", "2"}
+
+def test_columnar_checkpoint_round_trip(tmp_path):
+    """Test that checkpoints restore attributes exactly and columns load on their own."""
+    graph = nx.Graph()
+    graph.add_node("1", id=1, label="Alpha", type="concept", metadata={"merge_history": [{"reason": "x"}]})
+    graph.add_node("2", id=2, label="Beta", type="concept", metadata={})
+    graph.add_node("3", label=None, weight=2)
+    graph.add_edge("1", "2", id=7, sourceId=1, targetId=2, label="related_to", weight=0.5, metadata={})
+    graph.add_edge("2", "3", weight=1, label="next")
+
+    path = str(tmp_path / "checkpoint.kgc")
+    write_columnar(path, graph)
+    restored = read_columnar(path)
+    assert list(restored.nodes(data=True)) == list(graph.nodes(data=True))
+    assert {frozenset((u, v)): d for u, v, d in restored.edges(data=True)} == \
+        {frozenset((u, v)): d for u, v, d in graph.edges(data=True)}
+
+    assert read_directory(path)["edges"] == 2
+    assert read_column(path, "edge_id").tolist() == [7, MISSING]
+    assert read_column(path, "edge_weight")[0] == 0.5
+    strings = read_column(path, "strings")
+    assert [strings[i] for i in read_column(path, "node_key")] == ["1", "2", "3"]
+    with pytest.raises(KeyError):
+        read_column(path, "missing")
+
+def test_history_writer_writes_in_order_off_thread(tmp_path):
+    """Test that writes run on the writer thread in order and flush waits for them."""
+    writer = HistoryWriter(max_queue_size=4)
+    release = threading.Event()
+    path = str(tmp_path / "log.jsonl")
+    writer.submit(release.wait)
+    for i in range(3):
+        writer.append(path, f"{i}\n".encode())
+    assert not os.path.exists(path)
+    assert writer.pending == 4
+
+    release.set()
+    writer.flush()
+    with open(path) as f:
+        assert f.read() == "0\n1\n2\n"
+    writer.append(path, b"3\n")
+    writer.close()
+    assert writer.stats() == {"pending": 0, "written": 5, "failed": 0}
+
+def test_tracker_returns_snapshot_before_write(tracker):
+    """Test that snapshots are queued and durable after flush."""
+    release = threading.Event()
+    tracker.writer.submit(release.wait)
+    graph = nx.Graph()
+    _add_node(tracker, graph, "1", label="Alpha")
+    snapshot_id = tracker.create_snapshot(graph)
+    assert not os.path.exists(tracker.log.checkpoint_path(1))
+
+    release.set()
+    tracker.flush()
+    assert os.path.exists(tracker.log.checkpoint_path(1))
+    assert set(tracker.load_snapshot(snapshot_id).nodes()) == {"1"}
+    tracker.close()
+
+def test_snapshot_ids_are_monotonic_and_indexed(tmp_path):
+    """Test that snapshot ids never collide and are found through the index after a restart."""
+    history = str(tmp_path / "history")
+    tracker = GraphEvolutionTracker(history_path=history)
+    graph = nx.Graph()
+    ids = []
+    for i in range(3):
+        _add_node(tracker, graph, str(i), label=f"Node {i}")
+        ids.append(tracker.create_snapshot(graph))
+    tracker.close()
+    assert len(set(ids)) == 3 and ids == sorted(ids)
+
+    restarted = GraphEvolutionTracker(history_path=history)
+    assert len(restarted.index) == 3
+    assert set(restarted.load_snapshot(ids[1]).nodes()) == {"0", "1"}
+    assert restarted.create_snapshot(graph) > ids[-1]
+    first = restarted.index.get(1)
+    assert restarted.index.find_at(first.timestamp).number == 1
+    assert restarted.index.find_at(first.timestamp - 1) is None
+    restarted.close()
+
+def test_snapshots_are_recovered_on_first_use(tmp_path):
+    """Test that a restart defers reading the index and recovers without flushing the writer."""
+    history = str(tmp_path / "history")
+    tracker = GraphEvolutionTracker(history_path=history)
+    graph = nx.Graph()
+    _add_node(tracker, graph, "1", label="Alpha")
+    tracker.create_snapshot(graph)
+    tracker.close()
+
+    restarted = GraphEvolutionTracker(history_path=history)
+    assert not restarted._recovered
+    release = threading.Event()
+    restarted.writer.submit(release.wait)
+    assert [s["id"] for s in restarted.snapshots] == ["snapshot_00000001"]
+
+    release.set()
+    _add_node(restarted, graph, "2", label="Beta")
+    assert restarted.create_snapshot(graph) == "snapshot_00000002"
+    assert [s["nodes"] for s in restarted.snapshots] == [1, 2]
+    assert restarted.analyze_growth_rate()["snapshots_count"] == 2
+    restarted.close()
+
+def test_growth_estimator_matches_batch_fit():
+    """Test that the running sums give the least-squares exponent and a windowed trend."""
+    estimator = GrowthEstimator(window_hours=2)
+    assert estimator.estimate()["enough_data"] is False
+    start = 1_000_000.0
+    points = [(start + hour * 3600, int(10 * (hour + 1) ** 1.5), int(12 * (hour + 1) ** 2)) for hour in range(8)]
+    for point in points:
+        estimator.add(*point)
+
+    growth = estimator.estimate()
+    times = np.array([t - start for t, _, _ in points[1:]])
+    nodes = np.array([n for _, n, _ in points[1:]])
+    assert growth["node_power_law_exponent"] == pytest.approx(np.polyfit(np.log(times), np.log(nodes), 1)[0])
+    assert growth["node_growth_rate"] == pytest.approx((points[-1][1] - points[0][1]) / 7)
+    assert growth["snapshots_count"] == 8 and growth["hours_tracked"] == 7
+
+    recent = growth["recent"]
+    assert recent["snapshots_count"] == 3
+    assert recent["edge_growth_rate"] == pytest.approx((points[-1][2] - points[-3][2]) / 2)
+    window = np.array([t - start for t, _, _ in points[-3:]])
+    window_edges = np.array([e for _, _, e in points[-3:]])
+    assert recent["edge_power_law_exponent"] == pytest.approx(np.polyfit(np.log(window), np.log(window_edges), 1)[0])
+
+    estimator.rebuild(points[:2])
+    assert estimator.estimate()["snapshots_count"] == 2
+
+def test_hub_formation_from_creation_arrays(tracker):
+    """Test that hub connections come from the creation time arrays in creation order."""
+    graph = nx.Graph()
+    for node_id in ("hub", "a", "b", "c"):
+        _add_node(tracker, graph, node_id, label=node_id)
+    _add_edge(tracker, graph, "b", "hub", label="related_to")
+    _add_edge(tracker, graph, "hub", "a", label="related_to")
+    _add_edge(tracker, graph, "hub", "c", label="related_to")
+    _add_edge(tracker, graph, "a", "c", label="related_to")
+    graph.remove_edge("hub", "c")
+
+    creations = tracker.creation_timestamps
+    # One interned entry for all nodes and one for all edges
+    assert len(creations.metadata) == 2
+    assert len(creations.edge_times) == 4 and creations.edge_metadata.tolist() == [1, 1, 1, 1]
+    assert creations.node_metadata.tolist() == [0, 0, 0, 0]
+
+    hubs = tracker.analyze_hub_formation(graph, top_n=2)["top_hubs"]
+    hub = next(h for h in hubs if h["node_id"] == "hub")
+    assert [c["neighbor"] for c in hub["connection_sample"]] == ["b", "a"]
+    assert hub["created_at"] == creations.node_created("hub")
+    assert hub["created_at"] <= hub["connection_sample"][0]["created_at"]
+    assert creations.node_created("missing") is None
+
+def test_tracker_recovers_state_after_restart(tmp_path):
+    """Test that snapshots, growth, feedback and creation times survive a restart."""
+    history = str(tmp_path / "history")
+    tracker = GraphEvolutionTracker(history_path=history)
+    graph = nx.Graph()
+    _add_node(tracker, graph, "1", label="Alpha")
+    tracker.create_snapshot(graph)
+    _add_node(tracker, graph, "2", label="Beta")
+    _add_edge(tracker, graph, "1", "2", label="related_to")
+    tracker.create_snapshot(graph)
+    for i in range(5):
+        tracker.record_feedback("system", "quality", {"i": i})
+    created = tracker.creation_timestamps.node_created("1")
+    tracker.close()
+
+    restarted = GraphEvolutionTracker(history_path=history)
+    assert [s["nodes"] for s in restarted.snapshots] == [1, 2]
+    assert restarted.snapshots[-1]["id"] == "snapshot_00000002"
+    assert restarted.analyze_growth_rate()["snapshots_count"] == 2
+    assert [f["data"]["i"] for f in restarted.get_recent_feedback(3)] == [2, 3, 4]
+
+    restarted.record_node_loaded("1", {"source": "initialization"})
+    restarted.record_edge_loaded("2", "1", {"source": "initialization"})
+    restarted.record_node_loaded("3", {"source": "initialization"})
+    assert restarted.creation_timestamps.node_created("1") == created
+    assert len(restarted.creation_timestamps.edge_times) == 1
+    assert restarted.creation_timestamps.node_created("3") > created
+    restarted.close()
+
+def test_feedback_store_pages_by_type_and_time(tracker):
+    """Test that feedback is batched, bounded in memory and paged through the index."""
+    tracker.feedback.buffer_size = 3
+    tracker.feedback.batch_size = 4
+    for i in range(10):
+        tracker.record_feedback("user", "quality" if i % 2 else "relevance", {"i": i})
+    assert len(tracker.feedback._lines) == 2
+    assert [f["data"]["i"] for f in tracker.get_recent_feedback(10, "quality")] == [5, 7, 9]
+
+    page = tracker.get_feedback("quality", limit=2, offset=1)
+    assert page["total"] == 5
+    assert [f["data"]["i"] for f in page["entries"]] == [7, 5]
+    assert tracker.get_feedback()["total"] == 10
+    assert tracker.get_feedback("missing") == {"total": 0, "entries": []}
+    later = tracker.get_feedback(start=time.time() + 60)
+    assert later["total"] == 0
+
+def test_feedback_store_indexes_legacy_log(tmp_path):
+    """Test that a feedback log written without an index is indexed on first use."""
+    history = tmp_path / "history"
+    history.mkdir()
+    with open(history / "feedback_history.jsonl", "w") as f:
+        for i in range(3):
+            f.write(json.dumps({"timestamp": f"2025-01-0{i + 1}T00:00:00", "source": "user",
+                                "type": "quality", "data": {"i": i}}) + "\n")
+    tracker = GraphEvolutionTracker(history_path=str(history))
+    assert [f["data"]["i"] for f in tracker.get_recent_feedback(2, "quality")] == [1, 2]
+    tracker.record_feedback("user", "quality", {"i": 3})
+    page = tracker.get_feedback("quality", end=datetime(2025, 1, 2, 12).timestamp())
+    assert [f["data"]["i"] for f in page["entries"]] == [1, 0]
+    assert tracker.get_feedback("quality")["total"] == 4
+    tracker.close()
+
+def test_degree_trajectory_index(tracker):
+    """Test degree over time and fastest-growing nodes from the edge creation log."""
+    creations = tracker.creation_timestamps
+    day = 86400
+    for node_id in ("hub", "a", "b", "c", "d"):
+        creations.add_node(node_id, 0)
+    creations.add_edge("hub", "a", 1 * day)
+    creations.add_edge("b", "hub", 2 * day)
+    creations.add_edge("c", "d", 3 * day)
+    creations.add_edge("hub", "c", 4 * day)
+    creations.add_edge("d", "a", 4 * day + 60)
+
+    trajectory = tracker.degree_trajectory("hub")
+    assert trajectory["degree"] == [1, 2, 3] and trajectory["initialDegree"] == 0
+    windowed = tracker.degree_trajectory("hub", start=1.5 * day, end=3 * day)
+    assert windowed["initialDegree"] == 1 and windowed["degree"] == [2]
+    assert tracker.degree_trajectory("missing") is None
+
+    growth = tracker.fastest_growing_nodes(window_hours=48, now=4 * day + 120, limit=2)
+    assert [(g["nodeId"], g["gained"], g["degree"]) for g in growth] == [("c", 2, 2), ("d", 2, 2)]
+    assert tracker.fastest_growing_nodes(window_hours=1, now=5 * day) == []
+
+    creations.add_edge("hub", "d", 5 * day)
+    assert tracker.degree_trajectory("hub")["degree"] == [1, 2, 3, 4]
+
+def test_creation_window_index(tracker):
+    """Test that creation ranges are found by time even when recorded out of order."""
+    creations = tracker.creation_timestamps
+    creations.add_node("1", 100)
+    creations.add_node("2", 300)
+    creations.add_node("3", 200)
+    creations.add_edge("1", "2", 300)
+    creations.add_edge("1", "3", 250)
+    assert tracker.created_between(150, 260) == (["3"], [("1", "3")])
+    assert tracker.created_between(end=100) == (["1"], [])
+    creations.add_node("1", 400)
+    assert tracker.created_between(start=250)[0] == ["2", "1"]
+
+def test_retention_policy_buckets():
+    """Test that old snapshots are thinned to one per hour, then one per day."""
+    hour, day = 3600, 86400
+    now = 100 * day
+    records = [
+        IndexRecord(1, now - 40 * day, 1, 0, 0, 0),
+        IndexRecord(2, now - 40 * day + 60, 1, 0, 0, 0),
+        IndexRecord(3, now - 2 * day, 1, 0, 0, 0),
+        IndexRecord(4, now - 2 * day + 60, 1, 0, 0, 0),
+        IndexRecord(5, now - 2 * day + 2 * hour, 1, 0, 0, 0),
+        IndexRecord(6, now - hour, 1, 0, 0, 0),
+        IndexRecord(7, now - 60, 1, 0, 0, 0),
+    ]
+    assert retained(records, now) == {2, 4, 5, 6, 7}
+
+def test_compaction_drops_unretained_segments(tracker):
+    """Test that compaction removes closed segments without retained snapshots."""
+    tracker.log.checkpoint_interval = 1
+    graph = nx.Graph()
+    ids = []
+    for i in range(3):
+        _add_node(tracker, graph, f"{i}a", label="A")
+        _add_node(tracker, graph, f"{i}b", label="B")
+        ids.append(tracker.create_snapshot(graph))
+    tracker.flush()
+    assert tracker.log.checkpoints() == [1, 2, 3]
+
+    stats = tracker.compact(now=time.time() + 40 * 86400)
+    tracker.flush()
+    assert stats == {"droppedSnapshots": 2, "deletedCheckpoints": 2, "truncatedSegments": 0}
+    assert tracker.log.checkpoints() == [3]
+    assert [s["id"] for s in tracker.snapshots] == [ids[2]]
+    assert len(tracker.index) == 1 and len(tracker.index.records()) == 1
+    assert tracker.load_snapshot(ids[0]) is None
+    assert tracker.load_snapshot(ids[2]).number_of_nodes() == 6
+
+def test_graph_at_reconstructs_and_caches(tracker):
+    """Test that historical graphs are found by id or time and cached."""
+    graph = nx.Graph()
+    _add_node(tracker, graph, "1", label="Alpha")
+    first = tracker.create_snapshot(graph)
+    _add_node(tracker, graph, "2", label="Beta")
+    _add_edge(tracker, graph, "1", "2", label="related_to")
+    second = tracker.create_snapshot(graph)
+
+    record, at_first = tracker.graph_at(snapshot_id=first)
+    assert set(at_first.nodes()) == {"1"}
+    assert tracker.graph_at(snapshot_id=first)[1] is at_first
+
+    second_record = tracker.index.get(2)
+    record, at_time = tracker.graph_at(timestamp=second_record.timestamp + 1)
+    assert record.number == 2 and at_time.has_edge("1", "2")
+    assert tracker.graph_at(timestamp=tracker.index.get(1).timestamp - 1) is None
+    assert tracker.graph_at(snapshot_id="snapshot_00000099") is None
+    assert tracker.graph_at(snapshot_id="bogus") is None
+    assert second == "snapshot_00000002"
+
+def test_diff_arrays_finds_added_removed_and_changed():
+    """Test that set operations over sorted keys classify every change."""
+    old = nx.Graph()
+    old.add_node("1", label="Alpha")
+    old.add_node("2", label="Beta")
+    old.add_node("10", label="Gamma")
+    old.add_edge("2", "1", weight=1.0)
+    old.add_edge("10", "2", weight=1.0)
+    new = old.copy()
+    new.nodes["2"]["label"] = "Beta prime"
+    new.remove_node("10")
+    new.add_node("3", label="Delta")
+    new.add_edge("1", "3", weight=1.0)
+    new["1"]["2"]["weight"] = 2.0
+
+    diff = diff_arrays(graph_arrays(old), graph_arrays(new))
+    assert diff["nodes"]["added"].tolist() == [3]
+    assert diff["nodes"]["removed"].tolist() == [10]
+    assert diff["nodes"]["changed"].tolist() == [2]
+    assert diff["edges"]["added"].tolist() == [(1, 3)]
+    assert diff["edges"]["removed"].tolist() == [(2, 10)]
+    assert diff["edges"]["changed"].tolist() == [(1, 2)]
+    unchanged = diff_arrays(graph_arrays(new), graph_arrays(new))
+    assert all(len(keys) == 0 for kind in unchanged.values() for keys in kind.values())
+
+@pytest.mark.asyncio
+async def test_graph_manager_get_graph_at(graph_manager_factory):
+    """Test that the manager returns historical graphs in the API format."""
+    manager = graph_manager_factory()
+    assert await manager.initialize()
+    await manager.create_node({"label": "Alpha"})
+    await manager.recalculate_clusters()
+
+    initial = await manager.get_graph_at(snapshot_id="snapshot_00000001")
+    assert initial["nodes"] == []
+    latest = await manager.get_graph_at(timestamp=time.time() + 60)
+    assert [node["label"] for node in latest["nodes"]] == ["Alpha"]
+    assert latest["snapshot"]["nodes"] == 1
+    assert await manager.get_graph_at(snapshot_id="snapshot_00000042") is None
+
+    diff = await manager.get_graph_diff("snapshot_00000001", latest["snapshot"]["id"])
+    assert [node["label"] for node in diff["nodes"]["added"]] == ["Alpha"]
+    assert diff["nodes"]["removed"] == [] and diff["edges"]["added"] == []
+    assert await manager.get_graph_diff("snapshot_00000001", "snapshot_00000042") is None
+
+    alpha = latest["nodes"][0]
+    cutoff = time.time()
+    beta = await manager.create_node({"label": "Beta"})
+    await manager.create_edge({"sourceId": beta["id"], "targetId": alpha["id"], "label": "related_to"})
+    window = await manager.get_window(start=cutoff)
+    assert [node["label"] for node in window["nodes"]] == ["Beta"]
+    assert len(window["edges"]) == 1 and "contextNodes" not in window
+    window = await manager.get_window(start=cutoff, context=True)
+    assert [node["label"] for node in window["contextNodes"]] == ["Alpha"]
+    assert window["contextEdges"] == []
+    assert (await manager.get_window(end=cutoff))["edges"] == []
+
+@pytest.mark.asyncio
+async def test_metrics_sampled_off_the_read_path(graph_manager_factory):
+    """Test that reads never record metrics and the sampler does."""
+    manager = graph_manager_factory()
+    manager.sample_mutations = 2
+    assert await manager.initialize()
+    await manager.create_node({"label": "Alpha"})
+    await manager.get_graph_data()
+    assert manager.evolution_tracker.metrics.query()["timestamps"] == []
+    assert manager.mutations_since_sample == 1
+
+    await manager.create_node({"label": "Beta"})
+    assert manager._sample_requested.is_set()
+    manager.start_metrics_sampler(interval=3600)
+    for _ in range(50):
+        if manager.mutations_since_sample == 0 and manager.evolution_tracker.metrics.query()["timestamps"]:
+            break
+        await asyncio.sleep(0.05)
+    history = manager.evolution_tracker.metrics.query(["nodes"])
+    assert history["series"]["nodes"] == [2.0]
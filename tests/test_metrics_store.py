@@ -0,0 +1,60 @@
+import pytest
+import logging
+from server.history_writer import HistoryWriter
+from server.metrics_store import MetricsStore, summarize_metrics
+
+# Configure logging for tests
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def _metrics(n):
+    return {
+        "degree": {str(i): i % 3 for i in range(n)},
+        "betweenness": {str(i): i / n for i in range(n)},
+        "eigenvector": {str(i): 0.1 for i in range(n)},
+        "scaleFreeness": {"powerLawExponent": 2.0, "fitQuality": 0.9, "hubNodes": [], "bridgingNodes": []}
+    }
+
+@pytest.fixture
+def store(tmp_path):
+    """Metrics store with hourly buckets and one day of raw retention."""
+    writer = HistoryWriter()
+    yield MetricsStore(str(tmp_path / "metrics"), writer,
+                       raw_retention_hours=24, downsample_seconds=3600, summary_interval=300)
+    writer.close()
+
+def test_summarize_metrics():
+    """Test that per-node maps are reduced to scalar columns."""
+    row = summarize_metrics(_metrics(4))
+    assert row["nodes"] == 4 and row["edges"] == 1.5
+    assert row["maxDegree"] == 2 and row["maxBetweenness"] == 0.75
+    assert row["powerLawExponent"] == 2.0
+
+def test_metrics_store_range_query_and_summaries(store):
+    """Test that range queries slice the columns and summaries are thinned."""
+    for i in range(10):
+        store.append(1000.0 + 60 * i, _metrics(i + 1))
+    result = store.query(["nodes"], start=1060, end=1180)
+    assert result["timestamps"] == [1060.0, 1120.0, 1180.0]
+    assert result["series"]["nodes"] == [2.0, 3.0, 4.0]
+    assert len(store.query()["timestamps"]) == 10
+
+    summaries = store.summaries()
+    assert [s["timestamp"] for s in summaries] == [1000.0, 1300.0]
+    assert summaries[-1]["betweenness"][0] == ["5", 5 / 6]
+    with pytest.raises(KeyError):
+        store.query(["missing"])
+
+def test_metrics_store_downsamples_old_samples(store):
+    """Test that samples older than the raw retention become hourly means."""
+    hour = 3600
+    for i in range(4):
+        store.append(i * 900.0, _metrics(2 * i + 1))
+    store.append(hour + 10.0, _metrics(20))
+    store.append(30 * hour, _metrics(30))
+
+    store.downsample(now=30 * hour)
+    result = store.query(["nodes"])
+    assert result["timestamps"] == [0.0, float(hour), 30.0 * hour]
+    assert result["series"]["nodes"] == [4.0, 20.0, 30.0]
+    assert store.query(["nodes"], start=hour)["series"]["nodes"] == [20.0, 30.0]
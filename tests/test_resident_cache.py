@@ -0,0 +1,85 @@
+import pytest
+import logging
+import networkx as nx
+from server.resident_cache import LabelIndex, ResidentGraphCache
+
+# Configure logging for tests
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+async def _chain(storage, length):
+    """Persist a path graph 1 - 2 - ... - length."""
+    nodes = [await storage.create_node({"label": f"Node {i}", "type": "concept"}) for i in range(length)]
+    for u, v in zip(nodes, nodes[1:]):
+        await storage.create_edge({"sourceId": u["id"], "targetId": v["id"], "label": "next"})
+    return [node["id"] for node in nodes]
+
+def test_label_index_exact_and_entries():
+    """Test that the label index keeps the first exact match and insertion order."""
+    labels = LabelIndex()
+    labels.add(3, "Graph", "concept")
+    labels.add(1, "graph", "entity")
+    labels.add(2, "Network", "concept")
+    assert len(labels) == 3 and 1 in labels and 4 not in labels
+    assert labels.find_exact("GRAPH") == 3
+    assert labels.get(1) == ("graph", "entity")
+    assert list(labels.entries()) == [(3, "Graph", "concept"), (1, "graph", "entity"), (2, "Network", "concept")]
+
+    labels.add(1, "Renamed", "concept")
+    assert labels.get(1) == ("Renamed", "concept")
+    assert len(labels) == 3
+
+@pytest.mark.asyncio
+async def test_resident_cache_faults_in_and_evicts_lru(sqlite_storage):
+    """Test that misses are fetched with full adjacency and the least recent node is evicted."""
+    ids = await _chain(sqlite_storage, 6)
+    graph = nx.Graph()
+    flushed = []
+
+    async def before_fetch():
+        flushed.append(True)
+
+    cache = ResidentGraphCache(graph, sqlite_storage, capacity=3, fetch_batch_size=1, before_fetch=before_fetch)
+    await cache.ensure(ids[:2])
+    assert set(graph.nodes()) == {str(ids[0]), str(ids[1])}
+    assert graph.has_edge(str(ids[0]), str(ids[1]))
+    # Degree counts the edge to the non-resident third node
+    assert cache.degree(ids[1]) == 2
+    assert cache.fetches == 2 and len(flushed) == 1
+
+    await cache.ensure([ids[0]])
+    await cache.ensure(ids[2:4])
+    assert set(graph.nodes()) == {str(ids[0]), str(ids[2]), str(ids[3])}
+    assert graph.has_edge(str(ids[2]), str(ids[3]))
+    assert graph.number_of_edges() == 1
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["hits"] == 1
+
+@pytest.mark.asyncio
+async def test_graph_manager_out_of_core_merges(sqlite_storage, graph_manager_factory):
+    """Test that lru residency merges into and links non-resident nodes."""
+    ids = await _chain(sqlite_storage, 5)
+
+    manager = graph_manager_factory(residency="lru", cache_size=2)
+    assert await manager.initialize()
+    assert manager.graph.number_of_nodes() == 0
+    assert manager.residency_stats()["totalNodes"] == 5
+
+    # Exact label match against a node that is not resident
+    merged = await manager.create_node({"label": "node 3", "metadata": {"description": "merged"}})
+    assert merged["id"] == ids[3]
+    assert manager.graph.has_node(str(ids[3]))
+
+    edge = await manager.create_edge({"sourceId": ids[0], "targetId": ids[4], "label": "shortcut"})
+    assert edge["label"] == "shortcut"
+    assert manager.graph.number_of_nodes() <= 2
+    assert manager._degree(str(ids[0])) == 2
+
+    metrics = manager.calculate_metrics()
+    assert metrics["approximate"] is True
+    assert metrics["totalNodes"] == 5
+
+    reloaded = graph_manager_factory()
+    assert await reloaded.initialize()
+    assert reloaded.graph.has_edge(str(ids[0]), str(ids[4]))
+    assert reloaded.graph.nodes[str(ids[3])]["metadata"]["description"] == "merged"
@@ -0,0 +1,98 @@
+import pytest
+import logging
+import random
+import networkx as nx
+from server import community_detection, semantic_clustering
+from server.semantic_clustering import SemanticClusteringService
+
+# Configure logging for tests
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def _pairwise_coherence(service, nodes):
+    """Mean similarity over every pair, as computed before the closed form."""
+    similarities = [
+        service.calculate_node_similarity(nodes[i], nodes[j])
+        for i in range(len(nodes)) for j in range(i + 1, len(nodes))
+    ]
+    return sum(similarities) / len(similarities)
+
+def _random_graph(seed, size):
+    rng = random.Random(seed)
+    words = ["cell", "cell wall", "wall", "membrane", "cell membrane", "protein", "protein fold", ""]
+    graph = nx.Graph()
+    for i in range(size):
+        graph.add_node(str(i), label=rng.choice(words).title(), type=rng.choice(["concept", "entity", "process"]))
+    for _ in range(size * 2):
+        graph.add_edge(str(rng.randrange(size)), str(rng.randrange(size)))
+    return graph
+
+@pytest.mark.parametrize("seed", range(5))
+def test_coherence_matches_pairwise_similarity(seed):
+    """Test that the closed-form coherence equals the mean pairwise similarity."""
+    graph = _random_graph(seed, 40)
+    service = SemanticClusteringService(graph)
+    nodes = list(graph.nodes())
+    assert service.calculate_cluster_coherence(nodes) == pytest.approx(_pairwise_coherence(service, nodes))
+    assert service.calculate_cluster_coherence(nodes[:1]) == 1.0
+
+def test_coherence_samples_substring_term(monkeypatch):
+    """Test that the sampled substring estimate stays close to the exact value."""
+    graph = _random_graph(7, 300)
+    for node_id in graph.nodes():
+        graph.nodes[node_id]["label"] += f" {int(node_id) % 50}"
+    service = SemanticClusteringService(graph)
+    nodes = list(graph.nodes())
+    exact = service.calculate_cluster_coherence(nodes)
+    assert exact == pytest.approx(_pairwise_coherence(service, nodes))
+
+    monkeypatch.setattr(semantic_clustering, "COHERENCE_EXACT_LABELS", 10)
+    assert service.calculate_cluster_coherence(nodes) == pytest.approx(exact, abs=0.02)
+
+def _cliques(count, size):
+    """Cliques joined in a ring by single edges."""
+    graph = nx.Graph()
+    for c in range(count):
+        members = [str(c * size + i) for i in range(size)]
+        graph.add_nodes_from(members, label=f"Topic {c}", type="concept")
+        graph.add_edges_from((u, v) for i, u in enumerate(members) for v in members[i + 1:])
+        graph.add_edge(members[0], str(((c + 1) % count) * size + 1))
+    return graph
+
+@pytest.mark.parametrize("method", ["louvain", "label_propagation"])
+def test_cluster_nodes_finds_communities(method):
+    """Test that a connected graph is split into its dense communities."""
+    graph = _cliques(4, 6)
+    service = SemanticClusteringService(graph, method=method)
+    clusters = service.cluster_nodes()
+    assert sorted(sorted(map(int, c["nodes"])) for c in clusters) == [
+        [c * 6 + i for i in range(6)] for c in range(4)
+    ]
+    assert all(c["metadata"]["size"] == 6 for c in clusters)
+    assert service.summary["clusterCount"] == 4
+    expected = nx.community.modularity(graph, [set(c["nodes"]) for c in clusters])
+    assert service.summary["modularity"] == pytest.approx(expected)
+
+    components = SemanticClusteringService(graph, method="components")
+    assert len(components.cluster_nodes()) == 1
+    assert components.summary["modularity"] == pytest.approx(0.0)
+
+def test_resolution_changes_cluster_size():
+    """Test that a low resolution merges communities and a high one splits them."""
+    graph = _cliques(8, 5)
+    counts = [len(SemanticClusteringService(graph, resolution=r).cluster_nodes()) for r in (0.01, 1.0, 20.0)]
+    assert counts[0] < counts[1] == 8 < counts[2]
+
+def test_louvain_modularity_on_planted_partition():
+    """Test that Louvain recovers planted communities as well as networkx does."""
+    graph = nx.planted_partition_graph(10, 40, 0.3, 0.01, seed=3)
+    nodes, matrix = community_detection.adjacency(graph)
+    labels = community_detection.louvain(matrix)
+    reference = nx.community.louvain_communities(graph, seed=0)
+    assert community_detection.modularity(matrix, labels) >= nx.community.modularity(graph, reference) - 0.01
+
+def test_unknown_clustering_method():
+    """Test that an unknown method is rejected."""
+    with pytest.raises(ValueError):
+        SemanticClusteringService(nx.Graph(), method="spectral")
+    assert SemanticClusteringService(nx.Graph()).cluster_nodes() == []
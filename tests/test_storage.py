@@ -0,0 +1,146 @@
+import pytest
+import logging
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from server.storage import SQLiteStorage, create_storage, PostgresStorage
+from server.graph_manager import graph_manager
+from server.routes import db as db_routes
+
+# Configure logging for tests
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def test_create_storage_selects_backend():
+    """Test that backends are selected by name."""
+    assert isinstance(create_storage("postgres"), PostgresStorage)
+    assert isinstance(create_storage("sqlite"), SQLiteStorage)
+    with pytest.raises(ValueError):
+        create_storage("mongodb")
+
+def test_pool_endpoints_follow_active_backend(tmp_path, monkeypatch):
+    """Test that pool telemetry is only served by backends with a pool."""
+    app = FastAPI()
+    app.include_router(db_routes.router)
+    client = TestClient(app)
+
+    monkeypatch.setattr(graph_manager, "storage", SQLiteStorage(str(tmp_path / "graph.db")))
+    assert client.get("/api/db/pool").status_code == 404
+    assert client.post("/api/db/pool/reset").status_code == 404
+
+    resets = []
+    postgres = PostgresStorage()
+    monkeypatch.setattr(postgres, "stats", lambda: {"backend": "postgres", "pool": {}})
+    monkeypatch.setattr(postgres, "reset_stats", lambda: resets.append(True))
+    monkeypatch.setattr(graph_manager, "storage", postgres)
+    assert client.get("/api/db/pool").json() == {"backend": "postgres", "pool": {}}
+    assert client.post("/api/db/pool/reset").status_code == 200
+    assert resets == [True]
+
+@pytest.mark.asyncio
+async def test_sqlite_node_and_edge_crud(sqlite_storage):
+    """Test node and edge CRUD against the SQLite backend."""
+    try:
+        node1 = await sqlite_storage.create_node({"label": "Node 1", "metadata": {"source": "test"}})
+        node2 = await sqlite_storage.create_node({"label": "Node 2", "type": "entity"})
+        assert await sqlite_storage.get_node(node1["id"]) == node1
+        assert node2["type"] == "entity"
+
+        edge = await sqlite_storage.create_edge({
+            "sourceId": node1["id"],
+            "targetId": node2["id"],
+            "label": "relates_to",
+            "weight": 0.5
+        })
+        assert await sqlite_storage.get_edge(edge["id"]) == edge
+        assert edge["weight"] == 0.5
+
+        # Edges to missing nodes are rejected, as with Postgres
+        assert await sqlite_storage.create_edge({"sourceId": node1["id"], "targetId": 999}) is None
+
+        assert await sqlite_storage.delete_node(node1["id"])
+        assert await sqlite_storage.get_node(node1["id"]) is None
+        assert await sqlite_storage.get_edge(edge["id"]) is None
+        assert not await sqlite_storage.delete_edge(edge["id"])
+    except Exception as e:
+        logger.error(f"SQLite CRUD test failed: {str(e)}")
+        raise
+
+@pytest.mark.asyncio
+async def test_sqlite_bulk_writes_and_streaming(sqlite_storage):
+    """Test bulk inserts with reserved ids, batched updates and streamed reads."""
+    node_ids = await sqlite_storage.reserve_node_ids(25)
+    assert len(node_ids) == 25
+    await sqlite_storage.insert_nodes([{"id": i, "label": f"Node {i}"} for i in node_ids])
+    edge_ids = await sqlite_storage.reserve_edge_ids(24)
+    await sqlite_storage.insert_edges([
+        {"id": edge_id, "sourceId": node_ids[i], "targetId": node_ids[i + 1]}
+        for i, edge_id in enumerate(edge_ids)
+    ])
+    await sqlite_storage.update_nodes([{"id": node_ids[0], "label": "Hub", "metadata": {"merged": 3}}])
+    await sqlite_storage.update_edges([{"id": edge_ids[0], "weight": 2.0, "metadata": {}}])
+
+    # Rows created after the reservation never land inside the reserved block
+    node = await sqlite_storage.create_node({"label": "After reservation"})
+    assert node["id"] > node_ids[-1]
+
+    batches = [batch async for batch in sqlite_storage.iter_nodes(batch_size=10)]
+    assert [len(batch) for batch in batches] == [10, 10, 6]
+    assert batches[0][0]["label"] == "Hub"
+    assert batches[0][0]["metadata"] == {"merged": 3}
+
+    graph = await sqlite_storage.get_full_graph()
+    assert len(graph["nodes"]) == 26
+    assert len(graph["edges"]) == 24
+    assert graph["edges"][0]["weight"] == 2.0
+
+@pytest.mark.asyncio
+async def test_sqlite_transaction_rollback(sqlite_storage):
+    """Test that a failed transactional unit of work leaves no rows behind."""
+    with pytest.raises(RuntimeError):
+        async with sqlite_storage.unit_of_work(transaction=True):
+            await sqlite_storage.create_node({"label": "Rolled back"})
+            raise RuntimeError("abort")
+    assert await sqlite_storage.get_all_nodes() == []
+
+    async with sqlite_storage.unit_of_work(transaction=True):
+        await sqlite_storage.create_node({"label": "Committed"})
+    assert [node["label"] for node in await sqlite_storage.get_all_nodes()] == ["Committed"]
+
+@pytest.mark.asyncio
+async def test_graph_manager_runs_on_sqlite(graph_manager_factory):
+    """Test that the graph manager persists and reloads through SQLite."""
+    manager = graph_manager_factory()
+    assert await manager.initialize()
+    source = await manager.create_node({"label": "Storage"})
+    target = await manager.create_node({"label": "Backend"})
+    await manager.create_edge({"sourceId": source["id"], "targetId": target["id"]})
+
+    reloaded = graph_manager_factory()
+    assert await reloaded.initialize()
+    assert reloaded.graph.number_of_nodes() == 2
+    assert reloaded.graph.has_edge(str(source["id"]), str(target["id"]))
+
+@pytest.mark.asyncio
+async def test_sqlite_metadata_filters(sqlite_storage):
+    """Test that metadata filters are pushed down to SQLite and paginated."""
+    for i in range(5):
+        await sqlite_storage.create_node({
+            "label": f"Expanded {i}",
+            "metadata": {"expansion_source": "automated_expansion", "iteration": i}
+        })
+    manual = await sqlite_storage.create_node({"label": "Manual", "type": "entity", "metadata": {"iteration": 1}})
+
+    page = await sqlite_storage.find_nodes({"expansion_source": ["automated_expansion"]}, limit=3)
+    assert [node["label"] for node in page] == ["Expanded 0", "Expanded 1", "Expanded 2"]
+    rest = await sqlite_storage.find_nodes({"expansion_source": ["automated_expansion"]}, after=page[-1]["id"], limit=3)
+    assert [node["label"] for node in rest] == ["Expanded 3", "Expanded 4"]
+
+    # "1" from a query string matches the number 1
+    matches = await sqlite_storage.find_nodes({"iteration": [1, "1"]}, node_type="entity")
+    assert [node["id"] for node in matches] == [manual["id"]]
+
+    edge = await sqlite_storage.create_edge({
+        "sourceId": page[0]["id"], "targetId": manual["id"], "metadata": {"source": "auto_reconnect"}
+    })
+    assert await sqlite_storage.find_edges({"source": ["auto_reconnect"]}) == [edge]
+    assert await sqlite_storage.find_edges({"source": ["auto_reconnect"]}, label="other") == []
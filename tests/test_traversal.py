@@ -0,0 +1,89 @@
+import pytest
+import random
+import logging
+from server.traversal import bounded_neighborhood, bounded_shortest_path
+
+# Configure logging for tests
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ADJACENCY = {1: [2, 3, 4], 2: [1, 5], 3: [1, 6], 4: [1], 5: [2, 7], 6: [3, 7], 7: [5, 6]}
+
+def test_bounded_neighborhood_limits():
+    """Test depth, fan-out and size limits of the neighborhood traversal."""
+    neighbors = ADJACENCY.__getitem__
+    assert bounded_neighborhood(neighbors, 1, 1) == {1: 0, 2: 1, 3: 1, 4: 1}
+    assert bounded_neighborhood(neighbors, 1, 2, fanout=2) == {1: 0, 2: 1, 3: 1, 5: 2, 6: 2}
+    assert list(bounded_neighborhood(neighbors, 1, 3, max_nodes=3)) == [1, 2, 3]
+
+def test_bounded_neighborhood_stops_at_max_nodes():
+    """Test that a star graph is not expanded past the level that fills max_nodes."""
+    leaves = list(range(2, 10_002))
+    expanded = []
+
+    def neighbors(node_id):
+        expanded.append(node_id)
+        return leaves if node_id == 1 else [1]
+
+    assert list(bounded_neighborhood(neighbors, 1, 3, max_nodes=10)) == [1] + leaves[:9]
+    assert expanded == [1]
+
+def test_bounded_shortest_path_prefers_lowest_parent():
+    """Test that equally short paths resolve to the lowest parent ids."""
+    neighbors = ADJACENCY.__getitem__
+    assert bounded_shortest_path(neighbors, 1, 7) == [1, 2, 5, 7]
+    assert bounded_shortest_path(neighbors, 1, 7, max_depth=2) is None
+    assert bounded_shortest_path(neighbors, 4, 4) == [4]
+
+@pytest.fixture
+async def random_graph(sqlite_storage):
+    """Node ids of a random sparse graph persisted in SQLite."""
+    rng = random.Random(7)
+    node_ids = await sqlite_storage.reserve_node_ids(60)
+    await sqlite_storage.insert_nodes([{"id": i, "label": f"Node {i}"} for i in node_ids])
+    pairs = {tuple(sorted(rng.sample(list(node_ids), 2))) for _ in range(90)}
+    edge_ids = await sqlite_storage.reserve_edge_ids(len(pairs))
+    await sqlite_storage.insert_edges([
+        {"id": edge_id, "sourceId": u, "targetId": v} for edge_id, (u, v) in zip(edge_ids, sorted(pairs))
+    ])
+    return list(node_ids)
+
+@pytest.mark.asyncio
+async def test_sql_and_memory_traversals_agree(random_graph, graph_manager_factory):
+    """Test that recursive SQL queries return what the in-memory traversal does."""
+    node_ids = random_graph
+    resident = graph_manager_factory()
+    assert await resident.initialize()
+    on_disk = graph_manager_factory()
+
+    for start in node_ids[:10]:
+        for depth, fanout in [(1, None), (2, 2), (3, 3)]:
+            memory = await resident.get_neighborhood(start, depth, fanout)
+            sql = await on_disk.get_neighborhood(start, depth, fanout)
+            assert (memory["source"], sql["source"]) == ("memory", "storage")
+            assert [(n["id"], n["depth"]) for n in memory["nodes"]] == [(n["id"], n["depth"]) for n in sql["nodes"]]
+            assert sorted(e["id"] for e in memory["edges"]) == sorted(e["id"] for e in sql["edges"])
+
+        for target in node_ids[-5:]:
+            memory = await resident.find_path(start, target, max_depth=6, fanout=4)
+            sql = await on_disk.find_path(start, target, max_depth=6, fanout=4)
+            assert [n["id"] for n in memory["nodes"]] == [n["id"] for n in sql["nodes"]]
+            assert [e["id"] for e in memory["edges"]] == [e["id"] for e in sql["edges"]]
+
+    assert await on_disk.get_neighborhood(10_000, 2) is None
+    assert await on_disk.find_path(node_ids[0], 10_000) is None
+
+@pytest.mark.asyncio
+async def test_sqlite_neighborhood_of_star(sqlite_storage):
+    """Test that the SQLite neighborhood of a large star stops at max_nodes."""
+    node_ids = await sqlite_storage.reserve_node_ids(5001)
+    center, leaves = node_ids[0], list(node_ids[1:])
+    await sqlite_storage.insert_nodes([{"id": i, "label": f"Node {i}"} for i in node_ids])
+    edge_ids = await sqlite_storage.reserve_edge_ids(len(leaves))
+    await sqlite_storage.insert_edges([
+        {"id": edge_id, "sourceId": center, "targetId": leaf} for edge_id, leaf in zip(edge_ids, leaves)
+    ])
+    hood = await sqlite_storage.neighborhood(center, 3, max_nodes=10)
+    assert hood == {center: 0, **{leaf: 1 for leaf in leaves[:9]}}
+    hood = await sqlite_storage.neighborhood(leaves[0], 2, fanout=3)
+    assert hood == {leaves[0]: 0, center: 1, leaves[1]: 2, leaves[2]: 2}
@@ -0,0 +1,165 @@
+import pytest
+import asyncio
+import logging
+from types import SimpleNamespace
+from server.write_behind import (
+    WriteBehindQueue, WriteBehindError, WriteBuffer, INSERT_NODE, INSERT_EDGE, UPDATE_NODE, UPDATE_EDGE
+)
+
+# Configure logging for tests
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+@pytest.fixture
+def recorded_writes(sqlite_storage, monkeypatch):
+    """Record the batched writes sent to the storage backend."""
+    writes = []
+    latest_rows = {}
+
+    def recorder(kind):
+        write = getattr(sqlite_storage, kind)
+
+        async def record(rows):
+            if rows:
+                writes.append((kind, [row["id"] for row in rows]))
+                latest_rows.update({(kind, row["id"]): row for row in rows})
+            await write(rows)
+        return record
+
+    for kind in ("insert_nodes", "insert_edges", "update_nodes", "update_edges"):
+        monkeypatch.setattr(sqlite_storage, kind, recorder(kind))
+    return SimpleNamespace(ops=writes, rows=latest_rows)
+
+@pytest.mark.asyncio
+async def test_write_behind_flush_persists_in_order(sqlite_storage, recorded_writes):
+    """Test that queued writes are flushed in batches, nodes before edges."""
+    queue = WriteBehindQueue(sqlite_storage, batch_size=100, linger=0.01, id_block_size=10)
+    try:
+        node_a = await queue.create_node({"label": "A"})
+        node_b = await queue.create_node({"label": "B"})
+        edge = await queue.create_edge({"sourceId": node_a["id"], "targetId": node_b["id"]})
+        await queue.enqueue(UPDATE_NODE, {"id": 7, "label": "Existing"})
+
+        # Ids are assigned up front from the pre-allocated range
+        assert (node_a["id"], node_b["id"], edge["id"]) == (1, 2, 1)
+
+        await queue.flush()
+        assert queue.pending == 0
+        assert recorded_writes.ops == [
+            ("insert_nodes", [1, 2]),
+            ("insert_edges", [1]),
+            ("update_nodes", [7]),
+        ]
+        assert queue.stats()["written"] == 4
+
+        persisted = await sqlite_storage.get_full_graph()
+        assert [node["label"] for node in persisted["nodes"]] == ["A", "B"]
+        assert [(e["sourceId"], e["targetId"]) for e in persisted["edges"]] == [(1, 2)]
+    finally:
+        await queue.close()
+
+@pytest.mark.asyncio
+async def test_write_behind_queue_is_bounded(sqlite_storage, recorded_writes):
+    """Test that producers wait once the queue is full."""
+    queue = WriteBehindQueue(sqlite_storage, max_queue_size=2, batch_size=1, linger=0)
+    try:
+        for i in range(10):
+            await asyncio.wait_for(queue.create_node({"label": f"Node {i}"}), timeout=1)
+            assert queue.pending <= 2
+        await queue.close()
+        assert sum(len(ids) for _, ids in recorded_writes.ops) == 10
+    finally:
+        await queue.close()
+
+@pytest.mark.asyncio
+async def test_write_behind_folds_updates_into_pending_inserts(sqlite_storage, recorded_writes):
+    """Test that updates to rows still queued for insert are merged into the insert."""
+    queue = WriteBehindQueue(sqlite_storage, batch_size=100, linger=0.01)
+    try:
+        node = await queue.create_node({"label": "A", "metadata": {}})
+        await queue.enqueue(UPDATE_NODE, {"id": node["id"], "label": "A", "metadata": {"merged": 1}})
+        await queue.enqueue(UPDATE_NODE, {"id": node["id"], "label": "A", "metadata": {"merged": 2}})
+        await queue.flush()
+
+        assert recorded_writes.ops == [("insert_nodes", [node["id"]])]
+        assert recorded_writes.rows[("insert_nodes", node["id"])]["metadata"] == {"merged": 2}
+    finally:
+        await queue.close()
+
+@pytest.mark.asyncio
+async def test_write_behind_isolates_failed_rows(sqlite_storage, monkeypatch):
+    """Test that a failing row is set aside without dropping the rest of its batch."""
+    insert_edges = sqlite_storage.insert_edges
+    broken = {2}
+
+    async def failing_insert_edges(rows):
+        if any(row["id"] in broken for row in rows):
+            raise RuntimeError("constraint violation")
+        await insert_edges(rows)
+
+    monkeypatch.setattr(sqlite_storage, "insert_edges", failing_insert_edges)
+    queue = WriteBehindQueue(sqlite_storage, batch_size=100, linger=0.01, max_retries=2)
+    try:
+        node_a = await queue.create_node({"label": "A"})
+        node_b = await queue.create_node({"label": "B"})
+        await queue.create_edge({"sourceId": node_a["id"], "targetId": node_b["id"]})
+        await queue.create_edge({"sourceId": node_b["id"], "targetId": node_a["id"]})
+        with pytest.raises(WriteBehindError):
+            await queue.flush()
+        assert [op.row["id"] for op in queue.failed] == [2]
+        assert queue.stats()["written"] == 3
+        persisted = await sqlite_storage.get_full_graph()
+        assert len(persisted["nodes"]) == 2 and len(persisted["edges"]) == 1
+
+        broken.clear()
+        await queue.replay_failed()
+        assert not queue.failed
+        assert len((await sqlite_storage.get_full_graph())["edges"]) == 2
+    finally:
+        await queue.close()
+
+@pytest.mark.asyncio
+async def test_write_buffer_coalesces_repeated_updates(sqlite_storage, recorded_writes):
+    """Test that repeated updates to one row are written once with the latest state."""
+    buffer = WriteBuffer(sqlite_storage)
+    for i in range(5):
+        await buffer.add(UPDATE_NODE, {"id": 3, "label": "Hub", "metadata": {"version": i}})
+    await buffer.add(UPDATE_EDGE, {"id": 9, "weight": 0.5, "metadata": {}})
+    await buffer.add(UPDATE_EDGE, {"id": 9, "weight": 0.8, "metadata": {}})
+    assert len(buffer) == 2
+
+    await buffer.flush()
+    assert len(buffer) == 0
+    assert recorded_writes.ops == [("update_nodes", [3]), ("update_edges", [9])]
+    assert recorded_writes.rows[("update_nodes", 3)]["metadata"] == {"version": 4}
+    assert recorded_writes.rows[("update_edges", 9)]["weight"] == 0.8
+
+@pytest.mark.asyncio
+async def test_write_buffer_keeps_rows_when_flush_fails(sqlite_storage, monkeypatch):
+    """Test that a failed flush writes nothing and keeps every row buffered."""
+    insert_edges = sqlite_storage.insert_edges
+    failing = [True]
+
+    async def failing_insert_edges(rows):
+        if failing[0]:
+            raise RuntimeError("constraint violation")
+        await insert_edges(rows)
+
+    monkeypatch.setattr(sqlite_storage, "insert_edges", failing_insert_edges)
+    buffer = WriteBuffer(sqlite_storage)
+    await buffer.add(INSERT_NODE, {"id": 1, "label": "A", "type": "concept", "metadata": {}})
+    await buffer.add(INSERT_NODE, {"id": 2, "label": "B", "type": "concept", "metadata": {}})
+    await buffer.add(INSERT_EDGE, {"id": 1, "sourceId": 1, "targetId": 2, "label": "related_to",
+                                   "weight": 1.0, "metadata": {}})
+    with pytest.raises(RuntimeError):
+        await buffer.flush()
+    assert len(buffer) == 3
+    assert (await sqlite_storage.get_full_graph())["nodes"] == []
+
+    await buffer.add(UPDATE_NODE, {"id": 1, "label": "A", "type": "concept", "metadata": {"merged": 1}})
+    failing[0] = False
+    await buffer.flush()
+    assert len(buffer) == 0
+    persisted = await sqlite_storage.get_full_graph()
+    assert [node["metadata"] for node in persisted["nodes"]] == [{"merged": 1}, {}]
+    assert len(persisted["edges"]) == 1